@@ -0,0 +1,70 @@
+import os
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from analytics import reports
+
+
+def last_month():
+    return (timezone.localdate().replace(day=1) - timedelta(days=1)).strftime('%Y-%m')
+
+
+class Command(BaseCommand):
+    help = 'Build the month-end report (visits, prescriptions, services mix per doctor) as CSV and JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', default=None, help='Month to report on as YYYY-MM; default last month.')
+        parser.add_argument(
+            '--partition', choices=('doctor', 'date'), default='doctor',
+            help='Split the work by doctor or by date range.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Worker processes, each with its own database connection; 1 runs in this process.',
+        )
+        parser.add_argument('--output-dir', default='.', help='Where to write monthly-report-<month>.csv/.json.')
+        parser.add_argument(
+            '--benchmark', action='store_true',
+            help='Time 1, 2, 4 ... up to --workers processes instead of writing the report.',
+        )
+
+    def handle(self, *args, **options):
+        month = options['month'] or last_month()
+        try:
+            reports.month_bounds(month)
+        except ValueError:
+            raise CommandError(f'--month must look like 2026-01, not {month!r}.')
+
+        if options['benchmark']:
+            return self.benchmark(month, options)
+
+        started = time.perf_counter()
+        report = reports.run(month, by=options['partition'], workers=options['workers'])
+        os.makedirs(options['output_dir'], exist_ok=True)
+        base = os.path.join(options['output_dir'], f'monthly-report-{month}')
+        reports.write(report, f'{base}.csv', f'{base}.json')
+        self.stdout.write(self.style.SUCCESS(
+            f"{month}: {report['totals']['appointments']} appointments for {len(report['doctors'])} doctors "
+            f"in {time.perf_counter() - started:.2f}s; wrote {base}.csv and {base}.json"
+        ))
+
+    def benchmark(self, month, options):
+        counts = [1]
+        while counts[-1] * 2 <= options['workers']:
+            counts.append(counts[-1] * 2)
+        if counts[-1] != options['workers']:
+            counts.append(options['workers'])
+
+        baseline = expected = None
+        for workers in counts:
+            started = time.perf_counter()
+            report = reports.run(month, by=options['partition'], workers=workers)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            expected = expected or report
+            if report != expected:
+                raise CommandError(f'{workers} workers produced a different report than 1 worker.')
+            self.stdout.write(f'{workers:>3} workers: {elapsed:6.2f}s  ({baseline / elapsed:.1f}x)')
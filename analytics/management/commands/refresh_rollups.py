@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics.rollups import NotBackfilled, refresh
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily appointment rollups of days with changes since the last run. Run every few minutes.'
+
+    def handle(self, *args, **options):
+        try:
+            days = refresh()
+        except NotBackfilled as e:
+            raise CommandError(e)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt rollups for {days} days.'))
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+        ("doctors", "0003_doctor_deleted_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeletedPatientRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("patient_id", models.BigIntegerField(db_index=True)),
+                ("date", models.DateField()),
+                (
+                    "service",
+                    models.CharField(
+                        choices=[
+                            ("General Checkup", "General Checkup"),
+                            ("Dental Care", "Dental Care"),
+                            ("Cardiology Consultation", "Cardiology Consultation"),
+                            ("Eye Examination", "Eye Examination"),
+                            ("Skin Treatment", "Skin Treatment"),
+                            ("Orthopedic Consultation", "Orthopedic Consultation"),
+                            ("Pediatric Care", "Pediatric Care"),
+                            ("Neurological Assessment", "Neurological Assessment"),
+                            ("ENT Consultation", "ENT Consultation"),
+                            ("Mental Health Counseling", "Mental Health Counseling"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("Pending", "Pending"),
+                            ("Approved", "Approved"),
+                            ("Completed", "Completed"),
+                            ("Cancelled", "Cancelled"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField()),
+                (
+                    "doctor",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="deleted_patient_rollups",
+                        to="doctors.doctor",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["date"], name="deleted_rollup_date_idx")
+                ],
+            },
+        ),
+    ]
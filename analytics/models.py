@@ -0,0 +1,73 @@
+from django.db import models
+
+from doctors.models import Doctor
+from medicines.models import Appointment
+
+
+class DailyAppointmentRollup(models.Model):
+    """Appointments on one day for one service, doctor and status; see analytics.rollups.
+
+    The analytics page reads only these rows. When a doctor is deleted their
+    rows are kept with ``doctor`` cleared, so hospital totals do not change;
+    deleted patients are kept through DeletedPatientRollup.
+    """
+    date = models.DateField()
+    service = models.CharField(max_length=50, choices=Appointment.SERVICE_CHOICES)
+    doctor = models.ForeignKey(Doctor, on_delete=models.SET_NULL, null=True, blank=True, related_name='rollups')
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    count = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.date} {self.service} / {self.doctor_id} / {self.status}: {self.count}"
+
+    class Meta:
+        ordering = ['date']
+        indexes = [
+            models.Index(fields=['date'], name='rollup_date_idx'),
+        ]
+
+
+class DeletedPatientRollup(models.Model):
+    """A deleted patient's appointments on one day for one service, doctor and status.
+
+    Recorded by purge_patient before the appointments are removed and added
+    into DailyAppointmentRollup by every rebuild of that day, so hospital
+    totals do not change when a patient deletes their account.
+    """
+    patient_id = models.BigIntegerField(db_index=True)  # not a ForeignKey: the patient is purged
+    date = models.DateField()
+    service = models.CharField(max_length=50, choices=Appointment.SERVICE_CHOICES)
+    doctor = models.ForeignKey(
+        Doctor, on_delete=models.SET_NULL, null=True, blank=True, related_name='deleted_patient_rollups',
+    )
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    count = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.date} {self.service} / {self.doctor_id} / {self.status}: {self.count} (patient {self.patient_id})"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date'], name='deleted_rollup_date_idx'),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """How far through Appointment.updated_at the rollups have been refreshed."""
+    name = models.CharField(max_length=50, unique=True)
+    changed_through = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.changed_through}"
+
+
+class StaleRollupDate(models.Model):
+    """A day whose rollups need recomputing for a change updated_at cannot show.
+
+    Deleted appointments leave no row behind, and a rescheduled one only
+    carries its new date; the views that do either record the old day here.
+    """
+    date = models.DateField(unique=True)
+
+    def __str__(self):
+        return str(self.date)
@@ -0,0 +1,155 @@
+"""Month-end report: visits, prescriptions and services mix per doctor.
+
+The month is split into partitions, by doctor or by date range. ``run``
+builds each one in a worker process, which opens its own database
+connection, and then merges the partial results. A partition streams its
+appointment rows with ``iterator()`` and never holds the month in memory.
+Live and archived appointments are both counted.
+"""
+import csv
+import json
+from calendar import monthrange
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from django.db import connections
+
+from doctors.models import Doctor
+from medicines.models import Appointment, ArchivedAppointment, ArchivedPrescription, Prescription
+
+CSV_FIELDS = (
+    'doctor_id', 'doctor', 'specialization', 'appointments', 'visits', 'cancelled',
+    'patients', 'prescriptions', 'top_service',
+)
+# Partitions per worker, so one slow partition does not leave the other workers idle at the end
+PARTITIONS_PER_WORKER = 4
+
+
+def month_bounds(month):
+    """First and last day of ``month`` given as 'YYYY-MM'."""
+    year, number = map(int, month.split('-'))
+    return date(year, number, 1), date(year, number, monthrange(year, number)[1])
+
+
+def partitions(month, by, count):
+    """Up to ``count`` filters that together cover the month's appointments exactly once."""
+    first, last = month_bounds(month)
+    if by == 'date':
+        days = (last - first).days + 1
+        size = -(-days // min(count, days))
+        return [
+            {'date__range': (first + timedelta(days=start), min(first + timedelta(days=start + size - 1), last))}
+            for start in range(0, days, size)
+        ]
+    if count == 1:
+        return [{'date__range': (first, last)}]
+    doctor_ids = list(Doctor.objects.order_by('id').values_list('id', flat=True))
+    return [
+        {'date__range': (first, last), 'doctor_id__in': doctor_ids[i::count]}
+        for i in range(min(count, len(doctor_ids)))
+    ]
+
+
+def empty_counts():
+    return {
+        'appointments': 0, 'visits': 0, 'cancelled': 0, 'prescriptions': 0,
+        'patients': set(), 'services': Counter(),
+    }
+
+
+def build_partition(filters):
+    """Partial report for one partition: {doctor_id: counters}, patients as sets so they merge exactly."""
+    doctors = {}
+    for appointment_model, prescription_model in ((Appointment, Prescription), (ArchivedAppointment, ArchivedPrescription)):
+        rows = appointment_model.objects.filter(**filters).order_by().values_list('doctor_id', 'patient_id', 'service', 'status')
+        for doctor_id, patient_id, service, status in rows.iterator(chunk_size=2000):
+            partial = doctors.setdefault(doctor_id, empty_counts())
+            partial['appointments'] += 1
+            partial['visits'] += status == 'Completed'
+            partial['cancelled'] += status == 'Cancelled'
+            partial['patients'].add(patient_id)
+            partial['services'][service] += 1
+
+        prescribed = prescription_model.objects.filter(
+            **{f'appointment__{key}': value for key, value in filters.items()}
+        ).order_by().values_list('appointment__doctor_id', flat=True)
+        for doctor_id in prescribed.iterator(chunk_size=2000):
+            # The appointment may have been booked or archived between the two queries
+            doctors.setdefault(doctor_id, empty_counts())['prescriptions'] += 1
+    return doctors
+
+
+def _build_in_worker(filters):
+    try:
+        return build_partition(filters)
+    finally:
+        connections.close_all()
+
+
+def _start_worker():
+    # Under spawn (macOS, Windows) the worker starts without Django set up
+    import django
+    django.setup()
+
+
+def merge(partials):
+    doctors = {}
+    for partial in partials:
+        for doctor_id, counts in partial.items():
+            merged = doctors.setdefault(doctor_id, empty_counts())
+            for key in ('appointments', 'visits', 'cancelled', 'prescriptions'):
+                merged[key] += counts[key]
+            merged['patients'] |= counts['patients']
+            merged['services'] += counts['services']
+    return doctors
+
+
+def run(month, by='doctor', workers=1):
+    """Build the report for ``month`` on ``workers`` processes; return it as a dict."""
+    filters = partitions(month, by, workers * PARTITIONS_PER_WORKER if workers > 1 else 1)
+    if workers == 1:
+        partials = [build_partition(f) for f in filters]
+    else:
+        # Forked workers must not share the parent's connection
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker) as pool:
+            partials = list(pool.map(_build_in_worker, filters))
+    merged = merge(partials)
+
+    names = Doctor.objects.in_bulk(list(merged))
+    rows = []
+    services = Counter()
+    for doctor_id, counts in sorted(merged.items()):
+        doctor = names.get(doctor_id)
+        services += counts['services']
+        rows.append({
+            'doctor_id': doctor_id,
+            'doctor': doctor.name if doctor else '',
+            'specialization': doctor.specialization if doctor else '',
+            'appointments': counts['appointments'],
+            'visits': counts['visits'],
+            'cancelled': counts['cancelled'],
+            'patients': len(counts['patients']),
+            'prescriptions': counts['prescriptions'],
+            'top_service': next(iter(counts['services'].most_common(1)), ('',))[0],
+            'services': dict(counts['services'].most_common()),
+        })
+    return {
+        'month': month,
+        'doctors': rows,
+        'totals': {
+            key: sum(row[key] for row in rows)
+            for key in ('appointments', 'visits', 'cancelled', 'prescriptions')
+        },
+        'services': dict(services.most_common()),
+    }
+
+
+def write(report, csv_path, json_path):
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(report['doctors'])
+    with open(json_path, 'w') as f:
+        json.dump(report, f, indent=2)
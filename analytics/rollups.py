@@ -0,0 +1,129 @@
+"""Daily appointment rollups, kept up to date without rescanning Appointment.
+
+A day's rollups are always rebuilt whole from that day's live and archived
+appointments, so rebuilding a day twice is harmless. What changes is which
+days get rebuilt:
+
+* ``refresh()`` rebuilds the days of appointments whose updated_at is past
+  the watermark (an index range scan), plus the days ``mark_stale`` recorded
+  for deletions and reschedules, then moves the watermark.
+* ``rebuild(date__range=...)`` is what the backfill runs per chunk.
+
+Deleting an account never changes hospital totals. Rows of deleted doctors
+(doctor is NULL) are never rebuilt, because their appointments are gone; they
+keep the doctor's history in the totals. Rows of soft-deleted doctors are left
+alone too: their appointments are being purged in batches, and recounting them
+part-way would lose that history. A patient's appointments are spread over
+every doctor's rows, so ``retain_patient`` copies their counts into
+DeletedPatientRollup before purge_patient removes them; rebuilds add those
+counts back and skip whatever is left of the patient's live rows.
+"""
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from doctors.models import Doctor
+from medicines.models import Appointment, ArchivedAppointment
+
+from .models import DailyAppointmentRollup, DeletedPatientRollup, RollupWatermark, StaleRollupDate
+
+WATERMARK = 'appointments'
+KEY_FIELDS = ('date', 'service', 'doctor_id', 'status')
+# Days rebuilt per transaction by refresh()
+DATES_PER_REBUILD = 100
+
+
+class NotBackfilled(Exception):
+    """refresh() ran before the first backfill."""
+
+
+def mark_stale(dates):
+    """Have the next refresh() rebuild ``dates``; call after deleting or moving appointments off them."""
+    StaleRollupDate.objects.bulk_create([StaleRollupDate(date=d) for d in set(dates)], ignore_conflicts=True)
+
+
+def frozen_doctor_ids():
+    """Soft-deleted doctors, whose rollups are kept as they were."""
+    return list(Doctor.objects.filter(deleted_at__isnull=False).values_list('id', flat=True))
+
+
+def count_appointments(exclude_doctors=(), exclude_patients=(), **date_filter):
+    """Appointments per (date, service, doctor_id, status), archived ones included."""
+    counts = Counter()
+    for model in (Appointment, ArchivedAppointment):
+        rows = model.objects.filter(**date_filter).exclude(doctor_id__in=exclude_doctors)
+        rows = rows.exclude(patient_id__in=exclude_patients)
+        rows = rows.order_by().values(*KEY_FIELDS).annotate(n=Count('id'))
+        for row in rows:
+            counts[tuple(row[field] for field in KEY_FIELDS)] += row['n']
+    return counts
+
+
+def retain_patient(patient_id):
+    """Keep a patient's appointments in the rollups once purge_patient has removed them.
+
+    Safe to call again for the same patient, as a retried job would.
+    """
+    with transaction.atomic():
+        if DeletedPatientRollup.objects.filter(patient_id=patient_id).exists():
+            return
+        DeletedPatientRollup.objects.bulk_create([
+            DeletedPatientRollup(patient_id=patient_id, **dict(zip(KEY_FIELDS, key)), count=count)
+            for key, count in count_appointments(patient_id=patient_id).items()
+        ])
+
+
+def rebuild(**date_filter):
+    """Replace the rollups of the days matching ``date_filter``; return the rows written."""
+    frozen = frozen_doctor_ids()
+    counts = count_appointments(
+        exclude_doctors=frozen,
+        exclude_patients=DeletedPatientRollup.objects.values('patient_id'),
+        **date_filter,
+    )
+    retained = DeletedPatientRollup.objects.filter(doctor__isnull=False, **date_filter).exclude(doctor_id__in=frozen)
+    for row in retained.order_by().values(*KEY_FIELDS).annotate(n=Sum('count')):
+        counts[tuple(row[field] for field in KEY_FIELDS)] += row['n']
+    with transaction.atomic():
+        DailyAppointmentRollup.objects.filter(doctor__isnull=False, **date_filter).exclude(doctor_id__in=frozen).delete()
+        DailyAppointmentRollup.objects.bulk_create([
+            DailyAppointmentRollup(**dict(zip(KEY_FIELDS, key)), count=count)
+            for key, count in counts.items()
+        ], batch_size=1000)
+    return len(counts)
+
+
+def watermark():
+    return RollupWatermark.objects.filter(name=WATERMARK).values_list('changed_through', flat=True).first()
+
+
+def set_watermark(changed_through):
+    RollupWatermark.objects.update_or_create(name=WATERMARK, defaults={'changed_through': changed_through})
+
+
+def refresh(now=None):
+    """Rebuild every day with a change since the watermark; return the days rebuilt.
+
+    Raises NotBackfilled before backfill_rollups has set a watermark: every day
+    would need rebuilding, and the backfill does that in bounded date chunks.
+    """
+    now = now or timezone.now()
+    since = watermark()
+    if since is None:
+        raise NotBackfilled('There is no rollup watermark yet; run backfill_rollups first.')
+    # Re-read a little before the watermark: a transaction that began earlier may have committed since
+    overlap = timedelta(seconds=settings.ANALYTICS_REFRESH_OVERLAP)
+    changed = Appointment.objects.order_by().filter(updated_at__gt=since - overlap)
+    stale = set(StaleRollupDate.objects.values_list('date', flat=True))
+    # Deduplicated here: with DISTINCT, SQLite prefers scanning the whole rollup index in date order
+    dates = sorted(set(changed.values_list('date', flat=True)) | stale)
+
+    for i in range(0, len(dates), DATES_PER_REBUILD):
+        rebuild(date__in=dates[i:i + DATES_PER_REBUILD])
+    StaleRollupDate.objects.filter(date__in=stale).delete()
+    set_watermark(now)
+    return len(dates)
@@ -0,0 +1,169 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from doctors.models import Doctor
+from hospital_management.soft_delete import purge
+from hospital_management.testing import QueryBudgetTestCase
+from medicines.models import Appointment, Prescription
+from patients.models import Patient
+from patients.tasks import purge_patient
+
+from .models import DailyAppointmentRollup
+from .reports import build_partition, partitions, run
+from .rollups import rebuild, refresh
+
+
+def rollup_counts():
+    return {
+        (r.date, r.service, r.doctor_id, r.status): r.count
+        for r in DailyAppointmentRollup.objects.all()
+    }
+
+
+def live_counts():
+    rows = Appointment.objects.order_by().values('date', 'service', 'doctor_id', 'status').annotate(n=Count('id'))
+    return {(r['date'], r['service'], r['doctor_id'], r['status']): r['n'] for r in rows}
+
+
+# The test data is created moments before the backfill, so re-reading before the watermark would see all of it
+@override_settings(ANALYTICS_REFRESH_OVERLAP=0)
+class RollupTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        call_command('backfill_rollups', workers=1, chunk_days=10, stdout=StringIO())
+
+    def test_backfill_matches_appointments(self):
+        self.assertEqual(rollup_counts(), live_counts())
+
+    def test_refresh_follows_changes(self):
+        cancelled, moved, deleted = self.patient.appointments.all()[:3]
+        self.login_patient()
+        self.client.post(reverse('cancel_appointment', args=[cancelled.id]))
+        self.client.post(reverse('update_appointment', args=[moved.id]), {
+            'doctor': moved.doctor_id, 'service': moved.service, 'date': '2026-12-24', 'time': '10:00',
+        })
+        self.client.get(reverse('delete_appointment', args=[deleted.id]))
+
+        # Three changed days and the new date, however many appointments there are
+        with self.assertMaxQueries(20):
+            self.assertEqual(refresh(), 4)
+        self.assertEqual(rollup_counts(), live_counts())
+
+    def test_deleted_doctor_history_is_kept(self):
+        doctor = self.doctors[1]
+        appointments = doctor.appointments.count()
+        doctor.delete()
+        refresh()
+        orphaned = DailyAppointmentRollup.objects.filter(doctor__isnull=True)
+        self.assertEqual(sum(r.count for r in orphaned), appointments)
+
+    def test_purged_doctor_history_is_counted_once(self):
+        doctor = self.doctors[1]
+        total = sum(rollup_counts().values())
+        Doctor.objects.filter(id=doctor.id).soft_delete()
+        # Half-way through the purge, a refresh rebuilds every day
+        purge_appointments = doctor.appointments.order_by('id')[:10]
+        Appointment.objects.filter(id__in=list(purge_appointments.values_list('id', flat=True))).delete()
+        rebuild(date__range=('2026-01-01', '2026-12-31'))
+        self.assertEqual(sum(rollup_counts().values()), total)
+
+        purge(doctor, batch_size=5)
+        rebuild(date__range=('2026-01-01', '2026-12-31'))
+        self.assertEqual(sum(rollup_counts().values()), total)
+        self.assertFalse(DailyAppointmentRollup.objects.filter(doctor_id=doctor.id).exists())
+
+    def test_purged_patient_history_is_kept(self):
+        expected = rollup_counts()
+        Patient.objects.filter(id=self.patient.id).soft_delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            purge_patient.enqueue(patient_id=self.patient.id)
+        with self.settings(ACCOUNT_PURGE_BATCH_SIZE=2):
+            call_command('run_jobs', once=True, concurrency=1, stdout=StringIO(), stderr=StringIO())
+        # Run twice, as a retried job would
+        purge_patient(patient_id=self.patient.id)
+
+        self.assertFalse(Appointment.objects.filter(patient_id=self.patient.id).exists())
+        refresh()
+        self.assertEqual(rollup_counts(), expected)
+        # A later rebuild of those days, say for another patient's change, still counts them
+        rebuild(date__range=('2026-01-01', '2026-12-31'))
+        self.assertEqual(rollup_counts(), expected)
+
+
+class RefreshWithoutBackfillTests(QueryBudgetTestCase):
+    def test_asks_for_a_backfill(self):
+        with self.assertRaisesMessage(CommandError, 'run backfill_rollups first'):
+            call_command('refresh_rollups', stdout=StringIO())
+        self.assertFalse(DailyAppointmentRollup.objects.exists())
+
+
+class AnalyticsDashboardTests(QueryBudgetTestCase):
+    def test_staff_only(self):
+        response = self.client.get(reverse('analytics_dashboard'))
+        self.assertRedirects(response, f"{reverse('admin:login')}?next={reverse('analytics_dashboard')}",
+                             fetch_redirect_response=False)
+
+    def test_reads_only_rollups(self):
+        call_command('backfill_rollups', workers=1, stdout=StringIO())
+        staff = User.objects.create_user('manager', password='secret', is_staff=True)
+        self.client.force_login(staff)
+        with self.assertMaxQueries(7), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('analytics_dashboard'), {'days': 365})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q['sql'] for q in queries.captured_queries if '"medicines_appointment"' in q['sql']])
+
+
+class MonthlyReportTests(QueryBudgetTestCase):
+    MONTH = '2026-02'
+
+    def test_partitions_agree(self):
+        # Worker processes cannot see the test transaction, so the partitions run in this process
+        whole = run(self.MONTH)
+        for by in ('doctor', 'date'):
+            with self.subTest(by):
+                partials = partitions(self.MONTH, by, 3)
+                self.assertEqual(len(partials), 3)
+                with mock.patch('analytics.reports.partitions', return_value=partials):
+                    self.assertEqual(run(self.MONTH, by=by), whole)
+
+        in_month = Appointment.objects.filter(date__year=2026, date__month=2)
+        self.assertEqual(whole['totals']['appointments'], in_month.count())
+        self.assertEqual(whole['totals']['visits'], in_month.filter(status='Completed').count())
+        self.assertEqual(
+            whole['totals']['prescriptions'],
+            Prescription.objects.filter(appointment__in=in_month).count(),
+        )
+
+    def test_prescription_without_appointment_row(self):
+        # As if the appointment was archived between the appointment and prescription queries
+        filters = partitions(self.MONTH, 'date', 1)[0]
+        with mock.patch.object(Appointment.objects, 'filter', return_value=Appointment.objects.none()):
+            partial = build_partition(filters)
+        self.assertTrue(partial)
+        with mock.patch('analytics.reports.build_partition', return_value=partial):
+            report = run(self.MONTH)
+        self.assertEqual(report['totals']['appointments'], 0)
+        self.assertEqual({row['top_service'] for row in report['doctors']}, {''})
+
+    def test_command_writes_csv_and_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('monthly_report', month=self.MONTH, workers=1, output_dir=directory, stdout=StringIO())
+            base = os.path.join(directory, f'monthly-report-{self.MONTH}')
+            with open(f'{base}.json') as f:
+                report = json.load(f)
+            with open(f'{base}.csv') as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual([int(row['doctor_id']) for row in rows], [d['doctor_id'] for d in report['doctors']])
+        self.assertEqual(sum(int(row['visits']) for row in rows), report['totals']['visits'])
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Count, Q, Sum
+from django.shortcuts import render
+from django.utils import timezone
+from django.views.decorators.http import require_http_methods
+
+from medicines.models import Appointment
+
+from .models import DailyAppointmentRollup
+from .rollups import watermark
+
+PERIODS = (7, 30, 90, 365)
+STATUSES = [value for value, _ in Appointment.STATUS_CHOICES]
+
+
+def rate(part, whole):
+    return round(100 * part / whole, 1) if whole else 0
+
+
+@staff_member_required
+@require_http_methods(["GET"])
+def dashboard(request):
+    """Hospital-wide appointment analytics for staff, read from the daily rollups only."""
+    try:
+        days = int(request.GET.get('days', 30))
+    except ValueError:
+        days = 30
+    days = days if days in PERIODS else 30
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+    rollups = DailyAppointmentRollup.objects.filter(date__range=(start, end)).order_by()
+    cancelled = Sum('count', filter=Q(status='Cancelled'))
+    booked = Sum('count', filter=~Q(status='Cancelled'))
+
+    by_day = {}
+    for row in rollups.values('date', 'status').annotate(total=Sum('count')).order_by('date'):
+        by_day.setdefault(row['date'].isoformat(), dict.fromkeys(STATUSES, 0))[row['status']] = row['total']
+
+    services = list(
+        rollups.values('service').annotate(total=Sum('count'), cancelled=cancelled).order_by('-total')
+    )
+    for row in services:
+        row['cancellation_rate'] = rate(row['cancelled'] or 0, row['total'])
+
+    doctors = list(
+        rollups.values('doctor_id', 'doctor__name', 'doctor__specialization')
+        .annotate(total=Sum('count'), cancelled=cancelled, booked=booked, working_days=Count('date', distinct=True))
+        .order_by('-total')
+    )
+    for row in doctors:
+        row['cancellation_rate'] = rate(row['cancelled'] or 0, row['total'])
+        row['utilization'] = rate(row['booked'] or 0, row['working_days'] * settings.ANALYTICS_SLOTS_PER_DOCTOR_DAY)
+
+    total = sum(row['total'] for row in services)
+    total_cancelled = sum(row['cancelled'] or 0 for row in services)
+    return render(request, 'analytics/dashboard.html', {
+        'days': days,
+        'periods': PERIODS,
+        'start': start,
+        'end': end,
+        'total': total,
+        'cancellation_rate': rate(total_cancelled, total),
+        'services': services,
+        'doctors': doctors,
+        'chart': {
+            'dates': list(by_day),
+            'statuses': {status: [counts[status] for counts in by_day.values()] for status in STATUSES},
+            'services': [row['service'] for row in services],
+            'service_totals': [row['total'] for row in services],
+        },
+        'refreshed_through': watermark(),
+    })
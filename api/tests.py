@@ -0,0 +1,76 @@
+import base64
+
+from django.test import override_settings
+from django.urls import reverse
+
+from hospital_management.testing import QueryBudgetTestCase
+from medicines.models import Prescription
+
+
+class ApiQueryTests(QueryBudgetTestCase):
+    def test_doctor_endpoints(self):
+        self.login_doctor()
+        for name in ('api_v1_doctors', 'api_v1_appointments', 'api_v1_medicines', 'api_v1_prescriptions'):
+            with self.subTest(name), self.assertMaxQueries(2):
+                response = self.client.get(reverse(name), {'limit': 200})
+                self.assertEqual(response.status_code, 200)
+
+    def test_cursor_pages(self):
+        self.login_patient()
+        response = self.client.get(reverse('api_v1_appointments'), {'limit': 2, 'fields': 'date,doctor_name'})
+        cursor = response.json()['next_cursor']
+        with self.assertMaxQueries(2):
+            response = self.client.get(reverse('api_v1_appointments'), {'limit': 2, 'fields': 'date,doctor_name', 'cursor': cursor})
+        self.assertEqual(len(response.json()['data']), 2)
+
+
+class ApiBehaviourTests(QueryBudgetTestCase):
+    def get(self, name, **params):
+        return self.client.get(reverse(name), params)
+
+    def test_cursor_walks_to_the_last_page(self):
+        self.login_patient()
+        ids = []
+        cursor = ''
+        while True:
+            body = self.get('api_v1_appointments', limit=4, fields='date', cursor=cursor).json()
+            ids.extend(row['id'] for row in body['data'])
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(ids, sorted(self.patient.appointments.values_list('id', flat=True)))
+
+    def test_rejects_tampered_cursor(self):
+        self.login_patient()
+        for cursor in ('not base64!', base64.urlsafe_b64encode(b'1 OR 1=1').decode()):
+            with self.subTest(cursor=cursor):
+                response = self.get('api_v1_appointments', cursor=cursor)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['message'], 'Invalid cursor')
+
+    def test_rejects_unknown_fields(self):
+        self.login_patient()
+        response = self.get('api_v1_appointments', fields='date,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json()['message'])
+
+    def test_patient_sees_only_own_rows(self):
+        self.login_patient()
+        rows = self.get('api_v1_appointments', limit=200, fields='patient_id').json()['data']
+        self.assertEqual({row['patient_id'] for row in rows}, {self.patient.id})
+        other = Prescription.objects.exclude(appointment__patient=self.patient).first()
+        response = self.get('api_v1_prescriptions', appointment_id=other.appointment_id)
+        self.assertEqual(response.json()['data'], [])
+        self.assertEqual(self.get('api_v1_medicines').status_code, 403)
+
+    def test_bearer_token(self):
+        tokens = {'doctor-token': f'doctor:{self.doctor.id}', 'broken-token': 'nurse:1'}
+        with override_settings(API_TOKENS=tokens):
+            response = self.client.get(
+                reverse('api_v1_appointments'), {'fields': 'doctor_id'}, HTTP_AUTHORIZATION='Bearer doctor-token',
+            )
+            self.assertEqual({row['doctor_id'] for row in response.json()['data']}, {self.doctor.id})
+            for auth in ('Bearer wrong', 'Bearer broken-token'):
+                with self.subTest(auth=auth):
+                    response = self.client.get(reverse('api_v1_appointments'), HTTP_AUTHORIZATION=auth)
+                    self.assertEqual(response.status_code, 401)
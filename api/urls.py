@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+# Version 1 of the read-only JSON API, mounted at /api/v1/
+urlpatterns = [
+    path('doctors/', views.doctor_list, name='api_v1_doctors'),
+    path('appointments/', views.appointment_list, name='api_v1_appointments'),
+    path('medicines/', views.medicine_list, name='api_v1_medicines'),
+    path('prescriptions/', views.prescription_list, name='api_v1_prescriptions'),
+]
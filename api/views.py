@@ -0,0 +1,196 @@
+import base64
+import binascii
+import secrets
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import F
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+
+from doctors.models import Doctor
+from medicines.models import Appointment, Medicine, Prescription
+
+API_VERSION = 'v1'
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Public field name -> ORM lookup, per resource. Only these can be requested with ?fields=.
+DOCTOR_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'specialization': 'specialization',
+    'experience': 'experience',
+}
+APPOINTMENT_FIELDS = {
+    'id': 'id',
+    'patient_id': 'patient_id',
+    'patient_name': 'patient__name',
+    'doctor_id': 'doctor_id',
+    'doctor_name': 'doctor__name',
+    'service': 'service',
+    'date': 'date',
+    'time': 'time',
+    'status': 'status',
+    'notes': 'notes',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+MEDICINE_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'med_type': 'med_type',
+    'dosage': 'dosage',
+    'category': 'category',
+    'description': 'description',
+    'updated_at': 'updated_at',
+}
+PRESCRIPTION_FIELDS = {
+    'id': 'id',
+    'appointment_id': 'appointment_id',
+    'medicine_id': 'medicine_id',
+    'medicine_name': 'medicine__name',
+    'dosage': 'medicine__dosage',
+    'frequency': 'frequency',
+    'duration': 'duration',
+    'instructions': 'instructions',
+    'prescribed_at': 'prescribed_at',
+}
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ApiError('Invalid cursor')
+
+
+def paginate(request, queryset, available_fields, default_fields=None):
+    """Serialize one keyset page of ``queryset`` as a JSON response.
+
+    Pages are ordered by id and continue after the id encoded in ``?cursor=``,
+    so deep pages cost the same as the first one. ``?fields=`` is turned into a
+    ``values()`` projection: only the requested columns are selected and rows
+    are returned as dicts without instantiating models.
+    """
+    requested = request.GET.get('fields')
+    fields = [f.strip() for f in requested.split(',') if f.strip()] if requested else list(default_fields or available_fields)
+    unknown = [f for f in fields if f not in available_fields]
+    if unknown:
+        raise ApiError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available_fields)}")
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+
+    try:
+        limit = min(max(int(request.GET.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        raise ApiError('limit must be an integer')
+
+    if request.GET.get('cursor'):
+        queryset = queryset.filter(id__gt=decode_cursor(request.GET['cursor']))
+
+    plain = [f for f in fields if available_fields[f] == f]
+    renamed = {f: F(available_fields[f]) for f in fields if available_fields[f] != f}
+    rows = list(queryset.order_by('id').values(*plain, **renamed)[:limit + 1])
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['id'])
+
+    return JsonResponse({
+        'version': API_VERSION,
+        'fields': fields,
+        'data': rows,
+        'next_cursor': next_cursor,
+    })
+
+
+def api_view(view):
+    """Read-only API endpoint: GET only, JSON errors for ApiError."""
+    @require_http_methods(["GET"])
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as e:
+            return JsonResponse({'status': 'error', 'message': e.message}, status=e.status)
+    return wrapper
+
+
+def require_user(request):
+    """Return ``('doctor', id)`` or ``('patient', id)`` for the caller.
+
+    A bearer token from API_TOKENS takes precedence over the login session;
+    every configured token is compared so the match takes constant time.
+    """
+    auth = request.headers.get('Authorization', '')
+    if auth:
+        identity = None
+        for token, user in settings.API_TOKENS.items():
+            if secrets.compare_digest(auth, f'Bearer {token}'):
+                identity = user
+        user_type, _, user_id = (identity or '').partition(':')
+        if user_type not in ('doctor', 'patient') or not user_id.isdigit():
+            raise ApiError('Invalid token', status=401)
+        return user_type, int(user_id)
+    if request.session.get('doctor_id'):
+        return 'doctor', request.session['doctor_id']
+    if request.session.get('patient_id'):
+        return 'patient', request.session['patient_id']
+    raise ApiError('Not authenticated', status=401)
+
+
+@api_view
+def doctor_list(request):
+    """Doctors patients can book with."""
+    require_user(request)
+    doctors = Doctor.objects.active()
+    if request.GET.get('specialization'):
+        doctors = doctors.filter(specialization=request.GET['specialization'])
+    return paginate(request, doctors, DOCTOR_FIELDS)
+
+
+@api_view
+def appointment_list(request):
+    """The logged-in doctor's or patient's own appointments."""
+    user_type, user_id = require_user(request)
+    appointments = Appointment.objects.filter(**{f'{user_type}_id': user_id})
+    if request.GET.get('status'):
+        appointments = appointments.filter(status=request.GET['status'])
+    return paginate(request, appointments, APPOINTMENT_FIELDS)
+
+
+@api_view
+def medicine_list(request):
+    """The medicine catalog; like the medicines directory, doctors only."""
+    user_type, user_id = require_user(request)
+    if user_type != 'doctor':
+        raise ApiError('Only doctors can access the medicine catalog', status=403)
+    medicines = Medicine.objects.all()
+    if request.GET.get('category'):
+        medicines = medicines.filter(category=request.GET['category'])
+    return paginate(request, medicines, MEDICINE_FIELDS)
+
+
+@api_view
+def prescription_list(request):
+    """Prescriptions on the logged-in doctor's or patient's appointments."""
+    user_type, user_id = require_user(request)
+    prescriptions = Prescription.objects.filter(**{f'appointment__{user_type}_id': user_id})
+    if request.GET.get('appointment_id'):
+        if not request.GET['appointment_id'].isdigit():
+            raise ApiError('appointment_id must be an integer')
+        prescriptions = prescriptions.filter(appointment_id=request.GET['appointment_id'])
+    return paginate(request, prescriptions, PRESCRIPTION_FIELDS)
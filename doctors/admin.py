@@ -5,3 +5,4 @@ from .models import Doctor
 class DoctorAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'specialization', 'experience', 'created_at')
     search_fields = ('name', 'email', 'specialization')
+    ordering = ('name',)
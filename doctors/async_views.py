@@ -0,0 +1,159 @@
+"""Async versions of the doctor AJAX read and status endpoints.
+
+doctors.urls routes to these instead of the sync views in doctors.views when
+ASYNC_AJAX_VIEWS is set. Under an ASGI server (uvicorn) a dashboard waiting
+on the database no longer holds a worker thread, so many open dashboards can
+poll at once. They reuse the query and JSON helpers from doctors.views and
+return the same payloads.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_http_methods
+
+from medicines.idempotency import idempotent
+from medicines.models import Appointment, Medicine
+from medicines.notifications import notify_status_change
+from medicines.versions import catalog_version
+from .views import STATISTICS_AGGREGATES, appointment_row, doctor_appointments, transition_result
+
+
+async def atransition_appointment(doctor_id, appointment_id, new_status):
+    appointment = await aget_object_or_404(Appointment.objects.select_related('patient'), id=appointment_id, doctor_id=doctor_id)
+    appointment.status = new_status
+    await appointment.asave()
+    await sync_to_async(notify_status_change)(appointment)
+    return transition_result(appointment, new_status)
+
+
+async def ajax_transition(request, new_status):
+    doctor_id = await request.session.aget('doctor_id')
+    if not doctor_id:
+        return JsonResponse({'status': 'error', 'message': 'Not authenticated'}, status=401)
+
+    appointment_id = request.POST.get('appointment_id')
+
+    try:
+        return JsonResponse(await atransition_appointment(doctor_id, appointment_id, new_status))
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+
+@require_http_methods(["POST"])
+@idempotent
+async def ajax_approve_appointment(request):
+    """Async AJAX endpoint to approve an appointment."""
+    return await ajax_transition(request, 'Approved')
+
+
+@require_http_methods(["POST"])
+@idempotent
+async def ajax_complete_appointment(request):
+    """Async AJAX endpoint to complete an appointment without medicines."""
+    return await ajax_transition(request, 'Completed')
+
+
+@require_http_methods(["POST"])
+@idempotent
+async def ajax_reject_appointment(request):
+    """Async AJAX endpoint to reject/cancel an appointment."""
+    return await ajax_transition(request, 'Cancelled')
+
+
+@require_http_methods(["GET"])
+async def ajax_get_appointments(request):
+    """Async AJAX endpoint to get all appointments."""
+    doctor_id = await request.session.aget('doctor_id')
+    if not doctor_id:
+        return JsonResponse({'status': 'error', 'message': 'Not authenticated'}, status=401)
+
+    try:
+        data = [appointment_row(apt) async for apt in doctor_appointments(doctor_id)]
+        return JsonResponse({
+            'status': 'success',
+            'appointments': data,
+            'total': len(data)
+        })
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+async def ajax_get_statistics(request):
+    """Async AJAX endpoint to get appointment statistics."""
+    doctor_id = await request.session.aget('doctor_id')
+    if not doctor_id:
+        return JsonResponse({'status': 'error', 'message': 'Not authenticated'}, status=401)
+
+    try:
+        return JsonResponse({
+            'status': 'success',
+            'statistics': await Appointment.objects.filter(doctor_id=doctor_id).aaggregate(**STATISTICS_AGGREGATES)
+        })
+    except Exception as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+async def ajax_get_prescribe_data(request):
+    """Async AJAX endpoint with what the shared prescribe modal needs for one appointment."""
+    doctor_id = await request.session.aget('doctor_id')
+    if not doctor_id:
+        return JsonResponse({'status': 'error', 'message': 'Not authenticated'}, status=401)
+
+    appointment = await Appointment.objects.filter(
+        id=request.GET.get('appointment_id'), doctor_id=doctor_id,
+    ).select_related('patient').afirst()
+    if appointment is None:
+        return JsonResponse({'status': 'error', 'message': 'Appointment not found'}, status=404)
+
+    prescriptions = appointment.prescriptions.values('medicine_id', 'frequency', 'duration', 'instructions')
+    return JsonResponse({
+        'status': 'success',
+        'appointment': {
+            'id': appointment.id,
+            'patient_name': appointment.patient.name,
+            'service': appointment.service,
+            'category': appointment.get_relevant_category(),
+            'prescribe_url': reverse('add_medicines', args=[appointment.id]),
+        },
+        'prescriptions': [rx async for rx in prescriptions],
+    })
+
+
+@require_http_methods(["GET"])
+async def ajax_get_category_medicines(request):
+    """Async AJAX endpoint listing one category's medicines, cached under its catalog version."""
+    doctor_id = await request.session.aget('doctor_id')
+    if not doctor_id:
+        return JsonResponse({'status': 'error', 'message': 'Not authenticated'}, status=401)
+
+    category = request.GET.get('category', 'General')
+    if category not in dict(Medicine.CATEGORY_CHOICES):
+        return JsonResponse({'status': 'error', 'message': 'Unknown category'}, status=400)
+
+    version = await sync_to_async(catalog_version)(category)
+    etag = quote_etag(version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        key = f'category-medicines:{category}:{version}'
+        payload = await cache.aget(key)
+        if payload is None:
+            fields = ('id', 'name', 'med_type', 'dosage', 'description')
+            medicines = Medicine.objects.filter(category=category).values_list(*fields)
+            payload = {
+                'status': 'success',
+                'category': category,
+                'fields': fields,
+                'medicines': [row async for row in medicines],
+            }
+            await cache.aset(key, payload, settings.CATEGORY_MEDICINES_CACHE_TIMEOUT)
+        response = JsonResponse(payload)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=settings.CATEGORY_MEDICINES_CACHE_TIMEOUT)
+    return response
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="doctor",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0002_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="doctor",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
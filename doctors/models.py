@@ -1,5 +1,7 @@
 from django.db import models
 
+from hospital_management.soft_delete import SoftDeleteQuerySet
+
 
 class Doctor(models.Model):
     SPECIALIZATION_CHOICES = [
@@ -21,6 +23,11 @@ class Doctor(models.Model):
     specialization = models.CharField(max_length=50, choices=SPECIALIZATION_CHOICES)
     experience = models.PositiveIntegerField(help_text="Years of experience")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set when the account is deleted; the rows go later, in a background purge
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteQuerySet.as_manager()
 
     def __str__(self):
         return f"Dr. {self.name} ({self.specialization})"
@@ -0,0 +1,18 @@
+from django.conf import settings
+
+from hospital_management.soft_delete import purge
+from jobs.queue import task
+
+from .models import Doctor
+
+
+@task()
+def purge_doctor(doctor_id):
+    """Remove a soft-deleted doctor and their appointments, in batches.
+
+    Their analytics rollups are kept with the doctor cleared, as when a doctor
+    was deleted outright.
+    """
+    doctor = Doctor.objects.filter(id=doctor_id, deleted_at__isnull=False).first()
+    if doctor is not None:
+        purge(doctor, settings.ACCOUNT_PURGE_BATCH_SIZE)
@@ -1,3 +1,279 @@
-from django.test import TestCase
+import json
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncRequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from analytics.models import DailyAppointmentRollup
+from hospital_management.testing import PASSWORD, QueryBudgetTestCase
+from medicines.models import Appointment, Medicine, Prescription
+
+from . import async_views
+from .models import Doctor
+
+
+class DoctorPublicViewQueryTests(QueryBudgetTestCase):
+    def test_register_page(self):
+        with self.assertMaxQueries(0):
+            response = self.client.get(reverse('doctor_register'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_register_submit(self):
+        data = {
+            'name': 'New Doctor', 'email': 'new.doctor@example.com', 'specialization': 'Cardiology',
+            'experience': 3, 'password': PASSWORD, 'confirm_password': PASSWORD,
+        }
+        with self.assertMaxQueries(3):
+            response = self.client.post(reverse('doctor_register'), data)
+        self.assertRedirects(response, reverse('doctor_login'), fetch_redirect_response=False)
+
+    def test_login_page(self):
+        with self.assertMaxQueries(0):
+            response = self.client.get(reverse('doctor_login'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_submit(self):
+        with self.assertMaxQueries(5):
+            response = self.client.post(reverse('doctor_login'), {'email': self.doctor.email, 'password': PASSWORD})
+        self.assertRedirects(response, reverse('doctor_dashboard'), fetch_redirect_response=False)
+
+    def test_forgot_password(self):
+        with self.assertMaxQueries(0):
+            response = self.client.get(reverse('doctor_forgot_password'))
+        self.assertEqual(response.status_code, 200)
+        with self.assertMaxQueries(5):
+            response = self.client.post(reverse('doctor_forgot_password'), {'email': self.doctor.email})
+        self.assertEqual(response.json()['status'], 'success')
+
+    def test_reset_password(self):
+        session = self.client.session
+        session[f'reset_token_{self.doctor.email}'] = 'token'
+        session.save()
+        with self.assertMaxQueries(1):
+            response = self.client.get(reverse('doctor_reset_password'), {'token': 'token', 'email': self.doctor.email})
+        self.assertEqual(response.status_code, 200)
+        data = {'token': 'token', 'email': self.doctor.email, 'new_password': 'changed1', 'confirm_password': 'changed1'}
+        with self.assertMaxQueries(6):
+            response = self.client.post(reverse('doctor_reset_password'), data)
+        self.assertRedirects(response, reverse('doctor_login'), fetch_redirect_response=False)
+
+
+class DoctorDashboardQueryTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_doctor()
+
+    def test_dashboard(self):
+        with self.assertMaxQueries(9):
+            response = self.client.get(reverse('doctor_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['appointments']), self.doctor.appointments.count())
+
+    def test_dashboard_does_not_grow_with_appointments(self):
+        template = self.doctor.appointments.first()
+        Appointment.objects.bulk_create([
+            Appointment(patient=patient, doctor=self.doctor, service=template.service, date=template.date, time=template.time)
+            for patient in self.patients
+        ])
+        with self.assertMaxQueries(9):
+            response = self.client.get(reverse('doctor_dashboard'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_rows_skip_prescriptions(self):
+        self.client.get(reverse('doctor_dashboard'))
+        with self.assertMaxQueries(7), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('doctor_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q['sql'] for q in queries.captured_queries if 'FROM "medicines_prescription"' in q['sql']])
+
+    def test_add_medicines(self):
+        appointment = self.doctor.appointments.first()
+        medicines = Medicine.objects.filter(category=appointment.get_relevant_category())
+        data = {'medicines': [m.id for m in medicines]}
+        data.update({f'frequency_{m.id}': 'Once daily' for m in medicines})
+        with self.assertMaxQueries(11):
+            response = self.client.post(reverse('add_medicines', args=[appointment.id]), data)
+        self.assertRedirects(response, reverse('doctor_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(Prescription.objects.filter(appointment=appointment).count(), len(medicines))
+
+    def test_status_changes(self):
+        appointment = self.doctor.appointments.first()
+        for name in ('approve_appointment', 'complete_appointment', 'reject_appointment'):
+            # Two of these record the patient's notification and look for a queued send job
+            with self.subTest(name), self.assertMaxQueries(6):
+                response = self.client.get(reverse(name, args=[appointment.id]))
+                self.assertRedirects(response, reverse('doctor_dashboard'), fetch_redirect_response=False)
+
+    def test_delete_appointment(self):
+        appointment = self.doctor.appointments.filter(status='Completed').first()
+        with self.assertMaxQueries(9):
+            response = self.client.get(reverse('doctor_delete_appointment', args=[appointment.id]))
+        self.assertRedirects(response, reverse('doctor_dashboard'), fetch_redirect_response=False)
+
+    def test_update_profile(self):
+        data = {'name': 'Renamed', 'specialization': self.doctor.specialization, 'experience': 9}
+        with self.assertMaxQueries(6):
+            response = self.client.post(reverse('doctor_update_profile'), data)
+        self.assertRedirects(response, reverse('doctor_dashboard'), fetch_redirect_response=False)
+
+    def test_delete_account(self):
+        # The purge itself runs later, in a job
+        with self.assertMaxQueries(5):
+            response = self.client.get(reverse('doctor_delete_account'))
+        self.assertRedirects(response, reverse('doctor_login'), fetch_redirect_response=False)
+
+    def test_logout(self):
+        with self.assertMaxQueries(2):
+            response = self.client.get(reverse('doctor_logout'))
+        self.assertRedirects(response, reverse('doctor_login'), fetch_redirect_response=False)
+
+
+class DoctorAjaxQueryTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_doctor()
+        self.appointment = self.doctor.appointments.first()
+
+    def test_ajax_status_changes(self):
+        for name in ('ajax_approve_appointment', 'ajax_complete_appointment', 'ajax_reject_appointment'):
+            with self.subTest(name), self.assertMaxQueries(5):
+                response = self.client.post(reverse(name), {'appointment_id': self.appointment.id})
+                self.assertEqual(response.json()['status'], 'success')
+
+    def test_ajax_status_change_with_idempotency_key(self):
+        url = reverse('ajax_approve_appointment')
+        with self.assertMaxQueries(10):
+            self.client.post(url, {'appointment_id': self.appointment.id}, HTTP_IDEMPOTENCY_KEY='key-1')
+        with self.assertMaxQueries(7):
+            response = self.client.post(url, {'appointment_id': self.appointment.id}, HTTP_IDEMPOTENCY_KEY='key-1')
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+
+    def test_ajax_get_appointments(self):
+        with self.assertMaxQueries(4):
+            response = self.client.get(reverse('ajax_get_appointments'))
+        self.assertEqual(response.json()['total'], self.doctor.appointments.count())
+
+    def test_ajax_get_statistics(self):
+        with self.assertMaxQueries(2):
+            response = self.client.get(reverse('ajax_get_statistics'))
+        self.assertEqual(response.json()['statistics']['total'], self.doctor.appointments.count())
+
+    def test_ajax_prescribe_data(self):
+        with self.assertMaxQueries(3):
+            response = self.client.get(reverse('ajax_get_prescribe_data'), {'appointment_id': self.appointment.id})
+        self.assertEqual(response.json()['appointment']['id'], self.appointment.id)
+
+    def test_ajax_category_medicines(self):
+        with self.assertMaxQueries(3):
+            response = self.client.get(reverse('ajax_get_category_medicines'), {'category': 'ENT'})
+        self.assertEqual(len(response.json()['medicines']), self.MEDICINES_PER_CATEGORY)
+
+    def test_ajax_batch(self):
+        medicine = Medicine.objects.filter(category=self.appointment.get_relevant_category()).first()
+        operations = [
+            {'op': 'get_statistics'},
+            {'op': 'list_appointments'},
+            {'op': 'transition', 'appointment_id': self.appointment.id, 'new_status': 'Approved'},
+            {'op': 'prescribe', 'appointment_id': self.appointment.id, 'medicines': [{'medicine_id': medicine.id}]},
+        ]
+        with self.assertMaxQueries(20):
+            response = self.client.post(
+                reverse('ajax_batch'), json.dumps({'operations': operations, 'atomic': True}),
+                content_type='application/json',
+            )
+        self.assertEqual(response.json()['status'], 'success')
+
+
+class DoctorAsyncAjaxQueryTests(QueryBudgetTestCase):
+    """The async views answer like the sync ones, within the same budgets."""
+
+    def setUp(self):
+        super().setUp()
+        self.login_doctor()
+        self.appointment = self.doctor.appointments.first()
+
+    def call(self, view, url_name, method='get', data=None):
+        request = getattr(AsyncRequestFactory(), method)(reverse(url_name), data or {})
+        request.session = SessionStore()
+        request.session.update({'doctor_id': self.doctor.id, 'user_type': 'doctor'})
+        request._messages = FallbackStorage(request)
+        return async_to_sync(view)(request)
+
+    def test_read_endpoints_match_sync_views(self):
+        cases = [
+            (async_views.ajax_get_appointments, 'ajax_get_appointments', None, 4),
+            (async_views.ajax_get_statistics, 'ajax_get_statistics', None, 2),
+            (async_views.ajax_get_prescribe_data, 'ajax_get_prescribe_data', {'appointment_id': self.appointment.id}, 3),
+            (async_views.ajax_get_category_medicines, 'ajax_get_category_medicines', {'category': 'ENT'}, 3),
+        ]
+        for view, name, data, budget in cases:
+            with self.subTest(name):
+                expected = self.client.get(reverse(name), data or {}).json()
+                with self.assertMaxQueries(budget):
+                    response = self.call(view, name, data=data)
+                self.assertEqual(json.loads(response.content), expected)
+
+    def test_status_changes(self):
+        views = [
+            (async_views.ajax_approve_appointment, 'ajax_approve_appointment', 'Approved'),
+            (async_views.ajax_complete_appointment, 'ajax_complete_appointment', 'Completed'),
+            (async_views.ajax_reject_appointment, 'ajax_reject_appointment', 'Cancelled'),
+        ]
+        for view, name, status in views:
+            with self.subTest(name), self.assertMaxQueries(4):
+                response = self.call(view, name, method='post', data={'appointment_id': self.appointment.id})
+            self.assertEqual(json.loads(response.content)['new_status'], status)
+        self.appointment.refresh_from_db()
+        self.assertEqual(self.appointment.status, 'Cancelled')
+
+    def test_status_change_with_idempotency_key(self):
+        data = {'appointment_id': self.appointment.id, 'idempotency_key': 'key-1'}
+        self.call(async_views.ajax_approve_appointment, 'ajax_approve_appointment', method='post', data=data)
+        response = self.call(async_views.ajax_approve_appointment, 'ajax_approve_appointment', method='post', data=data)
+        self.assertEqual(response['Idempotent-Replayed'], 'true')
+
+    def test_requires_login(self):
+        request = AsyncRequestFactory().get(reverse('ajax_get_statistics'))
+        request.session = SessionStore()
+        response = async_to_sync(async_views.ajax_get_statistics)(request)
+        self.assertEqual(response.status_code, 401)
+
+
+class DoctorAccountDeletionTests(QueryBudgetTestCase):
+    def test_deleted_doctor_is_hidden_until_purged(self):
+        self.login_doctor()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('doctor_delete_account'))
+        self.assertTrue(Doctor.objects.filter(id=self.doctor.id).exists())
+
+        response = self.client.post(reverse('doctor_login'), {'email': self.doctor.email, 'password': PASSWORD})
+        self.assertNotIn('doctor_id', self.client.session)
+        self.assertEqual(response.status_code, 200)
+
+        self.client.logout()
+        self.login_patient()
+        response = self.client.get(reverse('api_v1_doctors'), {'limit': 200})
+        self.assertEqual(len(response.json()['data']), self.DOCTORS - 1)
+        self.assertNotIn(self.doctor.id, [d['id'] for d in response.json()['data']])
+
+    def test_purge_keeps_rollups(self):
+        call_command('backfill_rollups', workers=1, stdout=StringIO())
+        rollups = DailyAppointmentRollup.objects.count()
+        appointments = Appointment.objects.exclude(doctor=self.doctor).count()
+        self.login_doctor()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('doctor_delete_account'))
+
+        call_command('purge_deleted_accounts', stdout=StringIO())
+
+        self.assertFalse(Doctor.objects.filter(id=self.doctor.id).exists())
+        self.assertFalse(Prescription.objects.filter(appointment__doctor_id=self.doctor.id).exists())
+        self.assertEqual(Appointment.objects.count(), appointments)
+        self.assertEqual(DailyAppointmentRollup.objects.count(), rollups)
+        self.assertTrue(DailyAppointmentRollup.objects.filter(doctor__isnull=True).exists())
@@ -1,5 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Async implementations of the AJAX read and status endpoints, for ASGI servers
+ajax_views = async_views if settings.ASYNC_AJAX_VIEWS else views
 
 urlpatterns = [
     path('register/', views.register, name='doctor_register'),
@@ -16,9 +20,12 @@ urlpatterns = [
     path('delete-account/', views.delete_account, name='doctor_delete_account'),
     path('logout/', views.logout_view, name='doctor_logout'),
     # AJAX Endpoints
-    path('ajax/approve-appointment/', views.ajax_approve_appointment, name='ajax_approve_appointment'),
-    path('ajax/complete-appointment/', views.ajax_complete_appointment, name='ajax_complete_appointment'),
-    path('ajax/reject-appointment/', views.ajax_reject_appointment, name='ajax_reject_appointment'),
-    path('ajax/get-appointments/', views.ajax_get_appointments, name='ajax_get_appointments'),
-    path('ajax/get-statistics/', views.ajax_get_statistics, name='ajax_get_statistics'),
+    path('ajax/approve-appointment/', ajax_views.ajax_approve_appointment, name='ajax_approve_appointment'),
+    path('ajax/complete-appointment/', ajax_views.ajax_complete_appointment, name='ajax_complete_appointment'),
+    path('ajax/reject-appointment/', ajax_views.ajax_reject_appointment, name='ajax_reject_appointment'),
+    path('ajax/get-appointments/', ajax_views.ajax_get_appointments, name='ajax_get_appointments'),
+    path('ajax/get-statistics/', ajax_views.ajax_get_statistics, name='ajax_get_statistics'),
+    path('ajax/prescribe-data/', ajax_views.ajax_get_prescribe_data, name='ajax_get_prescribe_data'),
+    path('ajax/category-medicines/', ajax_views.ajax_get_category_medicines, name='ajax_get_category_medicines'),
+    path('ajax/batch/', views.ajax_batch, name='ajax_batch'),
 ]
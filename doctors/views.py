@@ -1,11 +1,26 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.hashers import make_password, check_password
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+from django.db.models import Count, Q, prefetch_related_objects
 from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from .models import Doctor
 from .forms import DoctorRegistrationForm, DoctorLoginForm
+from .tasks import purge_doctor
+from analytics.rollups import mark_stale
+from medicines.idempotency import idempotent
 from medicines.models import Appointment, Medicine, Prescription
-from django.views.decorators.http import require_http_methods
+from medicines.notifications import notify_status_change
+from medicines.versions import appointments_version, catalog_version, make_etag, queryset_version
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
+import json
 import secrets
 
 
@@ -30,7 +45,7 @@ def login_view(request):
             email = form.cleaned_data['email']
             password = form.cleaned_data['password']
             try:
-                doctor = Doctor.objects.get(email=email)
+                doctor = Doctor.objects.active().get(email=email)
                 if check_password(password, doctor.password):
                     request.session['doctor_id'] = doctor.id
                     request.session['doctor_name'] = doctor.name
@@ -46,6 +61,22 @@ def login_view(request):
     return render(request, 'doctors/login.html', {'form': form})
 
 
+def dashboard_etag(request):
+    """Validator for the doctor dashboard, computed before any rendering."""
+    doctor_id = request.session.get('doctor_id')
+    if not doctor_id:
+        return None
+    return make_etag(
+        request,
+        'doctor-dashboard',
+        queryset_version(Doctor.objects.filter(id=doctor_id)),
+        appointments_version(Appointment.objects.filter(doctor_id=doctor_id)),
+        catalog_version(),
+    )
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=dashboard_etag)
 def dashboard(request):
     doctor_id = request.session.get('doctor_id')
     if not doctor_id:
@@ -53,18 +84,23 @@ def dashboard(request):
         return redirect('doctor_login')
 
     doctor = Doctor.objects.get(id=doctor_id)
-    appointments = Appointment.objects.filter(doctor=doctor).select_related('patient').prefetch_related('suggested_medicines', 'prescriptions__medicine')
-
-    # Attach relevant medicines to each appointment based on service category
-    for apt in appointments:
-        category = apt.get_relevant_category()
-        apt.relevant_medicines = Medicine.objects.filter(category=category)
+    appointments = list(Appointment.objects.filter(doctor=doctor).select_related('patient'))
+    version = catalog_version()
+    # Only rows whose cached fragment is missing render their prescriptions
+    keys = {
+        make_template_fragment_key('doctor_appointment_row', [apt.id, apt.updated_at, apt.patient.updated_at, version]): apt
+        for apt in appointments
+    }
+    cached = cache.get_many(list(keys))
+    prefetch_related_objects([apt for key, apt in keys.items() if key not in cached], 'prescriptions__medicine')
 
     context = {
         'doctor': doctor,
         'appointments': appointments,
         'frequency_choices': Prescription.FREQUENCY_CHOICES,
         'duration_choices': Prescription.DURATION_CHOICES,
+        'catalog_version': version,
+        'fragment_cache_timeout': settings.DASHBOARD_FRAGMENT_CACHE_TIMEOUT,
     }
     return render(request, 'doctors/dashboard.html', context)
 
@@ -77,29 +113,16 @@ def add_medicines(request, appointment_id):
     appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=doctor_id)
 
     if request.method == 'POST':
-        medicine_ids = request.POST.getlist('medicines')
-        # Clear old prescriptions for this appointment
-        Prescription.objects.filter(appointment=appointment).delete()
-        appointment.suggested_medicines.clear()
-
-        for med_id in medicine_ids:
-            medicine = Medicine.objects.get(id=med_id)
-            frequency = request.POST.get(f'frequency_{med_id}', 'Twice daily')
-            duration = request.POST.get(f'duration_{med_id}', '5 days')
-            instructions = request.POST.get(f'instructions_{med_id}', '')
-
-            # Create prescription with dosage details
-            Prescription.objects.create(
-                appointment=appointment,
-                medicine=medicine,
-                frequency=frequency,
-                duration=duration,
-                instructions=instructions,
-            )
-            appointment.suggested_medicines.add(medicine)
-
-        appointment.status = 'Completed'
-        appointment.save()
+        items = [
+            {
+                'medicine_id': med_id,
+                'frequency': request.POST.get(f'frequency_{med_id}', 'Twice daily'),
+                'duration': request.POST.get(f'duration_{med_id}', '5 days'),
+                'instructions': request.POST.get(f'instructions_{med_id}', ''),
+            }
+            for med_id in request.POST.getlist('medicines')
+        ]
+        prescribe_appointment(appointment, items)
         messages.success(request, f'Medicines prescribed for {appointment.patient.name}!')
 
     return redirect('doctor_dashboard')
@@ -113,6 +136,7 @@ def approve_appointment(request, appointment_id):
     appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=doctor_id)
     appointment.status = 'Approved'
     appointment.save()
+    notify_status_change(appointment)
     messages.success(request, f'Appointment for {appointment.patient.name} approved!')
     return redirect('doctor_dashboard')
 
@@ -126,6 +150,7 @@ def complete_appointment(request, appointment_id):
     appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=doctor_id)
     appointment.status = 'Completed'
     appointment.save()
+    notify_status_change(appointment)
     messages.success(request, f'Appointment for {appointment.patient.name} marked as completed!')
     return redirect('doctor_dashboard')
 
@@ -138,6 +163,7 @@ def reject_appointment(request, appointment_id):
     appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=doctor_id)
     appointment.status = 'Cancelled'
     appointment.save()
+    notify_status_change(appointment)
     messages.warning(request, f'Appointment for {appointment.patient.name} rejected.')
     return redirect('doctor_dashboard')
 
@@ -149,6 +175,7 @@ def delete_appointment(request, appointment_id):
 
     appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=doctor_id)
     appointment.delete()
+    mark_stale([appointment.date])
     messages.success(request, 'Appointment deleted successfully!')
     return redirect('doctor_dashboard')
 
@@ -176,8 +203,9 @@ def delete_account(request):
     if not doctor_id:
         return redirect('doctor_login')
 
-    doctor = Doctor.objects.get(id=doctor_id)
-    doctor.delete()
+    # Hidden from now on; purge_doctor removes the account and its appointments in the background
+    Doctor.objects.filter(id=doctor_id).soft_delete()
+    purge_doctor.enqueue(doctor_id=doctor_id)
     request.session.flush()
     messages.success(request, 'Your account has been deleted.')
     return redirect('doctor_login')
@@ -203,7 +231,7 @@ def forgot_password(request):
             return JsonResponse({'status': 'error', 'message': 'Email is required'}, status=400)
 
         try:
-            doctor = Doctor.objects.get(email=email)
+            doctor = Doctor.objects.active().get(email=email)
             reset_token = secrets.token_urlsafe(32)
 
             request.session[f'reset_token_{email}'] = reset_token
@@ -258,7 +286,7 @@ def reset_password(request):
             return redirect('doctor_login')
 
         try:
-            doctor = Doctor.objects.get(email=email)
+            doctor = Doctor.objects.active().get(email=email)
             doctor.password = make_password(new_password)
             doctor.save()
 
@@ -273,9 +301,119 @@ def reset_password(request):
             return redirect('doctor_login')
 
 
+# === SHARED APPOINTMENT OPERATIONS ===
+# Used by the page views, the single-purpose AJAX endpoints and the batch endpoint.
+
+TRANSITION_MESSAGES = {
+    'Approved': 'Appointment for {name} approved!',
+    'Completed': 'Appointment for {name} marked as completed!',
+    'Cancelled': 'Appointment for {name} rejected.',
+}
+
+
+def prescribe_appointment(appointment, items):
+    """Replace an appointment's prescriptions with ``items`` and mark it completed.
+
+    Each item is a dict with ``medicine_id`` and optional ``frequency``,
+    ``duration`` and ``instructions``.
+    """
+    medicine_ids = [int(item['medicine_id']) for item in items]
+    medicines = Medicine.objects.in_bulk(medicine_ids)
+    missing = set(medicine_ids) - set(medicines)
+    if missing:
+        raise Medicine.DoesNotExist(f'Medicine {min(missing)} does not exist')
+
+    # Clear old prescriptions for this appointment
+    Prescription.objects.filter(appointment=appointment).delete()
+    appointment.suggested_medicines.clear()
+
+    # Create prescriptions with dosage details
+    Prescription.objects.bulk_create([
+        Prescription(
+            appointment=appointment,
+            medicine=medicines[medicine_id],
+            frequency=item.get('frequency') or 'Twice daily',
+            duration=item.get('duration') or '5 days',
+            instructions=item.get('instructions', ''),
+        )
+        for medicine_id, item in zip(medicine_ids, items)
+    ])
+    appointment.suggested_medicines.add(*medicines.values())
+
+    appointment.status = 'Completed'
+    appointment.save()
+    notify_status_change(appointment)
+    return appointment
+
+
+def transition_appointment(doctor_id, appointment_id, new_status):
+    """Move one of the doctor's appointments to ``new_status`` and describe the result."""
+    appointment = get_object_or_404(Appointment.objects.select_related('patient'), id=appointment_id, doctor_id=doctor_id)
+    appointment.status = new_status
+    appointment.save()
+    notify_status_change(appointment)
+    return transition_result(appointment, new_status)
+
+
+def transition_result(appointment, new_status):
+    return {
+        'status': 'success',
+        'message': TRANSITION_MESSAGES[new_status].format(name=appointment.patient.name),
+        'appointment_id': appointment.id,
+        'new_status': new_status,
+    }
+
+
+# One conditional aggregate for the dashboard counters
+STATISTICS_AGGREGATES = {
+    'total': Count('id'),
+    'pending': Count('id', filter=Q(status='Pending')),
+    'approved': Count('id', filter=Q(status='Approved')),
+    'completed': Count('id', filter=Q(status='Completed')),
+    'cancelled': Count('id', filter=Q(status='Cancelled')),
+}
+
+
+def appointment_statistics(doctor_id):
+    return Appointment.objects.filter(doctor_id=doctor_id).aggregate(**STATISTICS_AGGREGATES)
+
+
+def doctor_appointments(doctor_id):
+    return Appointment.objects.filter(doctor_id=doctor_id).select_related('patient').prefetch_related('prescriptions__medicine')
+
+
+def appointment_row(apt):
+    """JSON shape of one appointment in the AJAX appointment list."""
+    prescriptions = []
+    for rx in apt.prescriptions.all():
+        prescriptions.append({
+            'medicine': rx.medicine.name,
+            'frequency': rx.frequency,
+            'duration': rx.duration,
+            'dosage': rx.medicine.dosage
+        })
+
+    return {
+        'id': apt.id,
+        'patient_name': apt.patient.name,
+        'service': apt.service,
+        'date': apt.date.strftime('%b %d, %Y'),
+        'time': apt.time.strftime('%H:%M'),
+        'status': apt.status,
+        'prescriptions': prescriptions,
+        'patient_email': apt.patient.email,
+        'patient_phone': apt.patient.phone
+    }
+
+
+def appointments_data(doctor_id):
+    return [appointment_row(apt) for apt in doctor_appointments(doctor_id)]
+
+
 # === AJAX ENDPOINTS FOR REAL-TIME DATA PROCESSING ===
 
 @require_http_methods(["POST"])
+@idempotent
 def ajax_approve_appointment(request):
     """AJAX endpoint to approve an appointment in real-time."""
     doctor_id = request.session.get('doctor_id')
@@ -285,21 +423,13 @@ def ajax_approve_appointment(request):
     appointment_id = request.POST.get('appointment_id')
 
     try:
-        appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=doctor_id)
-        appointment.status = 'Approved'
-        appointment.save()
-
-        return JsonResponse({
-            'status': 'success',
-            'message': f'Appointment for {appointment.patient.name} approved!',
-            'appointment_id': appointment_id,
-            'new_status': 'Approved'
-        })
+        return JsonResponse(transition_appointment(doctor_id, appointment_id, 'Approved'))
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
 
 @require_http_methods(["POST"])
+@idempotent
 def ajax_complete_appointment(request):
     """AJAX endpoint to complete an appointment without medicines."""
     doctor_id = request.session.get('doctor_id')
@@ -309,21 +439,13 @@ def ajax_complete_appointment(request):
     appointment_id = request.POST.get('appointment_id')
 
     try:
-        appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=doctor_id)
-        appointment.status = 'Completed'
-        appointment.save()
-
-        return JsonResponse({
-            'status': 'success',
-            'message': f'Appointment for {appointment.patient.name} marked as completed!',
-            'appointment_id': appointment_id,
-            'new_status': 'Completed'
-        })
+        return JsonResponse(transition_appointment(doctor_id, appointment_id, 'Completed'))
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
 
 @require_http_methods(["POST"])
+@idempotent
 def ajax_reject_appointment(request):
     """AJAX endpoint to reject/cancel an appointment."""
     doctor_id = request.session.get('doctor_id')
@@ -333,16 +455,7 @@ def ajax_reject_appointment(request):
     appointment_id = request.POST.get('appointment_id')
 
     try:
-        appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=doctor_id)
-        appointment.status = 'Cancelled'
-        appointment.save()
-
-        return JsonResponse({
-            'status': 'success',
-            'message': f'Appointment for {appointment.patient.name} rejected.',
-            'appointment_id': appointment_id,
-            'new_status': 'Cancelled'
-        })
+        return JsonResponse(transition_appointment(doctor_id, appointment_id, 'Cancelled'))
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
@@ -355,35 +468,11 @@ def ajax_get_appointments(request):
         return JsonResponse({'status': 'error', 'message': 'Not authenticated'}, status=401)
 
     try:
-        appointments = Appointment.objects.filter(doctor_id=doctor_id).select_related('patient').prefetch_related('prescriptions__medicine')
-
-        appointments_data = []
-        for apt in appointments:
-            prescriptions = []
-            for rx in apt.prescriptions.all():
-                prescriptions.append({
-                    'medicine': rx.medicine.name,
-                    'frequency': rx.frequency,
-                    'duration': rx.duration,
-                    'dosage': rx.medicine.dosage
-                })
-
-            appointments_data.append({
-                'id': apt.id,
-                'patient_name': apt.patient.name,
-                'service': apt.service,
-                'date': apt.date.strftime('%b %d, %Y'),
-                'time': apt.time.strftime('%H:%M'),
-                'status': apt.status,
-                'prescriptions': prescriptions,
-                'patient_email': apt.patient.email,
-                'patient_phone': apt.patient.phone
-            })
-
+        data = appointments_data(doctor_id)
         return JsonResponse({
             'status': 'success',
-            'appointments': appointments_data,
-            'total': len(appointments_data)
+            'appointments': data,
+            'total': len(data)
         })
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
@@ -397,19 +486,154 @@ def ajax_get_statistics(request):
         return JsonResponse({'status': 'error', 'message': 'Not authenticated'}, status=401)
 
     try:
-        appointments = Appointment.objects.filter(doctor_id=doctor_id)
-
-        stats = {
-            'total': appointments.count(),
-            'pending': appointments.filter(status='Pending').count(),
-            'approved': appointments.filter(status='Approved').count(),
-            'completed': appointments.filter(status='Completed').count(),
-            'cancelled': appointments.filter(status='Cancelled').count()
-        }
-
         return JsonResponse({
             'status': 'success',
-            'statistics': stats
+            'statistics': appointment_statistics(doctor_id)
         })
     except Exception as e:
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+
+
+@require_http_methods(["GET"])
+def ajax_get_prescribe_data(request):
+    """AJAX endpoint with what the shared prescribe modal needs for one appointment."""
+    doctor_id = request.session.get('doctor_id')
+    if not doctor_id:
+        return JsonResponse({'status': 'error', 'message': 'Not authenticated'}, status=401)
+
+    appointment = Appointment.objects.filter(
+        id=request.GET.get('appointment_id'), doctor_id=doctor_id,
+    ).select_related('patient').first()
+    if appointment is None:
+        return JsonResponse({'status': 'error', 'message': 'Appointment not found'}, status=404)
+
+    return JsonResponse({
+        'status': 'success',
+        'appointment': {
+            'id': appointment.id,
+            'patient_name': appointment.patient.name,
+            'service': appointment.service,
+            'category': appointment.get_relevant_category(),
+            'prescribe_url': reverse('add_medicines', args=[appointment.id]),
+        },
+        'prescriptions': list(appointment.prescriptions.values('medicine_id', 'frequency', 'duration', 'instructions')),
+    })
+
+
+@require_http_methods(["GET"])
+def ajax_get_category_medicines(request):
+    """AJAX endpoint listing one category's medicines in a compact, cacheable form.
+
+    The payload only changes with the category's catalog version, so it is cached
+    server-side under that version and sent with an ETag. Clients pass the version
+    they know as ``v`` so the URL itself changes whenever the catalog does.
+    """
+    doctor_id = request.session.get('doctor_id')
+    if not doctor_id:
+        return JsonResponse({'status': 'error', 'message': 'Not authenticated'}, status=401)
+
+    category = request.GET.get('category', 'General')
+    if category not in dict(Medicine.CATEGORY_CHOICES):
+        return JsonResponse({'status': 'error', 'message': 'Unknown category'}, status=400)
+
+    version = catalog_version(category)
+    etag = quote_etag(version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        fields = ('id', 'name', 'med_type', 'dosage', 'description')
+        payload = cache.get_or_set(
+            f'category-medicines:{category}:{version}',
+            lambda: {
+                'status': 'success',
+                'category': category,
+                'fields': fields,
+                'medicines': list(Medicine.objects.filter(category=category).values_list(*fields)),
+            },
+            settings.CATEGORY_MEDICINES_CACHE_TIMEOUT,
+        )
+        response = JsonResponse(payload)
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=settings.CATEGORY_MEDICINES_CACHE_TIMEOUT)
+    return response
+
+
+def run_batch_operation(doctor_id, operation):
+    """Execute one operation of a batch request and return its JSON result."""
+    if not isinstance(operation, dict):
+        raise ValueError('Each operation must be an object')
+
+    op = operation.get('op')
+    if op == 'get_statistics':
+        return {'status': 'success', 'statistics': appointment_statistics(doctor_id)}
+    if op == 'list_appointments':
+        data = appointments_data(doctor_id)
+        return {'status': 'success', 'appointments': data, 'total': len(data)}
+    if op == 'transition':
+        new_status = operation.get('new_status')
+        if new_status not in TRANSITION_MESSAGES:
+            raise ValueError(f'Invalid status: {new_status}')
+        return transition_appointment(doctor_id, operation.get('appointment_id'), new_status)
+    if op == 'prescribe':
+        appointment = get_object_or_404(Appointment.objects.select_related('patient'), id=operation.get('appointment_id'), doctor_id=doctor_id)
+        prescribe_appointment(appointment, operation.get('medicines', []))
+        return {
+            'status': 'success',
+            'message': f'Medicines prescribed for {appointment.patient.name}!',
+            'appointment_id': appointment.id,
+            'new_status': 'Completed',
+        }
+    raise ValueError(f'Unknown operation: {op}')
+
+
+@require_http_methods(["POST"])
+@idempotent
+def ajax_batch(request):
+    """AJAX endpoint running several operations in one round-trip.
+
+    Expects a JSON body ``{"operations": [{"op": ...}, ...], "atomic": false}``.
+    Operations run in order and each gets its own entry in ``results``. With
+    ``atomic`` set, the first failure rolls back everything before it and the
+    remaining operations are skipped.
+    """
+    doctor_id = request.session.get('doctor_id')
+    if not doctor_id:
+        return JsonResponse({'status': 'error', 'message': 'Not authenticated'}, status=401)
+
+    try:
+        payload = json.loads(request.body)
+        operations = payload['operations']
+        atomic = bool(payload.get('atomic', False))
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return JsonResponse({'status': 'error', 'message': 'Invalid batch request'}, status=400)
+    if not isinstance(operations, list) or len(operations) > settings.AJAX_BATCH_MAX_OPERATIONS:
+        return JsonResponse({
+            'status': 'error',
+            'message': f'operations must be a list of at most {settings.AJAX_BATCH_MAX_OPERATIONS} items',
+        }, status=400)
+
+    results = []
+    if atomic:
+        try:
+            with transaction.atomic():
+                for operation in operations:
+                    results.append(run_batch_operation(doctor_id, operation))
+        except Exception as e:
+            done = len(results)
+            results = (
+                [{'status': 'rolled_back'}] * done
+                + [{'status': 'error', 'message': str(e)}]
+                + [{'status': 'skipped'}] * (len(operations) - done - 1)
+            )
+    else:
+        for operation in operations:
+            try:
+                with transaction.atomic():
+                    results.append(run_batch_operation(doctor_id, operation))
+            except Exception as e:
+                results.append({'status': 'error', 'message': str(e)})
+
+    return JsonResponse({
+        'status': 'success' if all(r['status'] == 'success' for r in results) else 'error',
+        'atomic': atomic,
+        'results': results,
+    })
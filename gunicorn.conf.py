@@ -0,0 +1,65 @@
+"""Gunicorn settings for `gunicorn hospital_management.wsgi` (see the Procfile).
+
+Every value can be overridden from the environment without a code change.
+"""
+import os
+
+from hospital_management import metrics
+from hospital_management.warmup import warm_up
+
+
+def cpu_count():
+    """CPUs this process may run on, which can be fewer than the host has."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# 2 x CPUs + 1 sync-style workers, capped so a small instance does not run out of memory
+workers = int(os.environ.get('WEB_CONCURRENCY', min(cpu_count() * 2 + 1, int(os.environ.get('GUNICORN_MAX_WORKERS', 4)))))
+# More than one thread switches to the gthread worker, so a worker waiting on the database can serve another request
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+
+# Load Django once in the master and fork workers from it: they share its memory and start warm
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+# Recycle workers to bound slow memory growth; the jitter stops them all restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+errorlog = '-'
+
+
+def when_ready(server):
+    """Master, after preload: import apps and compile templates once for every worker."""
+    if server.cfg.preload_app:
+        counts = warm_up()
+        server.log.info('Warm-up imported %(modules)d app modules and compiled %(templates)d templates', counts)
+
+
+def post_worker_init(worker):
+    """Worker, before it accepts connections.
+
+    Database connections are not opened here: Django's connections are per
+    thread, and the gthread worker serves requests on pool threads, so a
+    connection opened on this thread would never be used.
+    """
+    if not worker.cfg.preload_app:
+        warm_up()
+
+
+def worker_exit(server, worker):
+    """Worker, on its way out: write the last few seconds of metrics."""
+    from django.conf import settings
+    if settings.METRICS_ENABLED:
+        metrics.flush()
+
+
+def child_exit(server, worker):
+    """Master: fold the exited worker's metrics into retired.json (needs Django, so preload only)."""
+    if server.cfg.preload_app:
+        metrics.retire(worker.pid)
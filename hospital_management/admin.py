@@ -0,0 +1,126 @@
+"""Admin building blocks for tables too large to count or list naively."""
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib import admin
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Min
+from django.utils.functional import cached_property
+
+
+def estimated_count(model, using='default'):
+    """The database's row-count estimate for ``model``'s table, or None if it has none.
+
+    PostgreSQL and MySQL keep one in their catalogues (refreshed by ANALYZE).
+    SQLite has none, so there the exact count is taken and cached for
+    ADMIN_COUNT_CACHE_TIMEOUT seconds. MAX(rowid) would be free but stays high
+    after rows are deleted (archiving, account purges), leaving the last
+    pages empty.
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        key = f'admin-row-count:{using}:{model._meta.db_table}'
+        count = cache.get(key)
+        if count is None:
+            count = model._base_manager.using(using).count()
+            cache.set(key, count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+        return count
+
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+                [model._meta.db_table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    # PostgreSQL reports -1 for a table that has never been analyzed
+    return row[0] if row and row[0] and row[0] > 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses the estimate for unfiltered lists of ADMIN_ESTIMATED_COUNT_THRESHOLD rows or more.
+
+    Filtered lists are still counted exactly; an index usually makes those
+    cheap, and the total shown for a search should be right.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not getattr(queryset, 'query', None) or queryset.query.where:
+            return super().count
+        estimate = estimated_count(queryset.model, queryset.db)
+        if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
+
+
+def truncate(day, kind):
+    return {'year': date(day.year, 1, 1), 'month': day.replace(day=1), 'day': day}[kind]
+
+
+def next_period(start, kind):
+    if kind == 'year':
+        return date(start.year + 1, 1, 1)
+    if kind == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+class ProbingDatesQuerySet:
+    """Lists the periods for date_hierarchy without a DISTINCT over every row.
+
+    Each level of the hierarchy asks for ``dates(field, kind)``, which
+    truncates the date of every matching row. Here the periods come from
+    MIN/MAX plus one EXISTS per candidate year, month or day: a handful of
+    index seeks when ``field`` is indexed.
+    """
+
+    def dates(self, field_name, kind, order='ASC'):
+        if kind not in ('year', 'month', 'day'):
+            return super().dates(field_name, kind, order)
+        # Separately, so SQLite can answer each from the end of the index
+        first = self.aggregate(value=Min(field_name))['value']
+        last = self.aggregate(value=Max(field_name))['value']
+        if first is None:
+            return []
+        periods = []
+        start = truncate(first, kind)
+        while start <= last:
+            end = next_period(start, kind)
+            if self.filter(**{f'{field_name}__gte': start, f'{field_name}__lt': end}).exists():
+                periods.append(start)
+            start = end
+        return periods if order == 'ASC' else periods[::-1]
+
+
+@lru_cache
+def probing_dates(queryset_class):
+    return type(f'ProbingDates{queryset_class.__name__}', (ProbingDatesQuerySet, queryset_class), {})
+
+
+class ScalableModelAdmin(admin.ModelAdmin):
+    """ModelAdmin for large tables: estimated page counts and no second full-table COUNT(*).
+
+    Subclasses should also set list_select_related for every relation shown in
+    list_display, use autocomplete_fields instead of select boxes, and index
+    the date_hierarchy field.
+    """
+    paginator = EstimatedCountPaginator
+    # Filtered lists say "N results" instead of also counting the whole table for "(of M total)"
+    show_full_result_count = False
+    list_per_page = 50
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if self.date_hierarchy:
+            queryset.__class__ = probing_dates(queryset.__class__)
+        return queryset
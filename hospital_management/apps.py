@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class HospitalManagementConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "hospital_management"
+
+    def ready(self):
+        from django.core import checks
+
+        from . import execute_wrappers, sqlite  # noqa: F401  (register the connection_created hooks)
+        from .soft_delete import check_purge_relations
+
+        checks.register(check_purge_relations, checks.Tags.models)
@@ -0,0 +1,97 @@
+"""Minification and bundling of the project's own CSS/JS for collectstatic."""
+import re
+
+# Quoted strings are copied through untouched; comments become a single space
+CSS_TOKEN = re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|/\*.*?\*/', re.S)
+CSS_SPACE_AROUND = re.compile(r'\s*([{};,>])\s*')
+CSS_SPACE_AFTER_COLON = re.compile(r':\s+')
+
+
+def _minify_css_code(css, following):
+    """Minify code between quoted strings; ``following`` is the first of ``{;}`` after it."""
+    css = re.sub(r'\s+', ' ', css)
+    css = CSS_SPACE_AROUND.sub(r'\1', css)
+    # Text ending at "{" is a selector or at-rule prelude, where "a :hover" and "a:hover" differ
+    segments = re.split(r'([{;}])', css)
+    for i in range(0, len(segments), 2):
+        end = segments[i + 1] if i + 1 < len(segments) else following
+        if end != '{':
+            segments[i] = CSS_SPACE_AFTER_COLON.sub(':', segments[i])
+    return ''.join(segments).replace(';}', '}')
+
+
+def minify_css(source):
+    """Strip comments and redundant whitespace from a stylesheet, leaving quoted strings as written."""
+    pieces = []  # code and quoted strings alternate, starting and ending with code
+    code = []
+    position = 0
+    for match in CSS_TOKEN.finditer(source):
+        code.append(source[position:match.start()])
+        token = match.group()
+        if token.startswith('/*'):
+            code.append(' ')
+        else:
+            pieces.extend((''.join(code), token))
+            code = []
+        position = match.end()
+    code.append(source[position:])
+    pieces.append(''.join(code))
+
+    parts = []
+    following = ''
+    for index in range(len(pieces) - 1, -1, -1):
+        piece = pieces[index]
+        if index % 2:
+            parts.append(piece)
+            continue
+        parts.append(_minify_css_code(piece, following))
+        structural = re.search(r'[{;}]', piece)
+        if structural:
+            following = structural.group()
+    return ''.join(reversed(parts)).strip()
+
+
+def minify_js(source):
+    """Conservatively shrink a script.
+
+    Only comments that occupy whole lines, indentation and blank lines are
+    removed. A block comment is dropped only if it starts a line and nothing
+    but whitespace follows its closing ``*/``; otherwise its lines are kept
+    as written. Line breaks are kept so automatic semicolon insertion still
+    behaves exactly as in the source file.
+    """
+    lines = source.splitlines()
+    kept = []
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if line.startswith('/*'):
+            end = i
+            close = line.find('*/', 2)
+            while close == -1 and end + 1 < len(lines):
+                end += 1
+                close = lines[end].find('*/')
+            closing = lines[end] if end > i else line
+            if close != -1 and not closing[close + 2:].strip():
+                i = end + 1
+                continue
+            kept.extend(lines[i:end + 1])
+            i = end + 1
+            continue
+        if not line.startswith('//'):
+            kept.append(lines[i])
+        i += 1
+    return '\n'.join(line.strip() for line in kept if line.strip())
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+def build_bundle(name, sources):
+    """Concatenate and minify ``sources`` (already read as text) for bundle ``name``."""
+    minify = MINIFIERS.get(name[name.rfind('.'):], lambda source: source)
+    separator = '\n;\n' if name.endswith('.js') else '\n'
+    return separator.join(minify(source) for source in sources) + '\n'
@@ -0,0 +1,42 @@
+"""Execute wrappers that follow the request's context instead of one thread's connection.
+
+``connection.execute_wrapper`` applies to the connection of the thread that
+installs it. Under ASGI the middleware runs on the event loop thread, while
+the async ORM and sync views run their queries in ``sync_to_async`` worker
+threads, each with its own connection. Wrappers installed with
+``context_execute_wrapper`` are kept in a context variable, which asgiref
+copies into those threads. Every connection gets one dispatcher (from the
+connection_created hook below) that runs them.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+_wrappers = ContextVar('hospital_management_execute_wrappers', default=())
+
+
+def dispatch(execute, sql, params, many, context):
+    # The first wrapper installed is the outermost, as with connection.execute_wrapper
+    for wrapper in reversed(_wrappers.get()):
+        execute = partial(wrapper, execute)
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created, dispatch_uid='hospital_management.execute_wrappers.install_dispatch')
+def install_dispatch(sender, connection, **kwargs):
+    # The same wrapper object lives on across reconnects, so install once
+    if dispatch not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch)
+
+
+@contextmanager
+def context_execute_wrapper(wrapper):
+    """Run ``wrapper`` around every query made in this context, on any thread."""
+    token = _wrappers.set(_wrappers.get() + (wrapper,))
+    try:
+        yield
+    finally:
+        _wrappers.reset(token)
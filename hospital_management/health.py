@@ -0,0 +1,94 @@
+"""Liveness and readiness checks served by HealthCheckMiddleware.
+
+Liveness only proves the worker can answer. Readiness also checks the
+database round trip, pending migrations and the cache. Its result is kept
+in-process for HEALTH_CHECK_CACHE_SECONDS, so a load balancer probing every
+few seconds costs at most one set of checks per worker per interval.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+CACHE_PROBE_KEY = 'health:probe'
+
+_lock = threading.Lock()
+_last_result = None
+_last_checked = 0.0
+# Applied migrations stay applied, so once a worker has seen none pending it stops looking
+_migrations_ok = False
+
+
+def _timed(check):
+    start = time.perf_counter()
+    try:
+        detail = check() or {}
+        ok = detail.pop('ok', True)
+    except Exception as e:
+        ok, detail = False, {'error': f'{type(e).__name__}: {e}'}
+    return {'ok': ok, 'latency_ms': round((time.perf_counter() - start) * 1000, 2), **detail}
+
+
+def check_database():
+    connection = connections[DEFAULT_DB_ALIAS]
+    # Drop a connection the server has closed instead of failing on it
+    connection.close_if_unusable_or_obsolete()
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    latency_ms = (time.perf_counter() - start) * 1000
+    return {'ok': latency_ms <= settings.HEALTH_DB_LATENCY_THRESHOLD_MS}
+
+
+def check_migrations():
+    global _migrations_ok
+    if _migrations_ok:
+        return {'pending': 0}
+    executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+    pending = len(executor.migration_plan(executor.loader.graph.leaf_nodes()))
+    _migrations_ok = pending == 0
+    return {'ok': _migrations_ok, 'pending': pending}
+
+
+def check_cache():
+    value = str(time.time())
+    cache.set(CACHE_PROBE_KEY, value, 60)
+    return {'ok': cache.get(CACHE_PROBE_KEY) == value}
+
+
+CHECKS = {
+    'database': check_database,
+    'migrations': check_migrations,
+    'cache': check_cache,
+}
+
+
+def liveness():
+    return {'status': 'ok'}
+
+
+def readiness():
+    """Run every check, or return the result from the last HEALTH_CHECK_CACHE_SECONDS."""
+    global _last_result, _last_checked
+    with _lock:
+        if _last_result is not None and time.monotonic() - _last_checked < settings.HEALTH_CHECK_CACHE_SECONDS:
+            return _last_result
+        checks = {name: _timed(check) for name, check in CHECKS.items()}
+        _last_result = {
+            'status': 'ok' if all(c['ok'] for c in checks.values()) else 'fail',
+            'checks': checks,
+        }
+        _last_checked = time.monotonic()
+        return _last_result
+
+
+def reset():
+    """Forget the cached readiness result (used by tests)."""
+    global _last_result, _migrations_ok
+    with _lock:
+        _last_result = None
+        _migrations_ok = False
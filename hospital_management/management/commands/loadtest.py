@@ -0,0 +1,281 @@
+import gzip
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from doctors.models import Doctor
+from medicines.management.commands.seed_data import SEED_EMAIL_DOMAIN, SEED_PASSWORD
+from medicines.models import Appointment
+from patients.models import Patient
+
+PRESCRIBE_BUTTON_RE = re.compile(r'data-bs-target="#prescribeModal" data-appointment-id="(\d+)" data-category="([^"]+)"')
+CATALOG_VERSION_RE = re.compile(r'data-catalog-version="([^"]*)"')
+SERVICES = [value for value, _ in Appointment.SERVICE_CHOICES]
+
+
+class NoRedirect(HTTPRedirectHandler):
+    """Report redirects as responses instead of following them, like a timed browser hop."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Results:
+    """Latencies per URL name, shared by every virtual user."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def add(self, name, seconds, ok):
+        with self.lock:
+            self.latencies.setdefault(name, []).append(seconds)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[name] = {
+                'requests': len(values),
+                'errors': self.errors.get(name, 0),
+                'rps': round(len(values) / elapsed, 2),
+                'mean_ms': round(sum(values) / len(values) * 1000, 2),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2),
+                'max_ms': round(values[-1] * 1000, 2),
+            }
+        total = sum(e['requests'] for e in endpoints.values())
+        return {
+            'requests': total,
+            'errors': sum(e['errors'] for e in endpoints.values()),
+            'rps': round(total / elapsed, 2),
+            'endpoints': endpoints,
+        }
+
+
+class VirtualUser:
+    """One browser session: its own cookies, timed requests labelled by URL name."""
+
+    def __init__(self, base_url, results, think_time, rng):
+        self.base_url = base_url.rstrip('/')
+        self.results = results
+        self.think_time = think_time
+        self.rng = rng
+        # Session and CSRF cookies are marked Secure for Render; send them back over local http too
+        self.cookies = CookieJar(policy=DefaultCookiePolicy(secure_protocols=('https', 'http')))
+        self.opener = build_opener(HTTPCookieProcessor(self.cookies), NoRedirect)
+
+    def csrf_token(self):
+        return next((c.value for c in self.cookies if c.name == 'csrftoken'), '')
+
+    def request(self, name, path, data=None, headers=None, query=None):
+        url = self.base_url + path + (f'?{urlencode(query)}' if query else '')
+        headers = {'Accept-Encoding': 'gzip', **(headers or {})}
+        body = None
+        if data is not None:
+            body = urlencode({**data, 'csrfmiddlewaretoken': self.csrf_token()}, doseq=True).encode()
+            headers.update({'Content-Type': 'application/x-www-form-urlencoded', 'X-CSRFToken': self.csrf_token()})
+
+        start = time.perf_counter()
+        try:
+            response = self.opener.open(Request(url, data=body, headers=headers), timeout=30)
+        except HTTPError as e:
+            response = e
+        except URLError as e:
+            self.results.add(name, time.perf_counter() - start, ok=False)
+            raise CommandError(f'Cannot reach {url}: {e.reason}')
+        content = response.read()
+        self.results.add(name, time.perf_counter() - start, ok=response.getcode() < 400)
+
+        if response.headers.get('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, 2 * self.think_time))
+        return content.decode('utf-8', 'replace')
+
+    def login(self, user_type, email):
+        url_name = f'{user_type}_login'
+        self.request(url_name, reverse(url_name))
+        self.request(url_name, reverse(url_name), data={'email': email, 'password': SEED_PASSWORD})
+
+    def patient_journey(self, email, doctor_ids):
+        self.login('patient', email)
+        self.request('patient_dashboard', reverse('patient_dashboard'))
+        date = timezone.localdate() + timedelta(days=self.rng.randint(1, 60))
+        self.request('book_appointment', reverse('book_appointment'), data={
+            'doctor_id': self.rng.choice(doctor_ids),
+            'service': self.rng.choice(SERVICES),
+            'date': date.isoformat(),
+            'time': f'{self.rng.randint(9, 17):02d}:{self.rng.choice(("00", "30"))}',
+            'idempotency_key': str(uuid.uuid4()),
+        })
+        self.request('patient_dashboard', reverse('patient_dashboard'))
+        self.request('patient_logout', reverse('patient_logout'))
+
+    def doctor_journey(self, email, polls):
+        self.login('doctor', email)
+        page = self.request('doctor_dashboard', reverse('doctor_dashboard'))
+        ajax = {'X-Requested-With': 'XMLHttpRequest'}
+        for _ in range(polls):
+            self.request('ajax_get_statistics', reverse('ajax_get_statistics'), headers=ajax)
+        self.request('ajax_get_appointments', reverse('ajax_get_appointments'), headers=ajax)
+
+        buttons = PRESCRIBE_BUTTON_RE.findall(page)
+        if buttons:
+            appointment_id, category = self.rng.choice(buttons)
+            version = CATALOG_VERSION_RE.search(page)
+            self.request('ajax_get_prescribe_data', reverse('ajax_get_prescribe_data'),
+                         headers=ajax, query={'appointment_id': appointment_id})
+            catalog = json.loads(self.request(
+                'ajax_get_category_medicines', reverse('ajax_get_category_medicines'), headers=ajax,
+                query={'category': category, 'v': version.group(1) if version else ''},
+            ))
+            medicine_ids = [row[0] for row in catalog.get('medicines', [])]
+            chosen = self.rng.sample(medicine_ids, min(2, len(medicine_ids)))
+            self.request('add_medicines', reverse('add_medicines', args=[appointment_id]), data={'medicines': chosen})
+
+        self.request('medicine_list', reverse('medicine_list'))
+        self.request('doctor_logout', reverse('doctor_logout'))
+
+    def poll_dashboard(self, email, deadline):
+        """An open doctor dashboard: log in once, then poll until the run ends. Returns the poll count."""
+        self.login('doctor', email)
+        ajax = {'X-Requested-With': 'XMLHttpRequest'}
+        polls = 0
+        while time.monotonic() < deadline:
+            self.request('ajax_get_statistics', reverse('ajax_get_statistics'), headers=ajax)
+            polls += 1
+            if polls % 5 == 0:
+                self.request('ajax_get_appointments', reverse('ajax_get_appointments'), headers=ajax)
+        return polls
+
+
+class Command(BaseCommand):
+    help = 'Replay patient and doctor journeys against a running server and report latency percentiles per URL name.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--users', type=int, default=10, help='Concurrent virtual users.')
+        parser.add_argument(
+            '--scenario', choices=('journeys', 'polling'), default='journeys',
+            help='journeys: mixed patient and doctor visits; polling: every user keeps a doctor dashboard open and polls it.',
+        )
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to keep starting new journeys.')
+        parser.add_argument('--doctor-share', type=float, default=0.3, help='Fraction of journeys that are doctors.')
+        parser.add_argument('--polls', type=int, default=3, help='Statistics polls per doctor journey.')
+        parser.add_argument('--think-time', type=float, default=0, help='Mean pause between requests, in seconds.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Earlier results JSON to compare against.')
+        parser.add_argument('--threshold', type=float, default=10, help='Percent slowdown reported as a regression.')
+
+    def handle(self, *args, **options):
+        domain = f'@{SEED_EMAIL_DOMAIN}'
+        patients = list(Patient.objects.filter(email__endswith=domain).values_list('email', flat=True)[:1000])
+        doctors = list(Doctor.objects.filter(email__endswith=domain).values_list('id', 'email')[:1000])
+        if not patients or not doctors:
+            raise CommandError('No seeded accounts found. Run `python manage.py seed_data` first.')
+        doctor_ids = [doctor_id for doctor_id, _ in doctors]
+
+        results = Results()
+        deadline = time.monotonic() + options['duration']
+        journeys = [0]
+
+        def run_user(index):
+            rng = random.Random(options['seed'] * 1000 + index)
+            if options['scenario'] == 'polling':
+                user = VirtualUser(options['base_url'], results, options['think_time'], rng)
+                user.poll_dashboard(doctors[index % len(doctors)][1], deadline)
+                with results.lock:
+                    journeys[0] += 1
+                return
+            while time.monotonic() < deadline:
+                user = VirtualUser(options['base_url'], results, options['think_time'], rng)
+                if rng.random() < options['doctor_share']:
+                    user.doctor_journey(rng.choice(doctors)[1], options['polls'])
+                else:
+                    user.patient_journey(rng.choice(patients), doctor_ids)
+                with results.lock:
+                    journeys[0] += 1
+
+        self.stdout.write(f"Running {options['users']} virtual users ({options['scenario']}) against {options['base_url']} for {options['duration']:.0f}s...")
+        started_at = timezone.now()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['users']) as pool:
+            for future in [pool.submit(run_user, i) for i in range(options['users'])]:
+                future.result()
+        elapsed = time.perf_counter() - start
+
+        report = {
+            'started_at': started_at.isoformat(),
+            'base_url': options['base_url'],
+            'scenario': options['scenario'],
+            'users': options['users'],
+            'duration_s': round(elapsed, 2),
+            'journeys': journeys[0],
+            **results.summary(elapsed),
+        }
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.print_comparison(json.load(f), report, options['threshold'])
+
+    def print_report(self, report):
+        self.stdout.write(f"{'URL name':<28}{'reqs':>7}{'err':>5}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for name, e in report['endpoints'].items():
+            self.stdout.write(
+                f"{name:<28}{e['requests']:>7}{e['errors']:>5}{e['rps']:>8}{e['p50_ms']:>9}{e['p95_ms']:>9}{e['p99_ms']:>9}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['journeys']} journeys, {report['requests']} requests, {report['errors']} errors, "
+            f"{report['rps']} req/s over {report['duration_s']}s"
+        ))
+
+    def print_comparison(self, before, after, threshold):
+        self.stdout.write(f"\nCompared with the run from {before['started_at']}:")
+        regressions = 0
+        for name, new in after['endpoints'].items():
+            old = before['endpoints'].get(name)
+            if not old:
+                continue
+            changes = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+                change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0
+                changes.append(f'{key[:3]} {old[key]} -> {new[key]} ({change:+.0f}%)')
+                if change > threshold:
+                    regressions += 1
+            self.stdout.write(f"  {name:<28}" + ', '.join(changes))
+        self.stdout.write(f"  throughput {before['rps']} -> {after['rps']} req/s")
+        if regressions:
+            self.stdout.write(self.style.WARNING(f'{regressions} percentiles slower by more than {threshold:.0f}%'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'No percentile slower by more than {threshold:.0f}%'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from doctors.models import Doctor
+from doctors.tasks import purge_doctor
+from patients.models import Patient
+from patients.tasks import purge_patient
+
+
+class Command(BaseCommand):
+    help = 'Purge soft-deleted doctor and patient accounts whose background purge never ran or did not finish.'
+
+    def handle(self, *args, **options):
+        doctor_ids = list(Doctor.objects.filter(deleted_at__isnull=False).values_list('id', flat=True))
+        for doctor_id in doctor_ids:
+            purge_doctor(doctor_id=doctor_id)
+        patient_ids = list(Patient.objects.filter(deleted_at__isnull=False).values_list('id', flat=True))
+        for patient_id in patient_ids:
+            purge_patient(patient_id=patient_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {len(doctor_ids)} doctor and {len(patient_ids)} patient accounts.'
+        ))
@@ -0,0 +1,196 @@
+"""In-process request metrics, shared between workers through small per-process files.
+
+Each worker aggregates into a plain dict guarded by a lock and, at most every
+``METRICS_FLUSH_INTERVAL`` seconds, writes a JSON snapshot to
+``METRICS_DIR/<pid>.json``. The metrics endpoint merges every snapshot and
+renders them in the Prometheus text format.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+# Upper bounds of the histogram buckets; a final +Inf bucket is implied
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# Totals of workers that have exited, kept by retire()
+RETIRED_FILE = 'retired.json'
+
+_lock = threading.Lock()
+_views = {}
+_last_flush = 0.0
+
+
+def _empty_stats():
+    return {
+        'requests': {},
+        'duration': [0] * (len(DURATION_BUCKETS) + 1),
+        'duration_sum': 0.0,
+        'size': [0] * (len(SIZE_BUCKETS) + 1),
+        'size_sum': 0,
+        'size_count': 0,
+        'queries': 0,
+        'query_seconds': 0.0,
+    }
+
+
+def record(view, method, status, duration, size, queries, query_seconds):
+    """Add one finished request to this process's totals."""
+    global _last_flush
+    with _lock:
+        stats = _views.get(view)
+        if stats is None:
+            stats = _views[view] = _empty_stats()
+        key = f'{method} {status // 100}xx'
+        stats['requests'][key] = stats['requests'].get(key, 0) + 1
+        stats['duration'][bisect_left(DURATION_BUCKETS, duration)] += 1
+        stats['duration_sum'] += duration
+        if size is not None:
+            stats['size'][bisect_left(SIZE_BUCKETS, size)] += 1
+            stats['size_sum'] += size
+            stats['size_count'] += 1
+        stats['queries'] += queries
+        stats['query_seconds'] += query_seconds
+
+        now = time.monotonic()
+        if now - _last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        _last_flush = now
+        snapshot = json.dumps(_views)
+    _write_snapshot(snapshot)
+
+
+def _snapshot_path(pid=None):
+    return os.path.join(settings.METRICS_DIR, f'{pid or os.getpid()}.json')
+
+
+def _write_snapshot(snapshot):
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    path = _snapshot_path()
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(snapshot)
+    os.replace(tmp_path, path)
+
+
+def flush():
+    """Write this process's snapshot now, e.g. from a worker that is about to exit."""
+    with _lock:
+        snapshot = json.dumps(_views)
+    _write_snapshot(snapshot)
+
+
+def retire(pid):
+    """Fold an exited worker's snapshot into retired.json.
+
+    Called by the gunicorn master when a worker exits, so recycled workers
+    (max_requests) keep their counts without METRICS_DIR growing a file each.
+    """
+    path = _snapshot_path(pid)
+    try:
+        with open(path) as f:
+            views = json.load(f)
+    except (OSError, ValueError):
+        return
+    retired_path = os.path.join(settings.METRICS_DIR, RETIRED_FILE)
+    try:
+        with open(retired_path) as f:
+            retired = json.load(f)
+    except (OSError, ValueError):
+        retired = {}
+    for view, stats in views.items():
+        _merge(retired.setdefault(view, _empty_stats()), stats)
+    tmp_path = f'{retired_path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(retired, f)
+    os.replace(tmp_path, retired_path)
+    os.remove(path)
+
+
+def collect():
+    """Totals of every worker, with this process's own numbers taken live."""
+    with _lock:
+        merged = json.loads(json.dumps(_views))
+
+    own = f'{os.getpid()}.json'
+    try:
+        names = os.listdir(settings.METRICS_DIR)
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        if not name.endswith('.json') or name == own:
+            continue
+        try:
+            with open(os.path.join(settings.METRICS_DIR, name)) as f:
+                views = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for view, stats in views.items():
+            _merge(merged.setdefault(view, _empty_stats()), stats)
+    return merged
+
+
+def _merge(into, stats):
+    for key, count in stats['requests'].items():
+        into['requests'][key] = into['requests'].get(key, 0) + count
+    for field in ('duration', 'size'):
+        into[field] = [a + b for a, b in zip(into[field], stats[field])]
+    for field in ('duration_sum', 'size_sum', 'size_count', 'queries', 'query_seconds'):
+        into[field] += stats[field]
+
+
+def _histogram(lines, name, view, buckets, counts, total, count):
+    cumulative = 0
+    for bound, bucket_count in zip(buckets + ('+Inf',), counts):
+        cumulative += bucket_count
+        lines.append(f'{name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+    lines.append(f'{name}_sum{{view="{view}"}} {total}')
+    lines.append(f'{name}_count{{view="{view}"}} {count}')
+
+
+def render(views):
+    """Prometheus text exposition of merged metrics."""
+    lines = [
+        '# HELP hms_http_requests_total Requests handled, by view, method and status class.',
+        '# TYPE hms_http_requests_total counter',
+    ]
+    for view, stats in sorted(views.items()):
+        for key, count in sorted(stats['requests'].items()):
+            method, status = key.split(' ')
+            lines.append(f'hms_http_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}')
+
+    lines += [
+        '# HELP hms_http_request_duration_seconds Time spent producing the response.',
+        '# TYPE hms_http_request_duration_seconds histogram',
+    ]
+    for view, stats in sorted(views.items()):
+        _histogram(lines, 'hms_http_request_duration_seconds', view, DURATION_BUCKETS,
+                   stats['duration'], stats['duration_sum'], sum(stats['duration']))
+
+    lines += [
+        '# HELP hms_http_response_size_bytes Response body size as sent (after compression).',
+        '# TYPE hms_http_response_size_bytes histogram',
+    ]
+    for view, stats in sorted(views.items()):
+        _histogram(lines, 'hms_http_response_size_bytes', view, SIZE_BUCKETS,
+                   stats['size'], stats['size_sum'], stats['size_count'])
+
+    lines += [
+        '# HELP hms_db_queries_total Database queries executed while handling requests.',
+        '# TYPE hms_db_queries_total counter',
+    ]
+    for view, stats in sorted(views.items()):
+        lines.append(f'hms_db_queries_total{{view="{view}"}} {stats["queries"]}')
+
+    lines += [
+        '# HELP hms_db_query_duration_seconds_total Time spent in database queries.',
+        '# TYPE hms_db_query_duration_seconds_total counter',
+    ]
+    for view, stats in sorted(views.items()):
+        lines.append(f'hms_db_query_duration_seconds_total{{view="{view}"}} {stats["query_seconds"]}')
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,299 @@
+import random
+import time
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+from django.utils.text import compress_string
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import health, metrics
+from .execute_wrappers import context_execute_wrapper
+from .slow_queries import SlowQueryRecorder
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+ACCEPT_ENCODING_RE = _lazy_re_compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+
+def accepted_encodings(header):
+    """Return the codings in an Accept-Encoding header that have q > 0."""
+    accepted = set()
+    for part in header.split(','):
+        match = ACCEPT_ENCODING_RE.fullmatch(part)
+        if not match:
+            continue
+        coding, q = match.group(1).lower(), match.group(2)
+        try:
+            if q is None or float(q) > 0:
+                accepted.add(coding)
+        except ValueError:
+            continue
+    return accepted
+
+
+class StreamCompressor:
+    """One compressed stream fed chunk by chunk; every chunk is flushed so it reaches the client promptly."""
+
+    def __init__(self, encoding):
+        if encoding == 'br':
+            self.compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self.process = lambda data: self.compressor.process(data) + self.compressor.flush()
+            self.finish = self.compressor.finish
+        else:
+            # wbits=31 writes a gzip container around the deflate stream
+            self.compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self.process = lambda data: self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = self.compressor.flush
+
+
+def compress_stream(sequence, encoding):
+    stream = StreamCompressor(encoding)
+    for chunk in sequence:
+        data = stream.process(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+async def acompress_stream(sequence, encoding):
+    stream = StreamCompressor(encoding)
+    async for chunk in sequence:
+        data = stream.process(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+class HybridMiddleware:
+    """Base for middleware that runs natively under both WSGI and ASGI.
+
+    Subclasses implement ``handle`` and ``ahandle``. In an async stack Django
+    then calls ``ahandle`` directly instead of adapting the whole chain (and
+    every async view below it) to run in a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.ahandle(request)
+        return self.handle(request)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise that also runs natively in an async middleware stack.
+
+    WhiteNoise's own middleware is sync-only, which would force every request
+    under ASGI through a thread. Static files are still served the same way.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings=settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.acall(request)
+        return super().__call__(request)
+
+    async def acall(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class HealthCheckMiddleware(HybridMiddleware):
+    """Answer liveness and readiness probes before any other middleware runs.
+
+    First in MIDDLEWARE, so probes skip the HTTPS redirect, sessions, CSRF,
+    messages and the request metrics. See hospital_management.health.
+    """
+
+    def probe(self, request):
+        if request.path == settings.HEALTH_LIVENESS_PATH:
+            return health.liveness
+        if request.path == settings.HEALTH_READINESS_PATH:
+            return health.readiness
+        return None
+
+    def respond(self, result):
+        response = JsonResponse(result, status=200 if result['status'] == 'ok' else 503)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    def handle(self, request):
+        probe = self.probe(request)
+        if probe is None:
+            return self.get_response(request)
+        return self.respond(probe())
+
+    async def ahandle(self, request):
+        probe = self.probe(request)
+        if probe is None:
+            return await self.get_response(request)
+        return self.respond(await sync_to_async(probe)())
+
+
+class QueryTimer:
+    """connection.execute_wrapper that counts queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class MetricsMiddleware(HybridMiddleware):
+    """Record latency, response size and database usage per resolved URL name.
+
+    Sits outside CompressionMiddleware so sizes are what actually goes over the
+    wire. Requests that match no URL are grouped under ``unresolved``. Exposed
+    by the /metrics/ endpoint; see hospital_management.metrics.
+    """
+
+    def handle(self, request):
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        self.record(request, response, timer, time.perf_counter() - start)
+        return response
+
+    async def ahandle(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+        # Queries run in sync_to_async worker threads, each with its own connection
+        with context_execute_wrapper(timer):
+            response = await self.get_response(request)
+        self.record(request, response, timer, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, timer, duration):
+        match = request.resolver_match
+        metrics.record(
+            view=match.view_name if match else 'unresolved',
+            method=request.method,
+            status=response.status_code,
+            duration=duration,
+            size=None if response.streaming else len(response.content),
+            queries=timer.count,
+            query_seconds=timer.seconds,
+        )
+
+
+class SlowQueryMiddleware(HybridMiddleware):
+    """Log slow queries for a sample of requests when SLOW_QUERY_LOG_ENABLED is set.
+
+    Requests that are not sampled run without any wrapper, so the cost of the
+    log is bounded by SLOW_QUERY_SAMPLE_RATE. See hospital_management.slow_queries.
+    """
+
+    def sampled(self):
+        return settings.SLOW_QUERY_LOG_ENABLED and random.random() < settings.SLOW_QUERY_SAMPLE_RATE
+
+    def handle(self, request):
+        if not self.sampled():
+            return self.get_response(request)
+
+        with connection.execute_wrapper(SlowQueryRecorder(request)):
+            return self.get_response(request)
+
+    async def ahandle(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        with context_execute_wrapper(SlowQueryRecorder(request)):
+            return await self.get_response(request)
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Brotli/gzip compression for HTML and JSON responses over a size threshold.
+
+    Only content types in COMPRESSION_CONTENT_TYPES are touched, anything that
+    already has a Content-Encoding (WhiteNoise's precompressed static files) is
+    left alone, and streaming responses are compressed chunk by chunk.
+    """
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and 'br' in accepted:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(response, encoding)
+            del response.headers['Content-Length']
+        else:
+            compressed = self.compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # The body is no longer byte-identical to what the strong ETag described.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def compress(self, content, encoding):
+        if encoding == 'br':
+            return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+        # Same random-length filename padding as Django's GZipMiddleware (BREACH mitigation)
+        return compress_string(content, max_random_bytes=100)
+
+    def compress_stream(self, response, encoding):
+        if response.is_async:
+            return acompress_stream(response.streaming_content, encoding)
+        return compress_stream(response.streaming_content, encoding)
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 import dj_database_url
 
@@ -74,14 +75,22 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "hospital_management",
     "patients",
     "doctors",
     "medicines",
+    "api",
+    "jobs",
+    "analytics",
 ]
 
 MIDDLEWARE = [
+    "hospital_management.middleware.HealthCheckMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "hospital_management.middleware.StaticFilesMiddleware",
+    "hospital_management.middleware.MetricsMiddleware",
+    "hospital_management.middleware.SlowQueryMiddleware",
+    "hospital_management.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -123,10 +132,68 @@ else:
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
-            "NAME": BASE_DIR / "db.sqlite3",
+            "NAME": os.environ.get('SQLITE_PATH', BASE_DIR / "db.sqlite3"),
         }
     }
 
+# High-concurrency SQLite mode for single-node deployments (several gunicorn workers, no PostgreSQL).
+# Writes take the lock up front (BEGIN IMMEDIATE) instead of failing with "database is locked"
+# when a read transaction is upgraded, and the PRAGMAs below are applied to every new
+# connection by hospital_management.sqlite.configure_sqlite_connection.
+SQLITE_PRODUCTION_MODE = os.environ.get('SQLITE_PRODUCTION_MODE', 'False') == 'True'
+SQLITE_PRAGMAS = {}
+
+if SQLITE_PRODUCTION_MODE and DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20))  # seconds
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': SQLITE_BUSY_TIMEOUT,
+        'transaction_mode': 'IMMEDIATE',
+    }
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': SQLITE_BUSY_TIMEOUT * 1000,
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 64 * 1024)),  # negative = KiB
+        'temp_store': 'MEMORY',
+    }
+
+
+# Cache
+# Per-process memory cache by default; set CACHE_DIR to share one file-based cache
+# between all gunicorn workers on the same machine.
+if os.environ.get('CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'hospital-management',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+# Seconds a rendered appointment row on the doctor dashboard stays in the fragment cache.
+# Keys include the appointment's updated_at and the medicine catalog version, so
+# changes never serve stale HTML; the timeout only bounds memory use.
+DASHBOARD_FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('DASHBOARD_FRAGMENT_CACHE_TIMEOUT', 86400))
+
+# Seconds browsers and the server cache one category's medicine list for the prescribe modal.
+# URLs carry the catalog version, so a catalog change is picked up immediately.
+CATEGORY_MEDICINES_CACHE_TIMEOUT = int(os.environ.get('CATEGORY_MEDICINES_CACHE_TIMEOUT', 86400))
+
+# Route the doctor AJAX read and status endpoints to the async views in doctors.async_views.
+# Enable when serving hospital_management.asgi with uvicorn; under WSGI the sync views are faster.
+ASYNC_AJAX_VIEWS = os.environ.get('ASYNC_AJAX_VIEWS', 'False') == 'True'
+
+# Upper bound on sub-operations accepted by one /doctor/ajax/batch/ request.
+AJAX_BATCH_MAX_OPERATIONS = int(os.environ.get('AJAX_BATCH_MAX_OPERATIONS', 20))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -165,7 +232,70 @@ USE_TZ = True
 STATIC_URL = "static/"
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [BASE_DIR / 'static']
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    # Bundles, minifies, fingerprints (manifest) and gzip/brotli-precompresses at collectstatic time
+    "staticfiles": {
+        "BACKEND": "hospital_management.storage.BundledManifestStaticFilesStorage",
+    },
+}
+
+# Project CSS/JS concatenated into one file each by collectstatic; use {% bundle %} in templates.
+STATIC_BUNDLES = {
+    'bundles/app.css': ['css/style.css'],
+    'bundles/app.js': ['js/alert-popup.js', 'js/idempotency.js'],
+    'bundles/doctor.js': ['js/doctor-ajax.js'],
+}
+STATIC_BUNDLES_ENABLED = os.environ.get('STATIC_BUNDLES_ENABLED', str(not DEBUG)) == 'True'
+
+# Fingerprinted files are served with a far-future, immutable Cache-Control by WhiteNoise;
+# dropping the unhashed copies keeps STATIC_ROOT small.
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+
+# Response compression (hospital_management.middleware.CompressionMiddleware)
+# Static files are precompressed by collectstatic and served by WhiteNoise before this runs.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # bytes
+COMPRESSION_CONTENT_TYPES = ('text/html', 'application/json', 'text/plain')
+COMPRESSION_GZIP_LEVEL = 6  # streaming responses only; buffered ones use Django's compress_string
+COMPRESSION_BROTLI_QUALITY = 4  # fast enough for per-request compression
+
+# Request metrics (hospital_management.middleware.MetricsMiddleware)
+# Each worker writes its totals to METRICS_DIR/<pid>.json at most every METRICS_FLUSH_INTERVAL
+# seconds; /metrics/ merges them in Prometheus format for staff users or requests sending
+# `Authorization: Bearer <METRICS_TOKEN>`.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'hospital_management_metrics'))
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Read-only JSON API (api.views)
+# Browsers use the dashboard login session. Other clients send `Authorization: Bearer <token>`
+# with a token from API_TOKENS, a comma-separated list of `<token>=doctor:<id>` or
+# `<token>=patient:<id>` entries; the token acts as that doctor or patient.
+API_TOKENS = dict(
+    entry.strip().split('=', 1) for entry in os.environ.get('API_TOKENS', '').split(',') if '=' in entry
+)
+
+# Health probes (hospital_management.middleware.HealthCheckMiddleware)
+# /healthz answers as long as the worker is up; /readyz returns 503 when the database is
+# unreachable or slower than the threshold, migrations are pending or the cache fails.
+# Readiness results are reused for HEALTH_CHECK_CACHE_SECONDS within each worker.
+HEALTH_LIVENESS_PATH = '/healthz'
+HEALTH_READINESS_PATH = '/readyz'
+HEALTH_CHECK_CACHE_SECONDS = float(os.environ.get('HEALTH_CHECK_CACHE_SECONDS', 5))
+HEALTH_DB_LATENCY_THRESHOLD_MS = float(os.environ.get('HEALTH_DB_LATENCY_THRESHOLD_MS', 500))
+
+# Slow-query log (hospital_management.middleware.SlowQueryMiddleware), off by default.
+# On a SLOW_QUERY_SAMPLE_RATE fraction of requests, queries slower than the threshold are
+# written as JSON lines (view, SQL fingerprint, EXPLAIN on first sight) to a rotating file.
+SLOW_QUERY_LOG_ENABLED = os.environ.get('SLOW_QUERY_LOG_ENABLED', 'False') == 'True'
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100))
+SLOW_QUERY_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_SAMPLE_RATE', 0.1))
+SLOW_QUERY_LOG_FILE = os.environ.get('SLOW_QUERY_LOG_FILE', str(BASE_DIR / 'logs' / 'slow_queries.jsonl'))
+SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+SLOW_QUERY_LOG_BACKUP_COUNT = int(os.environ.get('SLOW_QUERY_LOG_BACKUP_COUNT', 5))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -180,4 +310,73 @@ EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
-EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
\ No newline at end of file
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+# Appointment archival
+# Completed/Cancelled appointments older than this are moved to the archive tables
+# by `python manage.py archive_appointments`.
+APPOINTMENT_ARCHIVE_AFTER_DAYS = int(os.environ.get('APPOINTMENT_ARCHIVE_AFTER_DAYS', 365))
+PATIENT_HISTORY_PAGE_SIZE = int(os.environ.get('PATIENT_HISTORY_PAGE_SIZE', 20))
+
+# Background jobs (jobs app)
+# Tasks are queued in the database and run by `python manage.py run_jobs` (the Procfile's
+# worker process). A failed job is retried after JOBS_RETRY_BACKOFF seconds, doubling up to
+# JOBS_RETRY_BACKOFF_MAX, until it has run JOBS_MAX_ATTEMPTS times. A job locked for longer than
+# JOBS_LOCK_TIMEOUT seconds is assumed abandoned by a dead worker and queued again.
+JOBS_CONCURRENCY = int(os.environ.get('JOBS_CONCURRENCY', 2))
+JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 1))
+JOBS_MAX_ATTEMPTS = int(os.environ.get('JOBS_MAX_ATTEMPTS', 5))
+JOBS_RETRY_BACKOFF = float(os.environ.get('JOBS_RETRY_BACKOFF', 10))
+JOBS_RETRY_BACKOFF_MAX = float(os.environ.get('JOBS_RETRY_BACKOFF_MAX', 3600))
+JOBS_LOCK_TIMEOUT = int(os.environ.get('JOBS_LOCK_TIMEOUT', 600))
+
+# Appointment status emails (medicines.notifications)
+# Approve/complete/reject changes are collected for APPOINTMENT_NOTIFICATION_WINDOW seconds, then
+# each patient gets one email covering them, sent APPOINTMENT_NOTIFICATION_BATCH_SIZE patients at a
+# time over a single mail connection by the background job worker.
+APPOINTMENT_NOTIFICATIONS_ENABLED = os.environ.get('APPOINTMENT_NOTIFICATIONS_ENABLED', 'True') == 'True'
+APPOINTMENT_NOTIFICATION_WINDOW = int(os.environ.get('APPOINTMENT_NOTIFICATION_WINDOW', 60))
+APPOINTMENT_NOTIFICATION_BATCH_SIZE = int(os.environ.get('APPOINTMENT_NOTIFICATION_BATCH_SIZE', 100))
+
+# Appointment reminders (medicines.reminders)
+# `python manage.py send_reminders`, run every few minutes by cron, emails patients about Approved
+# appointments starting within each of APPOINTMENT_REMINDER_LEAD_HOURS, once per lead time, in
+# batches of APPOINTMENT_REMINDER_BATCH_SIZE over a single mail connection.
+APPOINTMENT_REMINDER_LEAD_HOURS = [
+    int(h) for h in os.environ.get('APPOINTMENT_REMINDER_LEAD_HOURS', '24,2').split(',') if h.strip()
+]
+APPOINTMENT_REMINDER_BATCH_SIZE = int(os.environ.get('APPOINTMENT_REMINDER_BATCH_SIZE', 200))
+
+# Operations analytics (analytics app)
+# `python manage.py refresh_rollups` (cron, every few minutes) recomputes the days whose appointments
+# changed since the last run; it re-reads ANALYTICS_REFRESH_OVERLAP seconds before the watermark to
+# catch transactions that committed late. `python manage.py backfill_rollups` rebuilds history in
+# ANALYTICS_BACKFILL_CHUNK_DAYS-day chunks on ANALYTICS_BACKFILL_WORKERS threads. Utilization is
+# booked appointments over ANALYTICS_SLOTS_PER_DOCTOR_DAY slots per doctor per working day.
+ANALYTICS_REFRESH_OVERLAP = int(os.environ.get('ANALYTICS_REFRESH_OVERLAP', 300))
+ANALYTICS_BACKFILL_CHUNK_DAYS = int(os.environ.get('ANALYTICS_BACKFILL_CHUNK_DAYS', 31))
+ANALYTICS_BACKFILL_WORKERS = int(os.environ.get('ANALYTICS_BACKFILL_WORKERS', 4))
+ANALYTICS_SLOTS_PER_DOCTOR_DAY = int(os.environ.get('ANALYTICS_SLOTS_PER_DOCTOR_DAY', 18))
+
+# Account deletion
+# Deleting a doctor or patient account only marks it deleted; a background job (purge_doctor /
+# purge_patient) then removes the account and its appointments ACCOUNT_PURGE_BATCH_SIZE
+# appointments per transaction. `python manage.py purge_deleted_accounts` purges any left behind.
+ACCOUNT_PURGE_BATCH_SIZE = int(os.environ.get('ACCOUNT_PURGE_BATCH_SIZE', 500))
+
+# Admin
+# Unfiltered changelists of tables with at least this many rows show the database's row estimate
+# instead of running COUNT(*) over the whole table (hospital_management.admin).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ADMIN_ESTIMATED_COUNT_THRESHOLD', 100000))
+# SQLite keeps no row estimate; its exact count is cached for this many seconds instead.
+ADMIN_COUNT_CACHE_TIMEOUT = int(os.environ.get('ADMIN_COUNT_CACHE_TIMEOUT', 300))
+
+# Idempotency keys
+# Booking and appointment status POSTs accept an `Idempotency-Key` header or an
+# `idempotency_key` form field; a retry with the same key within this many seconds
+# gets the stored response back. Expired keys are removed by
+# `python manage.py purge_idempotency_keys`.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 24 * 60 * 60))
+# A key whose first request has not finished after this many seconds is treated as abandoned
+# (e.g. the worker was killed by the gunicorn timeout) and the next retry runs the view again.
+# Keep it above GUNICORN_TIMEOUT so a request that is merely slow is not run twice.
+IDEMPOTENCY_KEY_LEASE = int(os.environ.get('IDEMPOTENCY_KEY_LEASE', 120))
@@ -0,0 +1,139 @@
+"""Opt-in slow-query log, written as JSON lines to a rotating local file.
+
+SlowQueryMiddleware installs a SlowQueryRecorder as a connection execute
+wrapper on a sample of requests. Queries slower than SLOW_QUERY_THRESHOLD_MS
+are logged with the view that ran them and a normalized SQL fingerprint. The
+first time a fingerprint is seen in a process, its EXPLAIN plan is captured too.
+Parameters are never logged, so patient data stays out of the file.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger('hospital_management.slow_queries')
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+SPACE_RE = re.compile(r'\s+')
+
+# Fingerprints already EXPLAINed by this process; cleared when it gets this big
+MAX_EXPLAINED = 10000
+
+_explained = set()
+_explained_lock = threading.Lock()
+_handler_lock = threading.Lock()
+
+
+def normalize(sql):
+    """SQL with literals and IN lists collapsed, so repeats of one query look the same."""
+    sql = STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.md5(normalized_sql.encode()).hexdigest()[:16]
+
+
+def _ensure_handler():
+    """Attach the rotating JSONL file handler the first time something is logged."""
+    if logger.handlers:
+        return
+    with _handler_lock:
+        if logger.handlers:
+            return
+        os.makedirs(os.path.dirname(settings.SLOW_QUERY_LOG_FILE) or '.', exist_ok=True)
+        handler = RotatingFileHandler(
+            settings.SLOW_QUERY_LOG_FILE,
+            maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+            backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def _first_occurrence(key):
+    with _explained_lock:
+        if key in _explained:
+            return False
+        if len(_explained) >= MAX_EXPLAINED:
+            _explained.clear()
+        _explained.add(key)
+        return True
+
+
+class SlowQueryRecorder:
+    """connection.execute_wrapper that logs queries slower than the threshold."""
+
+    def __init__(self, request):
+        self.request = request
+        self.threshold = settings.SLOW_QUERY_THRESHOLD_MS / 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.log(sql, params, many, context, duration)
+
+    def log(self, sql, params, many, context, duration):
+        normalized = normalize(sql)
+        key = fingerprint(normalized)
+        match = getattr(self.request, 'resolver_match', None)
+        entry = {
+            'time': timezone.now().isoformat(),
+            'view': match.view_name if match else 'unresolved',
+            'method': self.request.method,
+            'path': self.request.path,
+            'duration_ms': round(duration * 1000, 2),
+            'fingerprint': key,
+            'sql': normalized,
+        }
+        if many:
+            entry['many'] = True
+        elif normalized.upper().startswith('SELECT') and _first_occurrence(key):
+            entry['explain'] = explain(sql, params, context['connection'])
+
+        _ensure_handler()
+        logger.info(json.dumps(entry, default=str))
+
+
+def explain(sql, params, connection):
+    """The plan for ``sql`` as text lines.
+
+    Runs on the driver's cursor, so no execute wrapper (request metrics, this
+    log) sees it. Inside a transaction it gets its own savepoint: on PostgreSQL a
+    failed statement would otherwise abort the caller's transaction.
+    """
+    savepoint = connection.in_atomic_block and connection.features.uses_savepoints
+    name = connection.ops.quote_name('slow_query_explain')
+    with connection.cursor() as wrapper:
+        cursor = wrapper.cursor
+        if savepoint:
+            cursor.execute(f'SAVEPOINT {name}')
+        try:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            rows = cursor.fetchall()
+        except Exception as e:
+            if savepoint:
+                cursor.execute(f'ROLLBACK TO SAVEPOINT {name}')
+                cursor.execute(f'RELEASE SAVEPOINT {name}')
+            return [f'EXPLAIN failed: {e}']
+        if savepoint:
+            cursor.execute(f'RELEASE SAVEPOINT {name}')
+    return [' '.join(str(col) for col in row) for row in rows]
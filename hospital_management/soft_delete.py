@@ -0,0 +1,113 @@
+"""Soft-deleted accounts and the batched purge that removes them later.
+
+Deleting a doctor or patient with ``.delete()`` makes Django's collector
+load every related row (appointments, prescriptions, codes, ...) and send
+delete signals for each, all inside the request. Instead, the request only
+sets ``deleted_at``, which hides the account from ``.active()`` at once, and
+queues a job that calls ``purge()``.
+
+``purge()`` follows the same on_delete rules as the collector, but walks
+the relations in batches of ids and removes rows with ``_raw_delete``, one
+DELETE per table per batch and no model instances. There are no
+pre/post_delete signals, so nothing that relies on them may hang off these
+models. ``check_purge_relations`` fails ``manage.py check`` when a relation
+reachable from them uses an on_delete that purge() cannot follow.
+"""
+from django.apps import apps
+from django.core import checks
+from django.db import models, transaction
+from django.utils import timezone
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def soft_delete(self):
+        now = timezone.now()
+        return self.update(deleted_at=now, updated_at=now)
+
+
+def _relations(model):
+    """(related model, field, on_delete) for every foreign key pointing at ``model``."""
+    for relation in model._meta.related_objects:
+        if not relation.many_to_many:
+            yield relation.related_model, relation.field, relation.on_delete
+
+
+def check_purge_relations(app_configs=None, **kwargs):
+    """System check: every relation purge() walks from a soft-deletable model is handled."""
+    errors = []
+    pending = [
+        model for model in apps.get_models()
+        if issubclass(model._default_manager._queryset_class, SoftDeleteQuerySet)
+    ]
+    seen = set()
+    while pending:
+        model = pending.pop()
+        if model in seen:
+            continue
+        seen.add(model)
+        for related, field, on_delete in _relations(model):
+            if on_delete is models.CASCADE:
+                pending.append(related)
+            elif on_delete not in (models.SET_NULL, models.DO_NOTHING):
+                errors.append(checks.Error(
+                    f'purge() does not handle {on_delete.__name__} on {related.__name__}.{field.name}.',
+                    hint='Use CASCADE, SET_NULL or DO_NOTHING, or teach soft_delete._delete_rows the new rule.',
+                    obj=field,
+                    id='hospital_management.E001',
+                ))
+    return errors
+
+
+def _delete_rows(model, ids, using):
+    """Delete rows ``ids`` of ``model`` after the rows that depend on them."""
+    if not ids:
+        return
+    # QuerySet._raw_delete() is private API, relied on as of Django 5.2; re-check it when upgrading
+    for field in model._meta.local_many_to_many:
+        through = field.remote_field.through
+        through._base_manager.using(using).filter(**{f'{field.m2m_field_name()}__in': ids})._raw_delete(using)
+    for relation in model._meta.related_objects:
+        if relation.many_to_many:
+            through = relation.through
+            through._base_manager.using(using).filter(**{f'{relation.field.m2m_reverse_field_name()}__in': ids})._raw_delete(using)
+    for related, field, on_delete in _relations(model):
+        rows = related._base_manager.using(using).filter(**{f'{field.name}__in': ids})
+        if on_delete is models.SET_NULL:
+            rows.update(**{field.name: None})
+        elif on_delete is models.CASCADE:
+            if related._meta.related_objects or related._meta.local_many_to_many:
+                _delete_rows(related, list(rows.values_list('pk', flat=True)), using)
+            else:
+                rows._raw_delete(using)
+        elif on_delete is not models.DO_NOTHING:
+            raise NotImplementedError(f'purge() does not handle {on_delete.__name__} on {related.__name__}.{field.name}')
+    model._base_manager.using(using).filter(pk__in=ids)._raw_delete(using)
+
+
+def purge(instance, batch_size, using='default'):
+    """Delete ``instance`` and everything that cascades from it, ``batch_size`` rows per transaction.
+
+    Returns the number of direct dependants removed (appointments, codes, ...).
+    SET_NULL references are only cleared in the last transaction, together
+    with ``instance`` itself: until then they still point at it, so nothing
+    rebuilt from the remaining rows meanwhile is counted twice.
+    """
+    model = type(instance)
+    removed = 0
+    for related, field, on_delete in _relations(model):
+        if on_delete is not models.CASCADE:
+            continue
+        rows = related._base_manager.using(using).filter(**{field.name: instance.pk})
+        while True:
+            with transaction.atomic(using=using):
+                ids = list(rows.values_list('pk', flat=True)[:batch_size])
+                _delete_rows(related, ids, using)
+            if not ids:
+                break
+            removed += len(ids)
+    with transaction.atomic(using=using):
+        _delete_rows(model, [instance.pk], using)
+    return removed
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created, dispatch_uid='hospital_management.sqlite.configure_sqlite_connection')
+def configure_sqlite_connection(sender, connection, **kwargs):
+    """Apply SQLITE_PRAGMAS to every new SQLite connection.
+
+    journal_mode=WAL lets readers run while a gunicorn worker writes, and
+    synchronous=NORMAL is durable enough under WAL while avoiding an fsync per commit.
+    """
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRAGMAS:
+        return
+
+    cursor = connection.connection.cursor()
+    try:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    finally:
+        cursor.close()
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .assets import build_bundle
+
+
+class BundledManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """WhiteNoise's hashed + gzip/brotli storage that first writes STATIC_BUNDLES.
+
+    Bundles are added to the collected files before hashing, so they get
+    content-hashed names in the manifest and precompressed copies like any
+    other static file, and WhiteNoise serves them as immutable.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name, sources in settings.STATIC_BUNDLES.items():
+                contents = []
+                for source in sources:
+                    storage, path = paths[source]
+                    with storage.open(path) as f:
+                        contents.append(f.read().decode('utf-8'))
+                if self.exists(name):
+                    self.delete(name)
+                self._save(name, ContentFile(build_bundle(name, contents).encode('utf-8')))
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
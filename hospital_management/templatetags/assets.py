@@ -0,0 +1,20 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name):
+    """Emit the tag(s) for a STATIC_BUNDLES entry.
+
+    With STATIC_BUNDLES_ENABLED the single fingerprinted bundle is linked;
+    otherwise (development) each source file is linked separately so edits
+    show up without running collectstatic.
+    """
+    files = [name] if settings.STATIC_BUNDLES_ENABLED else settings.STATIC_BUNDLES[name]
+    if name.endswith('.css'):
+        return format_html_join('\n', '<link rel="stylesheet" href="{}" />', ((static(f),) for f in files))
+    return format_html_join('\n', '<script src="{}"></script>', ((static(f),) for f in files))
@@ -0,0 +1,111 @@
+"""Shared helpers for the query-budget tests in each app's tests.py."""
+from contextlib import contextmanager
+from datetime import date, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from doctors.models import Doctor
+from medicines.models import Appointment, Medicine, Prescription
+from patients.models import Patient
+
+PASSWORD = 'secret123'
+
+
+@override_settings(
+    # Tests run with DEBUG=False, which would make templates look for collectstatic's manifest
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    STATIC_BUNDLES_ENABLED=False,
+    METRICS_ENABLED=False,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class QueryBudgetTestCase(TestCase):
+    """TestCase seeded with a realistic clinic, plus assertMaxQueries.
+
+    Budgets are fixed numbers, so a view whose query count grows with the
+    number of rows (an N+1) fails here and prints every query it ran.
+    """
+    DOCTORS = 4
+    PATIENTS = 25
+    APPOINTMENTS_PER_PATIENT = 6
+    MEDICINES_PER_CATEGORY = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        password = make_password(PASSWORD)
+        specializations = [value for value, _ in Doctor.SPECIALIZATION_CHOICES]
+        cls.doctors = Doctor.objects.bulk_create([
+            Doctor(
+                name=f'Doctor {i}', email=f'doctor{i}@example.com', password=password,
+                specialization=specializations[i % len(specializations)], experience=5 + i,
+            )
+            for i in range(cls.DOCTORS)
+        ])
+        cls.patients = Patient.objects.bulk_create([
+            Patient(name=f'Patient {i}', email=f'patient{i}@example.com', password=password, phone=f'555{i:04d}')
+            for i in range(cls.PATIENTS)
+        ])
+        cls.medicines = Medicine.objects.bulk_create([
+            Medicine(name=f'{category} medicine {i}', med_type='Tablet', dosage=f'{(i + 1) * 100}mg', category=category)
+            for category, _ in Medicine.CATEGORY_CHOICES
+            for i in range(cls.MEDICINES_PER_CATEGORY)
+        ])
+
+        services = [value for value, _ in Appointment.SERVICE_CHOICES]
+        statuses = [value for value, _ in Appointment.STATUS_CHOICES]
+        appointments = []
+        for p, patient in enumerate(cls.patients):
+            for i in range(cls.APPOINTMENTS_PER_PATIENT):
+                appointments.append(Appointment(
+                    patient=patient,
+                    doctor=cls.doctors[p % cls.DOCTORS],
+                    service=services[(p + i) % len(services)],
+                    date=date(2026, 1, 1) + timedelta(days=p + i * 7),
+                    time=time(9 + i % 8),
+                    status=statuses[(p + i) % len(statuses)],
+                ))
+        cls.appointments = Appointment.objects.bulk_create(appointments)
+        Prescription.objects.bulk_create([
+            Prescription(appointment=apt, medicine=cls.medicines[(apt.id + k) % len(cls.medicines)])
+            for apt in cls.appointments if apt.status == 'Completed'
+            for k in range(2)
+        ])
+
+        cls.doctor = cls.doctors[0]
+        cls.patient = cls.patients[0]
+
+    def setUp(self):
+        # The dashboards cache fragments; every test should pay for a cold render
+        cache.clear()
+
+    def login_doctor(self, doctor=None):
+        doctor = doctor or self.doctor
+        session = self.client.session
+        session.update({'doctor_id': doctor.id, 'doctor_name': doctor.name, 'user_type': 'doctor'})
+        session.save()
+        return doctor
+
+    def login_patient(self, patient=None):
+        patient = patient or self.patient
+        session = self.client.session
+        session.update({'patient_id': patient.id, 'patient_name': patient.name, 'user_type': 'patient'})
+        session.save()
+        return patient
+
+    @contextmanager
+    def assertMaxQueries(self, budget):
+        """Fail, listing the SQL, if the block runs more than ``budget`` queries."""
+        with CaptureQueriesContext(connection) as context:
+            yield context
+        executed = len(context.captured_queries)
+        if executed > budget:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}' for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f'{executed} queries executed, budget is {budget}:\n{queries}')
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import tempfile
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.db import connection, connections, models, transaction
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+
+from doctors.models import Doctor
+from medicines.models import Appointment, Medicine
+from patients.models import Patient
+
+from . import health, metrics, soft_delete, warmup
+from .assets import minify_css, minify_js
+from .middleware import MetricsMiddleware, QueryTimer, SlowQueryMiddleware
+from .slow_queries import SlowQueryRecorder, explain
+from .testing import QueryBudgetTestCase
+
+
+class HealthCheckTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        health.reset()
+        self.addCleanup(health.reset)
+
+    def test_liveness(self):
+        with self.assertMaxQueries(0):
+            response = self.client.get('/healthz')
+        self.assertEqual(response.json(), {'status': 'ok'})
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_readiness_is_cached(self):
+        response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['checks']), {'database', 'migrations', 'cache'})
+        with self.assertMaxQueries(0):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(HEALTH_CHECK_CACHE_SECONDS=0)
+    def test_readiness_after_migrations_checked_once(self):
+        self.client.get('/readyz')
+        with self.assertMaxQueries(1):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.json()['checks']['migrations']['pending'], 0)
+
+    def test_readiness_failure(self):
+        with mock.patch.dict(health.CHECKS, {'cache': lambda: {'ok': False}}):
+            response = self.client.get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['status'], 'fail')
+        self.assertFalse(response.json()['checks']['cache']['ok'])
+
+
+class SlowQueryExplainTests(QueryBudgetTestCase):
+    def test_explain_is_invisible_to_wrappers_and_the_transaction(self):
+        timer = QueryTimer()
+        with transaction.atomic(), connection.execute_wrapper(timer):
+            plan = explain('SELECT id FROM patients_patient WHERE id = %s', [1], connection)
+            failed = explain('SELECT missing FROM patients_patient', None, connection)
+            # The transaction is still usable after the failed EXPLAIN
+            self.assertTrue(Patient.objects.filter(id=self.patient.id).exists())
+        self.assertTrue(plan)
+        self.assertTrue(failed[0].startswith('EXPLAIN failed'))
+        self.assertEqual(timer.count, 1)
+
+
+async def count_medicines(request):
+    try:
+        await Medicine.objects.acount()
+        await Medicine.objects.acount()
+        return JsonResponse({})
+    finally:
+        # The worker thread keeps its connection otherwise
+        await sync_to_async(connections.close_all)()
+
+
+class AsyncQueryWrapperTests(TransactionTestCase):
+    """Run the middleware on a real event loop, as under ASGI, not through async_to_sync."""
+
+    def run_async(self, middleware):
+        return asyncio.run(middleware(count_medicines)(RequestFactory().get('/')))
+
+    def test_metrics_count_worker_thread_queries(self):
+        with mock.patch.object(metrics, 'record') as record:
+            self.run_async(MetricsMiddleware)
+        self.assertEqual(record.call_args.kwargs['queries'], 2)
+
+    @override_settings(SLOW_QUERY_LOG_ENABLED=True, SLOW_QUERY_SAMPLE_RATE=1, SLOW_QUERY_THRESHOLD_MS=0)
+    def test_slow_query_log_sees_worker_thread_queries(self):
+        with mock.patch.object(SlowQueryRecorder, 'log') as log:
+            self.run_async(SlowQueryMiddleware)
+        self.assertEqual(log.call_count, 2)
+
+
+class MinifyTests(SimpleTestCase):
+    def test_js_keeps_code_after_block_comment(self):
+        source = '/* note */ start();\nnext();\n/* whole\n   lines */\n    // gone\nend(); // kept\n'
+        self.assertEqual(minify_js(source), '/* note */ start();\nnext();\nend(); // kept')
+
+    def test_css_leaves_strings_alone(self):
+        source = 'a::after { content: "a:  b; }" ; margin: 0/* gap */auto; }\n'
+        self.assertEqual(minify_css(source), 'a::after{content:"a:  b; }";margin:0 auto}')
+
+    def test_css_keeps_space_before_descendant_pseudo_class(self):
+        source = 'nav a :hover,\n[title="x"] :first-child {\n  color: red;\n}\n'
+        self.assertEqual(minify_css(source), 'nav a :hover,[title="x"] :first-child{color:red}')
+
+
+class WarmUpTests(SimpleTestCase):
+    def test_compiles_every_project_template_without_queries(self):
+        # SimpleTestCase fails on any database query
+        counts = warmup.warm_up()
+        self.assertEqual(counts['templates'], len(list(warmup.template_names())))
+        self.assertIn('doctors/dashboard.html', warmup.template_names())
+
+
+class MetricsRetireTests(SimpleTestCase):
+    def test_retired_worker_counts_are_kept(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_DIR=directory):
+            stats = metrics._empty_stats()
+            stats['requests'] = {'GET 2xx': 3}
+            for pid in (101, 102):
+                with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+                    json.dump({'home': stats}, f)
+                metrics.retire(pid)
+
+            self.assertEqual(os.listdir(directory), [metrics.RETIRED_FILE])
+            self.assertEqual(metrics.collect()['home']['requests'], {'GET 2xx': 6})
+
+
+class PurgeRelationsCheckTests(SimpleTestCase):
+    def test_project_relations_pass(self):
+        self.assertEqual(soft_delete.check_purge_relations(), [])
+
+    def test_unhandled_on_delete_is_reported(self):
+        field = Appointment._meta.get_field('doctor')
+        relations = soft_delete._relations
+
+        def protected(model):
+            if model is Doctor:
+                return [(Appointment, field, models.PROTECT)]
+            return relations(model)
+
+        with mock.patch('hospital_management.soft_delete._relations', protected):
+            errors = soft_delete.check_purge_relations()
+        self.assertEqual([(error.id, error.obj) for error in errors], [('hospital_management.E001', field)])
@@ -2,6 +2,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.shortcuts import render
 
+from .views import metrics_view
+
 
 def home(request):
     return render(request, 'home.html')
@@ -13,4 +15,7 @@ urlpatterns = [
     path('patient/', include('patients.urls')),
     path('doctor/', include('doctors.urls')),
     path('medicines/', include('medicines.urls')),
+    path('api/v1/', include('api.urls')),
+    path('analytics/', include('analytics.urls')),
+    path('metrics/', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,21 @@
+import secrets
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_http_methods
+
+from . import metrics
+
+
+@require_http_methods(["GET"])
+def metrics_view(request):
+    """Prometheus scrape endpoint; needs METRICS_TOKEN as a bearer token or a staff login."""
+    auth = request.headers.get('Authorization', '')
+    token_ok = bool(settings.METRICS_TOKEN) and secrets.compare_digest(auth, f'Bearer {settings.METRICS_TOKEN}')
+    if not (token_ok or request.user.is_staff):
+        return HttpResponseForbidden('Forbidden')
+
+    return HttpResponse(
+        metrics.render(metrics.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,73 @@
+"""Start-up work that would otherwise land on each worker's first requests.
+
+gunicorn.conf.py calls ``warm_up`` once in the master after ``preload_app``
+has loaded Django, so the imported modules and compiled templates are shared
+with every forked worker. Warm-up covers imports and templates only: database
+connections are per thread and each request thread opens its own.
+"""
+import logging
+import os
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+# Modules Django would otherwise import lazily on the first request that needs them
+APP_MODULES = ('models', 'forms', 'views', 'urls', 'admin')
+
+
+def import_apps():
+    """Import every app's request-time modules and the whole URLconf."""
+    imported = 0
+    for app_config in apps.get_app_configs():
+        for module in APP_MODULES:
+            name = f'{app_config.name}.{module}'
+            try:
+                import_module(name)
+            except ModuleNotFoundError as e:
+                if e.name != name:
+                    raise
+                continue
+            imported += 1
+    # Resolving the URL patterns imports every included urls module and its views
+    get_resolver().url_patterns
+    return imported
+
+
+def template_names():
+    """Names of every template under the project's template DIRS."""
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    yield os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+
+
+def compile_templates():
+    """Parse every project template into the cached template loader.
+
+    A template that does not compile is logged and skipped; it would fail
+    the same way when rendered, which should not stop the server starting.
+    """
+    engine = engines['django']
+    compiled = 0
+    for name in template_names():
+        try:
+            engine.get_template(name)
+        except TemplateSyntaxError as e:
+            logger.warning('Warm-up could not compile %s: %s', name, e)
+            continue
+        compiled += 1
+    return compiled
+
+
+def warm_up():
+    counts = {'modules': import_apps(), 'templates': compile_templates()}
+    # Nothing above should touch the database, but a connection must never be inherited by a fork
+    connections.close_all()
+    return counts
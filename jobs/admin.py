@@ -0,0 +1,39 @@
+from django.contrib import admin, messages
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'task', 'status', 'attempts', 'max_attempts', 'run_after', 'finished_at')
+    list_filter = ('status', 'task')
+    search_fields = ('task',)
+    readonly_fields = ('created_at', 'finished_at', 'locked_by', 'locked_at', 'last_error')
+    actions = ['retry_now']
+
+    @admin.action(description='Retry selected jobs now')
+    def retry_now(self, request, queryset):
+        retryable = queryset.exclude(status='Running')
+        # A deduplicated job may only be queued once (job_unique_queued_dedupe_key): skip it when
+        # a copy is already queued, or when a lower-numbered copy is selected too
+        twins = Job.objects.filter(task=OuterRef('task'), dedupe_key=OuterRef('dedupe_key')).exclude(dedupe_key='')
+        retry = retryable.exclude(
+            Exists(twins.filter(status='Queued').exclude(id=OuterRef('id')))
+            | Exists(twins.filter(id__in=retryable.values('id'), id__lt=OuterRef('id')))
+        )
+        try:
+            with transaction.atomic():
+                updated = retry.update(
+                    status='Queued', attempts=0, run_after=timezone.now(), finished_at=None, last_error='',
+                )
+        except IntegrityError:
+            # enqueue_once() queued a copy after the check above
+            self.message_user(request, 'A selected job was queued meanwhile; nothing was changed, try again.', messages.ERROR)
+            return
+        skipped = retryable.count() - updated
+        if skipped:
+            self.message_user(request, f'{skipped} jobs skipped: the same task and payload is already queued.', messages.WARNING)
+        self.message_user(request, f'{updated} jobs queued.')
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "jobs"
+
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+        # Registers every app's tasks.py with the task registry
+        autodiscover_modules('tasks')
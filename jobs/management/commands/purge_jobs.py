@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Delete succeeded jobs that finished more than --days ago, in small batches. Failed jobs are kept.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--batch-size', type=int, default=1000, help='Jobs deleted per statement.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        finished = Job.objects.filter(status='Succeeded', finished_at__lt=cutoff).order_by('id')
+
+        deleted = 0
+        while True:
+            ids = list(finished.values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            Job.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} finished jobs.'))
@@ -0,0 +1,86 @@
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from jobs.queue import claim, requeue_stale, run
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs: claim due jobs, run them, retry failures with backoff.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.JOBS_CONCURRENCY, help='Jobs run at the same time (threads).')
+        parser.add_argument('--poll-interval', type=float, default=settings.JOBS_POLL_INTERVAL, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit as soon as no job is due, instead of polling.')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        self.lock = threading.Lock()
+        self.counts = {'Succeeded': 0, 'Retrying': 0, 'Failed': 0, 'Lost': 0}
+        if threading.current_thread() is threading.main_thread():
+            # Finish the jobs in hand on SIGTERM (deploys) or Ctrl+C, then exit
+            signal.signal(signal.SIGTERM, lambda *_: self.stopping.set())
+            signal.signal(signal.SIGINT, lambda *_: self.stopping.set())
+
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f'Returned {requeued} stale jobs to the queue.')
+
+        self.stdout.write(f"Running jobs with {options['concurrency']} threads.")
+        if options['concurrency'] == 1:
+            self.work(0, options)
+        else:
+            threads = [
+                threading.Thread(target=self.work, args=(i, options), name=f'jobs-{i}', daemon=True)
+                for i in range(options['concurrency'])
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{self.counts['Succeeded']} jobs succeeded, {self.counts['Retrying']} will retry, {self.counts['Failed']} failed."
+        ))
+
+    def work(self, index, options):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}:{index}'
+        last_requeue = time.monotonic()
+        try:
+            while not self.stopping.is_set():
+                try:
+                    # Like a request would, drop a connection the database closed or one past CONN_MAX_AGE
+                    close_old_connections()
+                    if index == 0 and time.monotonic() - last_requeue >= settings.JOBS_LOCK_TIMEOUT / 2:
+                        # Catches jobs left running by a worker that crashed after this one started
+                        requeue_stale()
+                        last_requeue = time.monotonic()
+                    # One at a time: a claimed job waiting behind others could outlive JOBS_LOCK_TIMEOUT
+                    # and be handed to a second worker while still in this one's hands
+                    jobs = claim(worker_id, 1)
+                    for job in jobs:
+                        outcome = run(job)
+                        with self.lock:
+                            self.counts[outcome] += 1
+                        if outcome == 'Lost':
+                            self.stderr.write(f'{job.task} #{job.id}: ran past JOBS_LOCK_TIMEOUT and was requeued meanwhile')
+                        elif outcome != 'Succeeded':
+                            self.stderr.write(f'{job.task} #{job.id}: {outcome.lower()} after attempt {job.attempts}')
+                except Exception as e:
+                    # A database restart or a failed failover must not end the worker thread
+                    self.stderr.write(f'Worker {worker_id}: {e!r}; retrying in {options["poll_interval"]}s')
+                    close_old_connections()
+                    self.stopping.wait(options['poll_interval'])
+                    continue
+                if not jobs:
+                    if options['once']:
+                        break
+                    self.stopping.wait(options['poll_interval'])
+        finally:
+            connections.close_all()
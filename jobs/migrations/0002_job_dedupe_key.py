@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="dedupe_key",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name="job",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("status", "Queued"), models.Q(("dedupe_key", ""), _negated=True)
+                ),
+                fields=("task", "dedupe_key"),
+                name="job_unique_queued_dedupe_key",
+            ),
+        ),
+    ]
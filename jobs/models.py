@@ -0,0 +1,43 @@
+from django.db import models
+
+
+class Job(models.Model):
+    """One queued call of a registered task; see jobs.queue."""
+    STATUS_CHOICES = [
+        ('Queued', 'Queued'),
+        ('Running', 'Running'),
+        ('Succeeded', 'Succeeded'),
+        ('Failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField()
+    # Not picked up before this time; pushed back after each failed attempt
+    run_after = models.DateTimeField()
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    # Set by Task.enqueue_once: at most one queued job per task and key
+    dedupe_key = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.task} #{self.id} ({self.status})"
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            # Workers only ever look for due jobs of one status
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['task', 'dedupe_key'],
+                condition=models.Q(status='Queued') & ~models.Q(dedupe_key=''),
+                name='job_unique_queued_dedupe_key',
+            ),
+        ]
@@ -0,0 +1,156 @@
+"""A small job queue stored in the database.
+
+Decorate a function in an app's ``tasks.py`` with ``@task()`` and call
+``func.enqueue(**payload)`` from a view. The job row is written when the
+surrounding transaction commits (immediately outside one), so a rolled-back
+request never leaves a job behind and a worker never sees a job before the
+rows it refers to. ``python manage.py run_jobs`` claims due jobs one at a
+time, runs them and retries failures with exponential backoff.
+"""
+import hashlib
+import json
+import random
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+registry = {}
+
+
+class Task:
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, **payload):
+        return self.func(**payload)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+    def queued(self):
+        """Jobs of this task waiting to run."""
+        return Job.objects.filter(task=self.name, status='Queued')
+
+    def enqueue(self, delay=0, **payload):
+        """Queue a call with keyword arguments ``payload``, once the current transaction commits."""
+        return self._enqueue(delay, payload, dedupe=False)
+
+    def enqueue_once(self, delay=0, **payload):
+        """Like ``enqueue``, but skipped if the same call is already queued.
+
+        The check is a unique constraint on queued jobs, so it also holds for
+        calls made earlier in the same transaction and for concurrent requests.
+        Once a worker has claimed the job, the next call queues a new one.
+        """
+        return self._enqueue(delay, payload, dedupe=True)
+
+    def _enqueue(self, delay, payload, dedupe):
+        # Fail in the request, not in the on_commit callback, if the payload cannot be stored
+        serialized = json.dumps(payload, sort_keys=True)
+        job = Job(
+            task=self.name,
+            payload=payload,
+            max_attempts=self.max_attempts or settings.JOBS_MAX_ATTEMPTS,
+            dedupe_key=hashlib.sha256(serialized.encode()).hexdigest() if dedupe else '',
+        )
+
+        def create():
+            job.run_after = timezone.now() + timedelta(seconds=delay)
+            if not dedupe:
+                job.save()
+                return
+            try:
+                with transaction.atomic():
+                    job.save()
+            except IntegrityError:
+                pass
+
+        transaction.on_commit(create)
+        return job
+
+
+def task(name=None, max_attempts=None):
+    """Register a function as a task; its arguments must be JSON-serializable keywords."""
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = Task(func, task_name, max_attempts)
+        return registry[task_name]
+    return register
+
+
+def backoff(attempts):
+    """Seconds before retry number ``attempts``: doubling from JOBS_RETRY_BACKOFF, capped, with jitter."""
+    delay = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOBS_RETRY_BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(worker_id, limit):
+    """Mark up to ``limit`` due jobs as running for this worker and return them.
+
+    PostgreSQL (and MySQL) lock the chosen rows with SELECT ... FOR UPDATE SKIP
+    LOCKED, so concurrent workers pass over each other's rows instead of
+    waiting. SQLite has no row locks but runs one write at a time, so a single
+    conditional UPDATE claims the rows atomically there.
+    """
+    now = timezone.now()
+    due = Job.objects.filter(status='Queued', run_after__lte=now).order_by('run_after', 'id')
+    claimed = {'status': 'Running', 'locked_by': worker_id, 'locked_at': now, 'attempts': F('attempts') + 1}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(id__in=ids).update(**claimed)
+        return list(Job.objects.filter(id__in=ids))
+
+    Job.objects.filter(id__in=due.values('id')[:limit], status='Queued').update(**claimed)
+    return list(Job.objects.filter(status='Running', locked_by=worker_id, locked_at=now))
+
+
+def run(job):
+    """Run one claimed job and record whether it succeeded, will retry or has failed.
+
+    The outcome is only written while ``job`` is still locked by the worker
+    that claimed it. If the job outlived JOBS_LOCK_TIMEOUT and was handed to
+    another worker meanwhile, its row is left alone and 'Lost' is returned.
+    """
+    mine = Job.objects.filter(id=job.id, status='Running', locked_by=job.locked_by)
+    try:
+        if job.task not in registry:
+            raise LookupError(f'No task registered as {job.task}')
+        registry[job.task](**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            updated = mine.update(
+                status='Failed', finished_at=timezone.now(), locked_by='', locked_at=None, last_error=error,
+            )
+            return 'Failed' if updated else 'Lost'
+        # A newer copy of an enqueue_once job may be queued already; this retry does not replace it
+        updated = mine.update(
+            status='Queued', run_after=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+            locked_by='', locked_at=None, last_error=error, dedupe_key='',
+        )
+        return 'Retrying' if updated else 'Lost'
+
+    updated = mine.update(status='Succeeded', finished_at=timezone.now(), locked_by='', locked_at=None)
+    return 'Succeeded' if updated else 'Lost'
+
+
+def requeue_stale():
+    """Give jobs whose worker died mid-run (locked longer than JOBS_LOCK_TIMEOUT) back to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    stale = Job.objects.filter(status='Running', locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='Failed', finished_at=timezone.now(), locked_by='', locked_at=None,
+        last_error='Worker stopped responding',
+    )
+    requeued = stale.update(status='Queued', run_after=timezone.now(), locked_by='', locked_at=None, dedupe_key='')
+    return requeued + failed
@@ -0,0 +1,150 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from hospital_management.testing import QueryBudgetTestCase
+from medicines.models import ConfirmationCode
+from medicines.tasks import send_confirmation_code
+
+from .models import Job
+from .queue import claim, requeue_stale, run, task
+
+
+@task(max_attempts=2)
+def always_fails():
+    raise RuntimeError('mail server down')
+
+
+@task()
+def does_nothing(**kwargs):
+    pass
+
+
+@override_settings(JOBS_RETRY_BACKOFF=10, JOBS_RETRY_BACKOFF_MAX=60)
+class JobQueueTests(QueryBudgetTestCase):
+    def enqueue(self, job_task, **payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            job_task.enqueue(**payload)
+        return Job.objects.latest('id')
+
+    def test_enqueue_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            does_nothing.enqueue(value=1)
+        self.assertFalse(Job.objects.exists())
+        callbacks[0]()
+        self.assertEqual(Job.objects.get().payload, {'value': 1})
+
+    def test_claim_and_run(self):
+        for i in range(20):
+            self.enqueue(does_nothing, value=i)
+        with self.assertMaxQueries(2):
+            jobs = claim('worker-1', limit=15)
+        self.assertEqual(len(jobs), 15)
+        self.assertEqual(claim('worker-2', limit=15)[0].locked_by, 'worker-2')
+        self.assertEqual(claim('worker-3', limit=15), [])
+
+        self.assertEqual(run(jobs[0]), 'Succeeded')
+        self.assertEqual(Job.objects.get(id=jobs[0].id).status, 'Succeeded')
+
+    def test_requeued_job_outcome_is_not_overwritten(self):
+        job = self.enqueue(does_nothing)
+        job = claim('worker-1', limit=1)[0]
+        # worker-1 ran past the lock timeout; the job was requeued and claimed again
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(hours=1))
+        requeue_stale()
+        claim('worker-2', limit=1)
+
+        self.assertEqual(run(job), 'Lost')
+        self.assertEqual(Job.objects.get(id=job.id).locked_by, 'worker-2')
+
+    def test_retry_with_backoff_then_fail(self):
+        job = self.enqueue(always_fails)
+        job = claim('worker-1', limit=1)[0]
+        self.assertEqual(run(job), 'Retrying')
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'Queued')
+        self.assertGreaterEqual(job.run_after, timezone.now() + timedelta(seconds=4))
+        self.assertIn('mail server down', job.last_error)
+
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        self.assertEqual(run(claim('worker-1', limit=1)[0]), 'Failed')
+        self.assertEqual(Job.objects.get(id=job.id).attempts, 2)
+
+    def test_stale_jobs_are_requeued(self):
+        self.enqueue(does_nothing)
+        job = claim('worker-1', limit=1)[0]
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(Job.objects.get(id=job.id).status, 'Queued')
+
+    def test_run_jobs_sends_confirmation_code(self):
+        appointment = self.patient.appointments.first()
+        code = ConfirmationCode.objects.create(patient=self.patient, appointment=appointment)
+        self.enqueue(send_confirmation_code, confirmation_code_id=code.id)
+
+        call_command('run_jobs', once=True, concurrency=1, stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(Job.objects.get().status, 'Succeeded')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn(code.code, mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].to, [self.patient.email])
+
+    def test_run_jobs_survives_a_failed_claim(self):
+        job = self.enqueue(does_nothing)
+        outages = [OperationalError('database is locked')]
+
+        def flaky_claim(worker_id, limit):
+            if outages:
+                raise outages.pop()
+            return claim(worker_id, limit)
+
+        stderr = StringIO()
+        with mock.patch('jobs.management.commands.run_jobs.claim', flaky_claim):
+            call_command('run_jobs', once=True, concurrency=1, poll_interval=0, stdout=StringIO(), stderr=stderr)
+
+        self.assertEqual(Job.objects.get(id=job.id).status, 'Succeeded')
+        self.assertIn('database is locked', stderr.getvalue())
+
+
+class JobAdminTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+
+    def job(self, status, dedupe_key='k'):
+        return Job.objects.create(
+            task='jobs.tests.does_nothing', status=status, dedupe_key=dedupe_key, max_attempts=5, run_after=timezone.now(),
+        )
+
+    def retry(self, *jobs):
+        return self.client.post(reverse('admin:jobs_job_changelist'), {
+            'action': 'retry_now', '_selected_action': [job.id for job in jobs],
+        }, follow=True)
+
+    def test_retry_skips_jobs_already_queued(self):
+        self.job('Queued')
+        failed = self.job('Failed')
+        other = self.job('Failed', dedupe_key='')
+
+        response = self.retry(failed, other)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '1 jobs skipped')
+        self.assertEqual(Job.objects.get(id=failed.id).status, 'Failed')
+        self.assertEqual(Job.objects.get(id=other.id).status, 'Queued')
+
+    def test_retry_queues_one_of_several_copies(self):
+        first, second = self.job('Failed'), self.job('Failed')
+
+        self.retry(first, second)
+
+        self.assertEqual(Job.objects.get(id=first.id).status, 'Queued')
+        self.assertEqual(Job.objects.get(id=second.id).status, 'Failed')
@@ -1,4 +1,11 @@
 from django.contrib import admin
+from django.db.models import Q
+from django.utils import timezone
+
+from doctors.models import Doctor
+from hospital_management.admin import ScalableModelAdmin
+from patients.models import Patient
+
 from .models import Medicine, Appointment
 
 @admin.register(Medicine)
@@ -7,7 +14,45 @@ class MedicineAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 @admin.register(Appointment)
-class AppointmentAdmin(admin.ModelAdmin):
-    list_display = ('patient', 'doctor', 'service', 'date', 'time', 'status')
-    list_filter = ('status', 'service', 'date')
-    search_fields = ('patient__name', 'doctor__name')
+class AppointmentAdmin(ScalableModelAdmin):
+    list_display = ('id', 'patient', 'doctor', 'service', 'date', 'time', 'status')
+    list_select_related = ('patient', 'doctor')
+    list_filter = ('status', 'service')
+    # Drill-down and ordering use the (date, time, id) index
+    date_hierarchy = 'date'
+    # Shows the search box; get_search_results does the searching
+    search_fields = ('=id', '=patient__email', '=doctor__email')
+    search_help_text = 'Appointment number, or the exact email of the patient or doctor.'
+    autocomplete_fields = ('patient', 'doctor', 'suggested_medicines')
+    actions = ['mark_approved', 'mark_completed', 'mark_cancelled']
+
+    def get_search_results(self, request, queryset, search_term):
+        """Only indexed lookups: name searches across the joins would scan every appointment."""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        if term.isdigit():
+            return queryset.filter(id=int(term)), False
+        # Resolve the email on its unique index first, then use the foreign key indexes
+        return queryset.filter(
+            Q(patient__in=Patient.objects.filter(email=term).values('id'))
+            | Q(doctor__in=Doctor.objects.filter(email=term).values('id'))
+        ), False
+
+    def set_status(self, request, queryset, status):
+        """One UPDATE for the whole selection. Patients are not emailed about admin corrections."""
+        # update() skips auto_now, and the analytics refresh finds changes by updated_at
+        updated = queryset.update(status=status, updated_at=timezone.now())
+        self.message_user(request, f'{updated} appointments marked as {status}.')
+
+    @admin.action(description='Mark selected appointments as Approved')
+    def mark_approved(self, request, queryset):
+        self.set_status(request, queryset, 'Approved')
+
+    @admin.action(description='Mark selected appointments as Completed')
+    def mark_completed(self, request, queryset):
+        self.set_status(request, queryset, 'Completed')
+
+    @admin.action(description='Mark selected appointments as Cancelled')
+    def mark_cancelled(self, request, queryset):
+        self.set_status(request, queryset, 'Cancelled')
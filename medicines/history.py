@@ -0,0 +1,59 @@
+from django.db.models import IntegerField, Q, Value
+
+from .models import Appointment, ArchivedAppointment
+
+LIVE, ARCHIVED = 0, 1
+ORDER = ('-date', '-time', '-id')
+
+
+def with_details(queryset):
+    return queryset.select_related('doctor').prefetch_related('prescriptions__medicine')
+
+
+def patient_history_page(patient, page, per_page):
+    """Return one page of a patient's appointments, newest first.
+
+    Live appointments newer than the patient's newest archived one come
+    first and are paged from the live table alone; finding that boundary is
+    a single-row lookup in the archive. Only a page that reaches past them
+    merges the older live rows (say an old appointment still Pending) with
+    the archive by (date, time).
+    Returns a ``(appointments, has_next)`` tuple.
+    """
+    offset = (page - 1) * per_page
+    live = Appointment.objects.filter(patient=patient)
+    archived = ArchivedAppointment.objects.filter(patient=patient)
+
+    boundary = archived.order_by('-date', '-time').values_list('date', 'time').first()
+    if boundary is None:
+        rows = list(with_details(live.order_by(*ORDER))[offset:offset + per_page + 1])
+        return rows[:per_page], len(rows) > per_page
+
+    newer = Q(date__gt=boundary[0]) | Q(date=boundary[0], time__gt=boundary[1])
+    recent = live.filter(newer)
+    rows = list(with_details(recent.order_by(*ORDER))[offset:offset + per_page + 1])
+    if len(rows) > per_page:
+        return rows[:per_page], True
+
+    recent_count = offset + len(rows) if rows else recent.count()
+    older, has_next = merged_page(live.exclude(newer), archived, max(0, offset - recent_count), per_page - len(rows))
+    return rows + older, has_next
+
+
+def merged_page(live, archived, offset, limit):
+    """``limit`` rows from ``offset`` of live and archived rows merged by (date, time, id)."""
+    keys = live.order_by().values_list('date', 'time', 'id', Value(LIVE, output_field=IntegerField())).union(
+        archived.order_by().values_list('date', 'time', 'id', Value(ARCHIVED, output_field=IntegerField())),
+        all=True,
+    ).order_by(*ORDER)
+    keys = list(keys[offset:offset + limit + 1])
+    has_next = len(keys) > limit
+    keys = keys[:limit]
+
+    loaded = {}
+    for source, model in ((LIVE, Appointment), (ARCHIVED, ArchivedAppointment)):
+        ids = [key[2] for key in keys if key[3] == source]
+        if ids:
+            loaded.update(((source, row.id), row) for row in with_details(model.objects.filter(id__in=ids)))
+    # A row archive_appointments moved between the two queries is skipped on this page
+    return [loaded[key[3], key[2]] for key in keys if (key[3], key[2]) in loaded], has_next
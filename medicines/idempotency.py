@@ -0,0 +1,151 @@
+import hashlib
+from datetime import timedelta
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_FIELD = 'idempotency_key'
+IGNORED_FIELDS = {IDEMPOTENCY_FIELD, 'csrfmiddlewaretoken'}
+
+
+def request_fingerprint(request):
+    """Hash of what the request asks for, so a key reused for a different request is caught."""
+    if request.content_type in ('application/x-www-form-urlencoded', 'multipart/form-data'):
+        payload = repr(sorted(
+            (name, request.POST.getlist(name)) for name in request.POST if name not in IGNORED_FIELDS
+        )).encode()
+    else:
+        payload = request.body
+    return hashlib.sha256(payload).hexdigest()
+
+
+def replay(record, request):
+    """Rebuild the stored response, re-flashing any messages it came with."""
+    storage = messages.get_messages(request)
+    # The first attempt's messages may still be waiting to be shown
+    pending = {(m.level, str(m.message)) for m in storage}
+    storage.used = False
+    for level, message, extra_tags in record.messages:
+        if (level, message) not in pending:
+            messages.add_message(request, level, message, extra_tags=extra_tags)
+    response = HttpResponse(bytes(record.body), status=record.status_code, content_type=record.content_type or None)
+    if record.location:
+        response['Location'] = record.location
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def begin(request):
+    """Claim the request's idempotency key.
+
+    Returns ``(record, None)`` when the view should run, ``(None, response)``
+    when the request is answered without it, and ``(None, None)`` when it
+    carries no key.
+    """
+    key = request.headers.get('Idempotency-Key') or request.POST.get(IDEMPOTENCY_FIELD)
+    user_type = request.session.get('user_type')
+    user_id = request.session.get(f'{user_type}_id')
+    if request.method != 'POST' or not key or not user_id:
+        return None, None
+    if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+        return None, JsonResponse({'status': 'error', 'message': 'Idempotency key too long'}, status=400)
+
+    scope = f'{user_type}:{user_id}:{request.path}'
+    fingerprint = request_fingerprint(request)
+    now = timezone.now()
+    # Expired keys, and keys whose first request died before finishing, can be claimed again
+    IdempotencyKey.objects.filter(scope=scope, key=key).filter(
+        Q(expires_at__lte=now)
+        | Q(status_code__isnull=True, created_at__lte=now - timedelta(seconds=settings.IDEMPOTENCY_KEY_LEASE))
+    ).delete()
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(scope=scope, key=key, request_hash=fingerprint), None
+    except IntegrityError:
+        record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+        if record is None or record.status_code is None:
+            return None, JsonResponse({'status': 'error', 'message': 'A request with this key is still in progress'}, status=409)
+        if record.request_hash != fingerprint:
+            return None, JsonResponse({'status': 'error', 'message': 'Idempotency key was used for a different request'}, status=422)
+        return None, replay(record, request)
+
+
+def finish(record, request, response, queued_before):
+    """Store the view's response under the claimed key, or release the key."""
+    if response is None or response.status_code >= 500 or response.streaming:
+        # Let the client retry failures instead of replaying them
+        record.delete()
+        return
+
+    # Iterating marks the storage as used; reset it so the messages are still shown
+    storage = messages.get_messages(request)
+    flashed = list(storage)[queued_before:]
+    storage.used = False
+    # A no-op if the lease ran out and a retry has reclaimed the key meanwhile
+    IdempotencyKey.objects.filter(pk=record.pk, status_code__isnull=True).update(
+        status_code=response.status_code,
+        content_type=response.get('Content-Type', ''),
+        location=response.get('Location', ''),
+        body=response.content,
+        messages=[[m.level, str(m.message), m.extra_tags] for m in flashed],
+    )
+
+
+def queued_messages(request):
+    return len(messages.get_messages(request))
+
+
+def idempotent(view):
+    """Make a POST view safe to retry.
+
+    When the request carries an ``Idempotency-Key`` header or ``idempotency_key``
+    form field, the first response for that key (per logged-in user and path) is
+    stored for ``IDEMPOTENCY_KEY_TTL`` seconds and replayed to any retry. A retry
+    that arrives while the first request is still running gets a 409, unless that
+    request started more than ``IDEMPOTENCY_KEY_LEASE`` seconds ago. Requests
+    without a key, or from anonymous users, run normally. Works on async views
+    too; the key bookkeeping then runs in a worker thread.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            record, response = await sync_to_async(begin)(request)
+            if response is not None:
+                return response
+            if record is None:
+                return await view(request, *args, **kwargs)
+
+            queued_before = await sync_to_async(queued_messages)(request)
+            response = None
+            try:
+                response = await view(request, *args, **kwargs)
+            finally:
+                await sync_to_async(finish)(record, request, response, queued_before)
+            return response
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        record, response = begin(request)
+        if response is not None:
+            return response
+        if record is None:
+            return view(request, *args, **kwargs)
+
+        queued_before = queued_messages(request)
+        response = None
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            finish(record, request, response, queued_before)
+        return response
+    return wrapper
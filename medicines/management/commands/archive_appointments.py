@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from medicines.models import Appointment, ArchivedAppointment, ArchivedPrescription, Prescription
+
+
+APPOINTMENT_FIELDS = ('id', 'patient_id', 'doctor_id', 'service', 'date', 'time', 'notes', 'status', 'created_at')
+PRESCRIPTION_FIELDS = ('appointment_id', 'medicine_id', 'frequency', 'duration', 'instructions', 'prescribed_at')
+
+
+class Command(BaseCommand):
+    help = 'Move old Completed/Cancelled appointments and their prescriptions into the archive tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.APPOINTMENT_ARCHIVE_AFTER_DAYS,
+            help='Archive appointments dated more than this many days ago.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Appointments moved per transaction.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many appointments would be archived.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.localdate() - timedelta(days=options['days'])
+        candidates = Appointment.objects.filter(
+            status__in=Appointment.ARCHIVABLE_STATUSES, date__lt=cutoff,
+        ).order_by('id')
+
+        if options['dry_run']:
+            self.stdout.write(f'{candidates.count()} appointments dated before {cutoff} would be archived.')
+            return
+
+        moved_appointments = moved_prescriptions = 0
+        while True:
+            with transaction.atomic():
+                batch = list(candidates.values(*APPOINTMENT_FIELDS)[:options['batch_size']])
+                if not batch:
+                    break
+                ids = [row['id'] for row in batch]
+                prescriptions = list(Prescription.objects.filter(appointment_id__in=ids).values(*PRESCRIPTION_FIELDS))
+                suggested = list(Appointment.suggested_medicines.through.objects.filter(
+                    appointment_id__in=ids,
+                ).values_list('appointment_id', 'medicine_id'))
+
+                ArchivedAppointment.objects.bulk_create([ArchivedAppointment(**row) for row in batch])
+                ArchivedPrescription.objects.bulk_create([ArchivedPrescription(**row) for row in prescriptions])
+                # The delete below cascades to the live through rows, so copy them first
+                ArchivedAppointment.suggested_medicines.through.objects.bulk_create([
+                    ArchivedAppointment.suggested_medicines.through(archivedappointment_id=appointment_id, medicine_id=medicine_id)
+                    for appointment_id, medicine_id in suggested
+                ])
+                Appointment.objects.filter(id__in=ids).delete()
+
+            moved_appointments += len(batch)
+            moved_prescriptions += len(prescriptions)
+            self.stdout.write(f'Archived {moved_appointments} appointments so far...')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {moved_appointments} appointments and {moved_prescriptions} prescriptions dated before {cutoff}.'
+        ))
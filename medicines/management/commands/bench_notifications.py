@@ -0,0 +1,101 @@
+import tempfile
+import time
+
+from django.core.mail import send_mail
+from django.core.mail.backends.filebased import EmailBackend as FileBackend
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from medicines.models import Appointment, AppointmentNotification
+from medicines.notifications import STATUS_VERBS, build_message, send_pending
+
+BACKENDS = {'locmem': LocmemBackend, 'file': FileBackend}
+
+
+def slow_backend(base, open_latency):
+    """``base`` with ``open_latency`` seconds added to every open(), like an SMTP handshake.
+
+    As with the SMTP backend, send_messages() opens and closes the connection
+    itself unless it is already open.
+    """
+    class Backend(base):
+        def open(self):
+            if getattr(self, 'opened', False):
+                return False
+            time.sleep(open_latency)
+            self.opened = True
+            super().open()
+            return True
+
+        def close(self):
+            self.opened = False
+            super().close()
+
+        def send_messages(self, messages):
+            created = self.open()
+            try:
+                return super().send_messages(messages)
+            finally:
+                if created:
+                    self.close()
+
+    return Backend
+
+
+class Command(BaseCommand):
+    help = (
+        'Time appointment notifications sent one email and one connection per status change '
+        'against send_pending(), which coalesces per patient and reuses one connection. '
+        'Runs inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--notifications', type=int, default=500, help='Status changes to notify about.')
+        parser.add_argument('--backend', choices=sorted(BACKENDS), default='locmem', help='Email backend to send through.')
+        parser.add_argument(
+            '--open-latency-ms', type=float, default=20,
+            help='Simulated cost of opening a mail connection (an SMTP handshake is typically 20-200ms).',
+        )
+
+    def handle(self, *args, **options):
+        appointments = list(
+            Appointment.objects.select_related('patient', 'doctor').order_by('id')[:options['notifications']]
+        )
+        if not appointments:
+            raise CommandError('No appointments to notify about; run seed_data first.')
+        backend = slow_backend(BACKENDS[options['backend']], options['open_latency_ms'] / 1000)
+        statuses = list(STATUS_VERBS)
+
+        with tempfile.TemporaryDirectory() as directory, transaction.atomic():
+            notifications = AppointmentNotification.objects.bulk_create([
+                AppointmentNotification(patient_id=apt.patient_id, appointment=apt, status=statuses[i % len(statuses)])
+                for i, apt in enumerate(appointments)
+            ])
+            for notification, apt in zip(notifications, appointments):
+                notification.appointment = apt
+
+            started = time.perf_counter()
+            for notification in notifications:
+                message = build_message(notification.appointment.patient, [notification])
+                send_mail(
+                    message.subject, message.body, message.from_email, message.to,
+                    connection=backend(file_path=directory),
+                )
+            naive = time.perf_counter() - started
+
+            started = time.perf_counter()
+            sent = send_pending(backend(file_path=directory))
+            batched = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        count = len(notifications)
+        self.stdout.write(
+            f'one connection per change: {count} emails in {naive:.2f}s ({count / naive:.0f}/s)'
+        )
+        self.stdout.write(
+            f'batched send_pending():    {sent} emails covering {count} changes in {batched:.2f}s '
+            f'({count / batched:.0f} changes/s)'
+        )
+        self.stdout.write(self.style.SUCCESS(f'speed-up: {naive / batched:.1f}x'))
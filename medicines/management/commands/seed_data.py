@@ -0,0 +1,205 @@
+import random
+from datetime import time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from doctors.models import Doctor
+from medicines.models import Appointment, Medicine, Prescription
+from patients.models import Patient
+
+
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+SEED_PASSWORD = 'password123'
+
+FIRST_NAMES = (
+    'Aarav', 'Aisha', 'Arjun', 'Ananya', 'Daniel', 'Divya', 'Emma', 'Farhan', 'Grace', 'Hari',
+    'Isha', 'James', 'Kavya', 'Liam', 'Meera', 'Noah', 'Olivia', 'Priya', 'Rahul', 'Sara',
+    'Tanvi', 'Uma', 'Vikram', 'Wei', 'Yusuf', 'Zara',
+)
+LAST_NAMES = (
+    'Reddy', 'Sharma', 'Khan', 'Patel', 'Iyer', 'Nair', 'Smith', 'Brown', 'Garcia', 'Chen',
+    'Das', 'Gupta', 'Joshi', 'Kumar', 'Menon', 'Rao', 'Singh', 'Velluri', 'Wilson', 'Young',
+)
+MEDICINE_STEMS = ('Cura', 'Medi', 'Viva', 'Neo', 'Zen', 'Pro', 'Opti', 'Sana', 'Vita', 'Thera')
+DOSAGES = ('5mg', '10mg', '50mg', '100mg', '250mg', '500mg', '5ml', '10ml', '1%', '2 puffs')
+
+# The service a patient books with a doctor of each specialization
+SPECIALIZATION_TO_SERVICE = {
+    'General Medicine': 'General Checkup',
+    'Cardiology': 'Cardiology Consultation',
+    'Dermatology': 'Skin Treatment',
+    'Orthopedics': 'Orthopedic Consultation',
+    'Pediatrics': 'Pediatric Care',
+    'Neurology': 'Neurological Assessment',
+    'Ophthalmology': 'Eye Examination',
+    'ENT': 'ENT Consultation',
+    'Dentistry': 'Dental Care',
+    'Psychiatry': 'Mental Health Counseling',
+}
+
+# Status mix for visits that already happened and for upcoming ones
+PAST_STATUSES = (('Completed', 75), ('Cancelled', 15), ('Approved', 5), ('Pending', 5))
+FUTURE_STATUSES = (('Pending', 55), ('Approved', 35), ('Cancelled', 10))
+
+# Half-hour slots from 09:00 to 17:30
+SLOTS = [time(9 + i // 2, 30 * (i % 2)) for i in range(18)]
+
+
+class Command(BaseCommand):
+    help = 'Generate realistic doctors, patients, medicines, appointments and prescriptions for scale testing.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--doctors', type=int, default=50)
+        parser.add_argument('--patients', type=int, default=5000)
+        parser.add_argument('--medicines-per-category', type=int, default=30)
+        parser.add_argument('--appointments', type=int, default=100000)
+        parser.add_argument('--max-prescriptions', type=int, default=4, help='Most medicines on one completed visit.')
+        parser.add_argument('--days-back', type=int, default=730, help='How far into the past appointments go.')
+        parser.add_argument('--days-ahead', type=int, default=60, help='How far into the future appointments go.')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk_create.')
+        parser.add_argument('--clear', action='store_true', help=f'First delete rows created by an earlier run (@{SEED_EMAIL_DOMAIN} accounts).')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        started = timezone.now()
+
+        if options['clear']:
+            self.clear()
+
+        # Hashing is deliberately slow, so every seeded account shares one hash
+        password = make_password(SEED_PASSWORD)
+        doctors = self.create_doctors(options['doctors'], password)
+        patient_ids = self.create_patients(options['patients'], password)
+        medicines_by_category = self.create_medicines(options['medicines_per_category'])
+        appointments, prescriptions = self.create_appointments(options, doctors, patient_ids, medicines_by_category)
+
+        elapsed = (timezone.now() - started).total_seconds()
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(doctors)} doctors, {len(patient_ids)} patients, '
+            f'{sum(len(ids) for ids in medicines_by_category.values())} medicines, {appointments} appointments '
+            f'and {prescriptions} prescriptions in {elapsed:.1f}s. Seeded accounts use the password "{SEED_PASSWORD}".'
+        ))
+
+    def clear(self):
+        seeded = {'email__endswith': f'@{SEED_EMAIL_DOMAIN}'}
+        Appointment.objects.filter(doctor__email__endswith=f'@{SEED_EMAIL_DOMAIN}').delete()
+        Doctor.objects.filter(**seeded).delete()
+        Patient.objects.filter(**seeded).delete()
+        Medicine.objects.filter(description='Generated by seed_data').delete()
+        self.stdout.write('Removed previously seeded data.')
+
+    def person_name(self):
+        return f'{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}'
+
+    def create_doctors(self, count, password):
+        specializations = [value for value, _ in Doctor.SPECIALIZATION_CHOICES]
+        doctors = Doctor.objects.bulk_create([
+            Doctor(
+                name=self.person_name(),
+                email=f'doctor{i}@{SEED_EMAIL_DOMAIN}',
+                password=password,
+                specialization=specializations[i % len(specializations)],
+                experience=self.rng.randint(1, 35),
+            )
+            for i in range(count)
+        ], batch_size=self.batch_size)
+        self.stdout.write(f'{len(doctors)} doctors')
+        return [(doctor.id, doctor.specialization) for doctor in doctors]
+
+    def create_patients(self, count, password):
+        ids = []
+        for start in range(0, count, self.batch_size):
+            batch = Patient.objects.bulk_create([
+                Patient(
+                    name=self.person_name(),
+                    email=f'patient{i}@{SEED_EMAIL_DOMAIN}',
+                    password=password,
+                    phone=f'9{self.rng.randint(100000000, 999999999)}',
+                )
+                for i in range(start, min(start + self.batch_size, count))
+            ])
+            ids.extend(patient.id for patient in batch)
+            self.stdout.write(f'{len(ids)} patients')
+        return ids
+
+    def create_medicines(self, per_category):
+        types = [value for value, _ in Medicine.TYPE_CHOICES]
+        medicines = Medicine.objects.bulk_create([
+            Medicine(
+                name=f'{self.rng.choice(MEDICINE_STEMS)}{category[:4].lower()} {i + 1}',
+                med_type=self.rng.choice(types),
+                dosage=self.rng.choice(DOSAGES),
+                category=category,
+                description='Generated by seed_data',
+            )
+            for category, _ in Medicine.CATEGORY_CHOICES
+            for i in range(per_category)
+        ], batch_size=self.batch_size)
+        by_category = {}
+        for medicine in medicines:
+            by_category.setdefault(medicine.category, []).append(medicine.id)
+        self.stdout.write(f'{len(medicines)} medicines')
+        return by_category
+
+    def create_appointments(self, options, doctors, patient_ids, medicines_by_category):
+        if not doctors or not patient_ids:
+            return 0, 0
+
+        today = timezone.localdate()
+        # A few doctors are much busier than the rest
+        doctor_weights = [1 / (rank + 1) ** 0.5 for rank in range(len(doctors))]
+        past_statuses, past_weights = zip(*PAST_STATUSES)
+        future_statuses, future_weights = zip(*FUTURE_STATUSES)
+        RxMedicine = Appointment.suggested_medicines.through
+
+        total = options['appointments']
+        created = prescribed = 0
+        while created < total:
+            size = min(self.batch_size, total - created)
+            chosen_doctors = self.rng.choices(doctors, weights=doctor_weights, k=size)
+            batch = []
+            for doctor_id, specialization in chosen_doctors:
+                # Visits cluster in the recent past: triangular with its mode at today
+                offset = round(self.rng.triangular(-options['days_back'], options['days_ahead'], 0))
+                if offset < 0:
+                    status = self.rng.choices(past_statuses, weights=past_weights)[0]
+                else:
+                    status = self.rng.choices(future_statuses, weights=future_weights)[0]
+                batch.append(Appointment(
+                    patient_id=self.rng.choice(patient_ids),
+                    doctor_id=doctor_id,
+                    service=SPECIALIZATION_TO_SERVICE[specialization],
+                    date=today + timedelta(days=offset),
+                    time=self.rng.choice(SLOTS),
+                    status=status,
+                ))
+
+            with transaction.atomic():
+                batch = Appointment.objects.bulk_create(batch)
+                prescriptions = []
+                for appointment in batch:
+                    if appointment.status != 'Completed':
+                        continue
+                    candidates = medicines_by_category.get(appointment.get_relevant_category(), ())
+                    count = min(len(candidates), self.rng.randint(1, options['max_prescriptions']))
+                    for medicine_id in self.rng.sample(candidates, count):
+                        prescriptions.append(Prescription(
+                            appointment_id=appointment.id,
+                            medicine_id=medicine_id,
+                            frequency=self.rng.choice(Prescription.FREQUENCY_CHOICES)[0],
+                            duration=self.rng.choice(Prescription.DURATION_CHOICES)[0],
+                        ))
+                Prescription.objects.bulk_create(prescriptions, batch_size=self.batch_size)
+                RxMedicine.objects.bulk_create([
+                    RxMedicine(appointment_id=rx.appointment_id, medicine_id=rx.medicine_id) for rx in prescriptions
+                ], batch_size=self.batch_size)
+
+            created += len(batch)
+            prescribed += len(prescriptions)
+            self.stdout.write(f'{created} appointments, {prescribed} prescriptions')
+        return created, prescribed
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from medicines.reminders import due, send_due, windows
+
+
+class Command(BaseCommand):
+    help = 'Email reminders for Approved appointments starting within each lead time. Run every few minutes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.APPOINTMENT_REMINDER_BATCH_SIZE,
+            help='Reminders sent per batch over one mail connection.',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many reminders are due.')
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            for lead_hours, start, end in windows():
+                self.stdout.write(f'{lead_hours}h: {due(lead_hours, start, end).count()} reminders due')
+            return
+
+        counts = send_due(batch_size=options['batch_size'])
+        summary = ', '.join(f'{count} {lead_hours}h' for lead_hours, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Sent {sum(counts.values())} reminders ({summary}).'))
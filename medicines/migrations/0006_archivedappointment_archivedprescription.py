@@ -0,0 +1,151 @@
+# Generated by Django 5.2.9 on 2026-10-19 09:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0001_initial"),
+        ("medicines", "0005_confirmationcode"),
+        ("patients", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedAppointment",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                (
+                    "service",
+                    models.CharField(
+                        choices=[
+                            ("General Checkup", "General Checkup"),
+                            ("Dental Care", "Dental Care"),
+                            ("Cardiology Consultation", "Cardiology Consultation"),
+                            ("Eye Examination", "Eye Examination"),
+                            ("Skin Treatment", "Skin Treatment"),
+                            ("Orthopedic Consultation", "Orthopedic Consultation"),
+                            ("Pediatric Care", "Pediatric Care"),
+                            ("Neurological Assessment", "Neurological Assessment"),
+                            ("ENT Consultation", "ENT Consultation"),
+                            ("Mental Health Counseling", "Mental Health Counseling"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("time", models.TimeField()),
+                ("notes", models.TextField(blank=True, null=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("Pending", "Pending"),
+                            ("Approved", "Approved"),
+                            ("Completed", "Completed"),
+                            ("Cancelled", "Cancelled"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "doctor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_appointments",
+                        to="doctors.doctor",
+                    ),
+                ),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_appointments",
+                        to="patients.patient",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-date", "-time"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedPrescription",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[
+                            ("Once daily", "Once daily"),
+                            ("Twice daily", "Twice daily (Morning & Night)"),
+                            ("Three times daily", "Three times daily"),
+                            ("Four times daily", "Every 6 hours"),
+                            ("Every 8 hours", "Every 8 hours"),
+                            ("Before meals", "Before meals"),
+                            ("After meals", "After meals"),
+                            ("At bedtime", "At bedtime only"),
+                            ("As needed", "As needed (SOS)"),
+                            ("Once weekly", "Once weekly"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                (
+                    "duration",
+                    models.CharField(
+                        choices=[
+                            ("3 days", "3 days"),
+                            ("5 days", "5 days"),
+                            ("7 days", "1 week"),
+                            ("10 days", "10 days"),
+                            ("14 days", "2 weeks"),
+                            ("21 days", "3 weeks"),
+                            ("30 days", "1 month"),
+                            ("60 days", "2 months"),
+                            ("90 days", "3 months"),
+                            ("Ongoing", "Ongoing"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                (
+                    "instructions",
+                    models.CharField(blank=True, max_length=200, null=True),
+                ),
+                ("prescribed_at", models.DateTimeField()),
+                (
+                    "appointment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="prescriptions",
+                        to="medicines.archivedappointment",
+                    ),
+                ),
+                (
+                    "medicine",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_prescriptions",
+                        to="medicines.medicine",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["medicine__name"],
+                "unique_together": {("appointment", "medicine")},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-19 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medicines", "0006_archivedappointment_archivedprescription"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="medicine",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="prescription",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0002_updated_at"),
+        ("medicines", "0009_appointmentnotification"),
+        ("patients", "0002_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AppointmentReminder",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("lead_hours", models.PositiveSmallIntegerField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["status", "date", "time"], name="appointment_status_date_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="appointmentreminder",
+            name="appointment",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="reminders",
+                to="medicines.appointment",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="appointmentreminder",
+            constraint=models.UniqueConstraint(
+                fields=("appointment", "lead_hours"), name="unique_reminder_per_lead"
+            ),
+        ),
+    ]
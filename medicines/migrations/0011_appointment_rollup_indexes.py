@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0002_updated_at"),
+        ("medicines", "0010_appointmentreminder"),
+        ("patients", "0002_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["date", "service", "doctor", "status"],
+                name="appointment_rollup_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["updated_at"], name="appointment_updated_at_idx"
+            ),
+        ),
+    ]
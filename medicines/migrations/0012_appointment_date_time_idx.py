@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0002_updated_at"),
+        ("medicines", "0011_appointment_rollup_indexes"),
+        ("patients", "0002_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["date", "time", "id"], name="appointment_date_time_idx"
+            ),
+        ),
+    ]
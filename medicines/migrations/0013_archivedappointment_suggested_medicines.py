@@ -0,0 +1,22 @@
+# Generated by Django 5.2.9 on 2026-10-19 10:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medicines", "0012_appointment_date_time_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedappointment",
+            name="suggested_medicines",
+            field=models.ManyToManyField(
+                blank=True,
+                related_name="archived_appointments",
+                to="medicines.medicine",
+            ),
+        ),
+    ]
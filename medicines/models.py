@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from datetime import timedelta
@@ -37,6 +38,7 @@ class Medicine(models.Model):
     category = models.CharField(max_length=30, choices=CATEGORY_CHOICES, default='General', help_text="Medical category")
     description = models.TextField(blank=True, null=True, help_text="Brief description or usage")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.name} ({self.med_type}) - {self.dosage}"
@@ -75,6 +77,7 @@ class Appointment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
     suggested_medicines = models.ManyToManyField(Medicine, blank=True, related_name='appointments')
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     SERVICE_TO_CATEGORY = {
         'General Checkup': 'General',
@@ -89,6 +92,10 @@ class Appointment(models.Model):
         'Mental Health Counseling': 'Psychiatry',
     }
 
+    ARCHIVABLE_STATUSES = ('Completed', 'Cancelled')
+
+    is_archived = False
+
     def get_relevant_category(self):
         return self.SERVICE_TO_CATEGORY.get(self.service, 'General')
 
@@ -97,6 +104,16 @@ class Appointment(models.Model):
 
     class Meta:
         ordering = ['-date', '-time']
+        indexes = [
+            # Range scans over upcoming appointments in one status (reminders, dashboards)
+            models.Index(fields=['status', 'date', 'time'], name='appointment_status_date_idx'),
+            # Newest-first listing (Meta.ordering, plus the id the admin adds) and date-range filters
+            models.Index(fields=['date', 'time', 'id'], name='appointment_date_time_idx'),
+            # Covers the analytics rollup's GROUP BY over a date range
+            models.Index(fields=['date', 'service', 'doctor', 'status'], name='appointment_rollup_idx'),
+            # Finds the appointments changed since the last analytics refresh
+            models.Index(fields=['updated_at'], name='appointment_updated_at_idx'),
+        ]
 
 
 class Prescription(models.Model):
@@ -133,6 +150,50 @@ class Prescription(models.Model):
     duration = models.CharField(max_length=30, choices=DURATION_CHOICES, default='5 days')
     instructions = models.CharField(max_length=200, blank=True, null=True, help_text="e.g., Take with water")
     prescribed_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('appointment', 'medicine')
+        ordering = ['medicine__name']
+
+    def __str__(self):
+        return f"{self.medicine.name} → {self.frequency} for {self.duration}"
+
+
+class ArchivedAppointment(models.Model):
+    """Cold copy of a finished appointment moved out of the live table."""
+    id = models.BigIntegerField(primary_key=True)
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='archived_appointments')
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, related_name='archived_appointments')
+    service = models.CharField(max_length=50, choices=Appointment.SERVICE_CHOICES)
+    date = models.DateField()
+    time = models.TimeField()
+    notes = models.TextField(blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    suggested_medicines = models.ManyToManyField(Medicine, blank=True, related_name='archived_appointments')
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    is_archived = True
+
+    def get_relevant_category(self):
+        return Appointment.SERVICE_TO_CATEGORY.get(self.service, 'General')
+
+    def __str__(self):
+        return f"{self.patient.name} → Dr. {self.doctor.name} ({self.service}) [archived]"
+
+    class Meta:
+        ordering = ['-date', '-time']
+
+
+class ArchivedPrescription(models.Model):
+    """Prescription rows that belonged to an archived appointment."""
+    appointment = models.ForeignKey(ArchivedAppointment, on_delete=models.CASCADE, related_name='prescriptions')
+    medicine = models.ForeignKey(Medicine, on_delete=models.CASCADE, related_name='archived_prescriptions')
+    frequency = models.CharField(max_length=30, choices=Prescription.FREQUENCY_CHOICES)
+    duration = models.CharField(max_length=30, choices=Prescription.DURATION_CHOICES)
+    instructions = models.CharField(max_length=200, blank=True, null=True)
+    prescribed_at = models.DateTimeField()
 
     class Meta:
         unique_together = ('appointment', 'medicine')
@@ -166,3 +227,73 @@ class ConfirmationCode(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+
+
+class IdempotencyKey(models.Model):
+    """Remembers the response to a POST so a retry with the same key replays it instead of re-running it."""
+    scope = models.CharField(max_length=150)
+    key = models.CharField(max_length=64)
+    request_hash = models.CharField(max_length=64)
+    # Null while the first request with this key is still being processed
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    location = models.CharField(max_length=500, blank=True)
+    body = models.BinaryField(blank=True, default=b'')
+    messages = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def save(self, *args, **kwargs):
+        if not self.expires_at:
+            self.expires_at = timezone.now() + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+        super().save(*args, **kwargs)
+
+    def is_expired(self):
+        return timezone.now() > self.expires_at
+
+    def __str__(self):
+        return f"{self.scope} [{self.key}]"
+
+    class Meta:
+        unique_together = ('scope', 'key')
+
+
+class AppointmentNotification(models.Model):
+    """A status change the patient still has to be emailed about; see medicines.notifications."""
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='appointment_notifications')
+    appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE, related_name='notifications')
+    status = models.CharField(max_length=20, choices=Appointment.STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Null until the email carrying this change has been handed to the mail server
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.patient.name}: appointment {self.appointment_id} {self.status}"
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # The sender only ever scans unsent rows, which stay few
+            models.Index(fields=['patient'], condition=models.Q(sent_at__isnull=True), name='notification_unsent_idx'),
+        ]
+
+
+class AppointmentReminder(models.Model):
+    """A reminder for an appointment ``lead_hours`` ahead; see medicines.reminders.
+
+    The unique constraint is what makes each reminder go out once: a row is
+    created before sending and claimed by setting sent_at.
+    """
+    appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE, related_name='reminders')
+    lead_hours = models.PositiveSmallIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Null until the reminder has been handed to the mail server
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Appointment {self.appointment_id}: {self.lead_hours}h reminder"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['appointment', 'lead_hours'], name='unique_reminder_per_lead'),
+        ]
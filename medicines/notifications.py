@@ -0,0 +1,90 @@
+"""Emails telling patients their appointment was approved, completed or rejected.
+
+A status change only records an AppointmentNotification and, unless a send
+job is already queued (``enqueue_once``), queues one
+APPOINTMENT_NOTIFICATION_WINDOW seconds out. By the time it runs, every change in the window has piled up: each
+patient gets one email covering all of theirs (only the latest status per
+appointment), and the emails go out in batches over one mail connection
+instead of one SMTP session per message.
+"""
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from jobs.queue import task
+
+from .models import AppointmentNotification
+
+STATUS_VERBS = {
+    'Approved': 'has been approved',
+    'Completed': 'has been marked as completed',
+    'Cancelled': 'has been cancelled by the doctor',
+}
+
+
+def notify_status_change(appointment):
+    """Record that the patient should hear about ``appointment``'s new status."""
+    if not settings.APPOINTMENT_NOTIFICATIONS_ENABLED or appointment.status not in STATUS_VERBS:
+        return
+    AppointmentNotification.objects.create(
+        patient_id=appointment.patient_id, appointment=appointment, status=appointment.status,
+    )
+    send_appointment_notifications.enqueue_once(delay=settings.APPOINTMENT_NOTIFICATION_WINDOW)
+
+
+def build_message(patient, notifications):
+    """One email summarising a patient's pending changes, latest status per appointment."""
+    latest = {n.appointment_id: n for n in notifications}
+    lines = []
+    for notification in latest.values():
+        appointment = notification.appointment
+        lines.append(
+            f'- Your {appointment.service} appointment with Dr. {appointment.doctor.name} on '
+            f'{appointment.date:%b %d, %Y} at {appointment.time:%H:%M} {STATUS_VERBS[notification.status]}.'
+        )
+    subject = 'Update on your appointment' if len(lines) == 1 else f'Updates on {len(lines)} of your appointments'
+    body = f'Hello {patient.name},\n\n' + '\n'.join(lines) + '\n\nLog in to MedCare to see the details.'
+    return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [patient.email])
+
+
+def send_pending(connection=None):
+    """Send every pending notification and return the number of emails sent.
+
+    Works through APPOINTMENT_NOTIFICATION_BATCH_SIZE patients at a time over a
+    single connection. A batch's rows are claimed before sending, so two
+    senders never email the same change, and released again if sending fails.
+    """
+    pending = AppointmentNotification.objects.filter(sent_at__isnull=True)
+    connection = connection or get_connection()
+    sent = 0
+    with connection:
+        while True:
+            patient_ids = list(
+                pending.order_by().values_list('patient_id', flat=True).distinct()[:settings.APPOINTMENT_NOTIFICATION_BATCH_SIZE]
+            )
+            if not patient_ids:
+                break
+            claimed_at = timezone.now()
+            pending.filter(patient_id__in=patient_ids).update(sent_at=claimed_at)
+            batch = list(
+                AppointmentNotification.objects.filter(patient_id__in=patient_ids, sent_at=claimed_at)
+                .select_related('patient', 'appointment__doctor').order_by('patient_id', 'id')
+            )
+            messages = []
+            for _, group in groupby(batch, key=lambda n: n.patient_id):
+                notifications = list(group)
+                messages.append(build_message(notifications[0].patient, notifications))
+            try:
+                connection.send_messages(messages)
+            except Exception:
+                AppointmentNotification.objects.filter(id__in=[n.id for n in batch]).update(sent_at=None)
+                raise
+            sent += len(messages)
+    return sent
+
+
+@task()
+def send_appointment_notifications():
+    send_pending()
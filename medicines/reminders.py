@@ -0,0 +1,105 @@
+"""Reminder emails for Approved appointments, sent by ``python manage.py send_reminders``.
+
+Each lead time in APPOINTMENT_REMINDER_LEAD_HOURS owns the slice of time
+between it and the next shorter one: with 24 and 2, an appointment gets the
+24h reminder when it starts 2-24 hours from now and the 2h one inside 2 hours,
+so one approved at short notice only gets the reminder that still makes sense.
+
+Appointments are found with a range scan on the (status, date, time) index,
+so a run reads the appointments inside the windows, however large the table.
+A reminder row is created before sending and claimed by setting sent_at, and
+the unique (appointment, lead_hours) constraint means it is sent once even if
+two runs overlap; a failed send releases the claim for the next run.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Appointment, AppointmentReminder
+
+
+def windows(now=None, lead_hours=None):
+    """(lead_hours, start, end) per lead time, in local time, shortest first."""
+    now = timezone.localtime(now).replace(tzinfo=None)
+    start = now
+    for hours in sorted(lead_hours or settings.APPOINTMENT_REMINDER_LEAD_HOURS):
+        end = now + timedelta(hours=hours)
+        yield hours, start, end
+        start = end
+
+
+def starting_between(start, end):
+    """Q for appointments starting after ``start`` and no later than ``end``."""
+    if start.date() == end.date():
+        return Q(date=start.date(), time__gt=start.time(), time__lte=end.time())
+    return (
+        Q(date=start.date(), time__gt=start.time())
+        | Q(date__gt=start.date(), date__lt=end.date())
+        | Q(date=end.date(), time__lte=end.time())
+    )
+
+
+def due(lead_hours, start, end):
+    """Approved appointments in the window that have not had this reminder yet."""
+    sent = AppointmentReminder.objects.filter(
+        appointment=OuterRef('pk'), lead_hours=lead_hours, sent_at__isnull=False,
+    )
+    return (
+        Appointment.objects
+        # The date range keeps the scan on the index; starting_between trims the edges
+        .filter(status='Approved', date__gte=start.date(), date__lte=end.date())
+        .filter(starting_between(start, end))
+        .exclude(Exists(sent))
+        .order_by('date', 'time')
+    )
+
+
+def build_message(reminder):
+    appointment = reminder.appointment
+    patient = appointment.patient
+    return EmailMessage(
+        f'Reminder: your appointment on {appointment.date:%b %d} at {appointment.time:%H:%M}',
+        f'Hello {patient.name},\n\n'
+        f'This is a reminder of your {appointment.service} appointment with Dr. {appointment.doctor.name} '
+        f'on {appointment.date:%b %d, %Y} at {appointment.time:%H:%M}.\n'
+        f'If you cannot make it, please cancel from your MedCare dashboard so someone else can have the slot.',
+        settings.DEFAULT_FROM_EMAIL,
+        [patient.email],
+    )
+
+
+def send_due(now=None, connection=None, batch_size=None):
+    """Send every reminder that is due and return {lead_hours: reminders sent}."""
+    batch_size = batch_size or settings.APPOINTMENT_REMINDER_BATCH_SIZE
+    connection = connection or get_connection()
+    counts = {}
+    with connection:
+        for lead_hours, start, end in windows(now):
+            counts[lead_hours] = 0
+            while True:
+                ids = list(due(lead_hours, start, end).values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                AppointmentReminder.objects.bulk_create(
+                    [AppointmentReminder(appointment_id=id, lead_hours=lead_hours) for id in ids],
+                    ignore_conflicts=True,
+                )
+                claimed_at = timezone.now()
+                AppointmentReminder.objects.filter(
+                    appointment_id__in=ids, lead_hours=lead_hours, sent_at__isnull=True,
+                ).update(sent_at=claimed_at)
+                batch = list(
+                    AppointmentReminder.objects
+                    .filter(appointment_id__in=ids, lead_hours=lead_hours, sent_at=claimed_at)
+                    .select_related('appointment__patient', 'appointment__doctor')
+                )
+                try:
+                    connection.send_messages([build_message(reminder) for reminder in batch])
+                except Exception:
+                    AppointmentReminder.objects.filter(id__in=[r.id for r in batch]).update(sent_at=None)
+                    raise
+                counts[lead_hours] += len(batch)
+    return counts
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.mail import send_mail
+
+from jobs.queue import task
+
+from .models import ConfirmationCode
+from .notifications import send_appointment_notifications  # noqa: F401  (registers the task)
+
+
+@task()
+def send_confirmation_code(confirmation_code_id):
+    """Email a patient the OTP that confirms an appointment cancellation.
+
+    Enqueue with ``send_confirmation_code.enqueue(confirmation_code_id=code.id)``
+    after creating the code, so the request does not wait on the mail server.
+    """
+    code = ConfirmationCode.objects.select_related('patient', 'appointment__doctor').filter(id=confirmation_code_id).first()
+    if code is None or code.is_verified or code.is_expired():
+        return
+
+    appointment = code.appointment
+    send_mail(
+        'Your appointment cancellation code',
+        f'Hello {code.patient.name},\n\n'
+        f'Use the code {code.code} to confirm cancelling your {appointment.service} appointment '
+        f'with Dr. {appointment.doctor.name} on {appointment.date:%b %d, %Y} at {appointment.time:%H:%M}.\n'
+        f'The code expires in 10 minutes. If you did not ask to cancel, ignore this email.',
+        settings.DEFAULT_FROM_EMAIL,
+        [code.patient.email],
+    )
@@ -1,3 +1,316 @@
-from django.test import TestCase
+import json
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from hospital_management.testing import QueryBudgetTestCase
+from medicines import history
+from medicines.history import patient_history_page
+from medicines.models import (
+    Appointment, AppointmentNotification, AppointmentReminder, ArchivedAppointment, ArchivedPrescription,
+    IdempotencyKey, Medicine, Prescription,
+)
+from medicines.notifications import send_appointment_notifications, send_pending
+from medicines.reminders import send_due
+
+
+class MedicineViewQueryTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_doctor()
+        self.medicine = self.medicines[0]
+
+    def test_medicine_list(self):
+        with self.assertMaxQueries(3):
+            response = self.client.get(reverse('medicine_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_count'], len(self.medicines))
+        self.assertEqual(len(response.context['medicines_by_category']), len(Medicine.CATEGORY_CHOICES))
+
+    def test_medicine_list_does_not_grow_with_catalog(self):
+        Medicine.objects.bulk_create([
+            Medicine(name=f'Extra {i}', med_type='Syrup', dosage='10ml', category=category)
+            for category, _ in Medicine.CATEGORY_CHOICES
+            for i in range(20)
+        ])
+        with self.assertMaxQueries(3):
+            response = self.client.get(reverse('medicine_list'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_medicine_list_requires_doctor(self):
+        self.client.session.flush()
+        self.login_patient()
+        with self.assertMaxQueries(1):
+            response = self.client.get(reverse('medicine_list'))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+    def test_add_medicine(self):
+        data = {'name': 'Added', 'med_type': 'Tablet', 'dosage': '50mg', 'category': 'ENT'}
+        with self.assertMaxQueries(2):
+            response = self.client.post(reverse('add_medicine'), data)
+        self.assertRedirects(response, reverse('medicine_list'), fetch_redirect_response=False)
+
+    def test_update_medicine(self):
+        with self.assertMaxQueries(3):
+            response = self.client.post(reverse('update_medicine', args=[self.medicine.id]), {'dosage': '750mg'})
+        self.assertRedirects(response, reverse('medicine_list'), fetch_redirect_response=False)
+
+    def test_delete_medicine(self):
+        with self.assertMaxQueries(7):
+            response = self.client.get(reverse('delete_medicine', args=[self.medicine.id]))
+        self.assertRedirects(response, reverse('medicine_list'), fetch_redirect_response=False)
+
+
+class AppointmentArchiveTests(QueryBudgetTestCase):
+    def test_moves_finished_appointments(self):
+        finished = Appointment.objects.filter(status__in=Appointment.ARCHIVABLE_STATUSES)
+        ids = set(finished.values_list('id', flat=True))
+        prescriptions = Prescription.objects.count()
+        open_appointments = Appointment.objects.count() - len(ids)
+
+        call_command('archive_appointments', days=0, batch_size=7, stdout=StringIO())
+
+        self.assertEqual(set(ArchivedAppointment.objects.values_list('id', flat=True)), ids)
+        self.assertEqual(ArchivedPrescription.objects.count(), prescriptions)
+        self.assertFalse(Prescription.objects.exists())
+        self.assertEqual(Appointment.objects.count(), open_appointments)
+
+    def test_keeps_suggested_medicines(self):
+        appointment = Appointment.objects.filter(status__in=Appointment.ARCHIVABLE_STATUSES).first()
+        appointment.suggested_medicines.set(self.medicines[:2])
+
+        call_command('archive_appointments', days=0, stdout=StringIO())
+
+        archived = ArchivedAppointment.objects.get(id=appointment.id)
+        self.assertEqual(set(archived.suggested_medicines.all()), set(self.medicines[:2]))
+
+    def test_history_pages_merge_live_and_archived(self):
+        call_command('archive_appointments', days=0, stdout=StringIO())
+        # Older than every archived row, but still live
+        Appointment.objects.create(
+            patient=self.patient, doctor=self.doctor, service='General Checkup',
+            date=datetime(2025, 12, 1).date(), time=datetime(2025, 12, 1, 9).time(), status='Pending',
+        )
+        pages = []
+        page = 1
+        while True:
+            rows, has_next = patient_history_page(self.patient, page, per_page=4)
+            pages.extend((row.date, row.time, type(row)) for row in rows)
+            if not has_next:
+                break
+            page += 1
+
+        self.assertEqual(len(pages), self.APPOINTMENTS_PER_PATIENT + 1)
+        self.assertEqual([key[:2] for key in pages], sorted((key[:2] for key in pages), reverse=True))
+        self.assertEqual(pages[-1][2], Appointment)
+        self.assertIn(ArchivedAppointment, [key[2] for key in pages])
+
+    def test_first_history_page_reads_only_recent_live_rows(self):
+        call_command('archive_appointments', days=0, stdout=StringIO())
+        Appointment.objects.filter(patient=self.patient).update(date=datetime(2027, 1, 1).date())
+        with CaptureQueriesContext(connection) as queries:
+            rows, has_next = patient_history_page(self.patient, 1, per_page=1)
+        self.assertEqual([type(row) for row in rows], [Appointment])
+        self.assertTrue(has_next)
+        self.assertFalse([query for query in queries if 'UNION' in query['sql']])
+
+    def test_history_page_skips_rows_archived_mid_read(self):
+        call_command('archive_appointments', days=0, stdout=StringIO())
+        load = history.with_details
+
+        def archive_races(queryset):
+            if queryset.model is ArchivedAppointment:
+                ArchivedAppointment.objects.filter(patient=self.patient).delete()
+            return load(queryset)
+
+        with mock.patch('medicines.history.with_details', archive_races):
+            rows, _ = patient_history_page(self.patient, 1, per_page=self.APPOINTMENTS_PER_PATIENT)
+        self.assertTrue(rows)
+        self.assertEqual({type(row) for row in rows}, {Appointment})
+
+
+class IdempotencyKeyTests(QueryBudgetTestCase):
+    DATA = {'doctor_id': 1, 'service': 'ENT Consultation', 'date': '2026-12-01', 'time': '10:00', 'idempotency_key': 'k'}
+
+    def setUp(self):
+        super().setUp()
+        self.login_patient()
+        self.data = dict(self.DATA, doctor_id=self.doctor.id)
+
+    def abandon(self, seconds_ago):
+        """A key left in progress, as by a worker killed mid-request."""
+        IdempotencyKey.objects.create(
+            scope=f'patient:{self.patient.id}:{reverse("book_appointment")}', key='k', request_hash='',
+        )
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=seconds_ago))
+
+    def test_retry_replays_first_response(self):
+        first = self.client.post(reverse('book_appointment'), self.data)
+        retry = self.client.post(reverse('book_appointment'), self.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry['Location'], first['Location'])
+        self.assertEqual(Appointment.objects.filter(date='2026-12-01').count(), 1)
+
+    @override_settings(IDEMPOTENCY_KEY_LEASE=60)
+    def test_key_in_progress_conflicts(self):
+        self.abandon(seconds_ago=10)
+        response = self.client.post(reverse('book_appointment'), self.data)
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Appointment.objects.filter(date='2026-12-01').exists())
+
+    @override_settings(IDEMPOTENCY_KEY_LEASE=60)
+    def test_abandoned_key_is_reclaimed(self):
+        self.abandon(seconds_ago=61)
+        response = self.client.post(reverse('book_appointment'), self.data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Appointment.objects.filter(date='2026-12-01').count(), 1)
+        self.assertIsNotNone(IdempotencyKey.objects.get().status_code)
+
+
+class AppointmentNotificationTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_doctor()
+
+    def change_status(self, appointment, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse(name), {'appointment_id': appointment.id})
+
+    def test_changes_are_coalesced_per_patient(self):
+        first, second = self.patient.appointments.filter(doctor=self.doctor)[:2]
+        other = self.patients[self.DOCTORS].appointments.first()
+        self.change_status(first, 'ajax_approve_appointment')
+        self.change_status(first, 'ajax_complete_appointment')
+        self.change_status(second, 'ajax_reject_appointment')
+        self.change_status(other, 'ajax_approve_appointment')
+        self.assertEqual(send_appointment_notifications.queued().count(), 1)
+
+        connection = mail.get_connection()
+        with mock.patch.object(connection, 'open', wraps=connection.open) as opened:
+            with self.assertMaxQueries(5):
+                sent = send_pending(connection)
+        self.assertEqual(sent, 2)
+        self.assertEqual(opened.call_count, 1)
+
+        message = next(m for m in mail.outbox if m.to == [self.patient.email])
+        self.assertEqual(message.subject, 'Updates on 2 of your appointments')
+        self.assertIn('marked as completed', message.body)
+        self.assertNotIn('has been approved', message.body)
+        self.assertEqual(send_pending(), 0)
+
+    def test_one_send_job_per_transaction(self):
+        appointments = self.doctor.appointments.filter(status='Pending')[:3]
+        operations = [
+            {'op': 'transition', 'appointment_id': a.id, 'new_status': 'Approved'} for a in appointments
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('ajax_batch'), json.dumps({'operations': operations, 'atomic': True}),
+                content_type='application/json',
+            )
+        self.assertEqual([r['status'] for r in response.json()['results']], ['success'] * len(operations))
+        self.assertEqual(send_appointment_notifications.queued().count(), 1)
+
+    def test_failed_send_releases_notifications(self):
+        self.change_status(self.patient.appointments.first(), 'ajax_approve_appointment')
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.send_messages', side_effect=OSError):
+            with self.assertRaises(OSError):
+                send_pending()
+        self.assertTrue(AppointmentNotification.objects.filter(sent_at__isnull=True).exists())
+        self.assertEqual(send_pending(), 1)
+
+
+class AppointmentReminderTests(QueryBudgetTestCase):
+    NOW = datetime(2027, 6, 1, 20, 0)
+
+    def book(self, hours_ahead, status='Approved'):
+        start = self.NOW + timedelta(hours=hours_ahead)
+        return Appointment.objects.create(
+            patient=self.patient, doctor=self.doctor, service='General Checkup',
+            date=start.date(), time=start.time(), status=status,
+        )
+
+    def send(self, hours_later=0):
+        return send_due(now=timezone.make_aware(self.NOW + timedelta(hours=hours_later)))
+
+    def test_each_reminder_is_sent_once(self):
+        soon = self.book(1)
+        overnight = self.book(5)
+        tomorrow = self.book(20)
+        self.book(30)
+        self.book(1, status='Pending')
+
+        with self.assertMaxQueries(10):
+            self.assertEqual(self.send(), {2: 1, 24: 2})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(self.send(), {2: 0, 24: 0})
+
+        self.assertEqual(self.send(hours_later=4), {2: 1, 24: 0})
+        self.assertEqual(
+            set(AppointmentReminder.objects.values_list('appointment_id', 'lead_hours')),
+            {(soon.id, 2), (overnight.id, 24), (tomorrow.id, 24), (overnight.id, 2)},
+        )
+
+    def test_batches_share_one_connection(self):
+        for _ in range(5):
+            self.book(3)
+        connection = mail.get_connection()
+        with mock.patch.object(connection, 'open', wraps=connection.open) as opened:
+            counts = send_due(now=timezone.make_aware(self.NOW), connection=connection, batch_size=2)
+        self.assertEqual(counts[24], 5)
+        self.assertEqual(opened.call_count, 1)
+
+
+class AppointmentAdminTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'secret'))
+        self.url = reverse('admin:medicines_appointment_changelist')
+
+    def test_changelist_does_not_grow_with_rows(self):
+        # Session, user, estimate, COUNT, the page with patient and doctor joined, then the date
+        # hierarchy's MIN/MAX and one EXISTS per month (the test data spans three)
+        with self.assertMaxQueries(11):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.context['cl'].result_list), 50)
+        self.assertContains(response, str(self.appointments[-1].patient))
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1)
+    def test_unfiltered_count_is_estimated(self):
+        self.client.get(self.url)
+        Appointment.objects.filter(id__in=[a.id for a in self.appointments[:10]]).delete()
+        # SQLite has no estimate; the count cached by the first request is reused
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['cl'].result_count, len(self.appointments))
+        cache.clear()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['cl'].result_count, len(self.appointments) - 10)
+        response = self.client.get(self.url, {'status__exact': 'Approved'})
+        self.assertEqual(response.context['cl'].result_count, Appointment.objects.filter(status='Approved').count())
+
+    def test_search_uses_exact_keys(self):
+        response = self.client.get(self.url, {'q': self.patient.email})
+        self.assertEqual(response.context['cl'].result_count, self.APPOINTMENTS_PER_PATIENT)
+        response = self.client.get(self.url, {'q': str(self.appointments[0].id)})
+        self.assertEqual(list(response.context['cl'].result_list), [self.appointments[0]])
+
+    def test_bulk_status_action_is_one_update(self):
+        pending = Appointment.objects.filter(status='Pending')
+        ids = list(pending.values_list('id', flat=True))
+        before = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, {'action': 'mark_approved', '_selected_action': ids})
+        updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE "medicines_appointment"')]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(pending.exists())
+        self.assertFalse(Appointment.objects.filter(id__in=ids, updated_at__lt=before).exists())
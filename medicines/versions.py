@@ -0,0 +1,48 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+
+from .models import Medicine
+
+
+def queryset_version(queryset, field='updated_at'):
+    """Cheap change marker for a queryset: row count plus the newest ``field`` value."""
+    agg = queryset.aggregate(count=Count('pk'), latest=Max(field))
+    return f"{agg['count']}:{agg['latest'].timestamp() if agg['latest'] else 0}"
+
+
+def catalog_version(category=None):
+    """Version of the medicine catalog, optionally limited to one category."""
+    medicines = Medicine.objects.all()
+    if category:
+        medicines = medicines.filter(category=category)
+    return queryset_version(medicines)
+
+
+def make_etag(request, *parts):
+    """Build an ETag for a per-user page from version ``parts``.
+
+    Returns None (no conditional handling) while flash messages are queued, so a
+    304 never hides a message the page would have shown. The CSRF cookie is part
+    of the tag because the cached page embeds a token derived from it, and the
+    full path because ``?page=2`` renders different rows from the same versions.
+    """
+    if len(get_messages(request)):
+        return None
+    parts += (request.get_full_path(), request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''))
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def appointments_version(appointments):
+    """Version of an appointment queryset and the prescriptions, patients and doctors shown with it."""
+    agg = appointments.aggregate(
+        count=Count('pk', distinct=True),
+        latest=Max('updated_at'),
+        rx_count=Count('prescriptions', distinct=True),
+        rx_latest=Max('prescriptions__updated_at'),
+        patient_latest=Max('patient__updated_at'),
+        doctor_latest=Max('doctor__updated_at'),
+    )
+    return ':'.join(str(agg[key]) for key in sorted(agg))
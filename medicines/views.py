@@ -1,8 +1,20 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 from .models import Medicine
+from .versions import catalog_version, make_etag
 
 
+def medicine_list_etag(request):
+    """Validator for the medicine directory: only changes when the catalog does."""
+    if request.session.get('user_type') != 'doctor':
+        return None
+    return make_etag(request, 'medicine-list', catalog_version())
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=medicine_list_etag)
 def medicine_list(request):
     """Only doctors can access the medicines directory."""
     if request.session.get('user_type') != 'doctor':
@@ -10,15 +22,18 @@ def medicine_list(request):
         return redirect('home')
 
     categories = Medicine.CATEGORY_CHOICES
-    medicines_by_category = {}
-    for cat_value, cat_label in categories:
-        meds = Medicine.objects.filter(category=cat_value)
-        if meds.exists():
-            medicines_by_category[cat_label] = meds
+    # One query for the whole catalog, grouped here in CATEGORY_CHOICES order
+    medicines = list(Medicine.objects.all())
+    grouped = {}
+    for med in medicines:
+        grouped.setdefault(med.category, []).append(med)
+    medicines_by_category = {
+        cat_label: grouped[cat_value] for cat_value, cat_label in categories if cat_value in grouped
+    }
 
     context = {
         'medicines_by_category': medicines_by_category,
-        'total_count': Medicine.objects.count(),
+        'total_count': len(medicines),
         'categories': categories,
     }
     return render(request, 'medicines/medicine_list.html', context)
@@ -1,7 +1,12 @@
 from django.contrib import admin
+
+from hospital_management.admin import ScalableModelAdmin
+
 from .models import Patient
 
 @admin.register(Patient)
-class PatientAdmin(admin.ModelAdmin):
+class PatientAdmin(ScalableModelAdmin):
     list_display = ('name', 'email', 'phone', 'created_at')
     search_fields = ('name', 'email')
+    # Primary-key order pages from the index; also orders the appointment autocomplete
+    ordering = ('-id',)
@@ -1,5 +1,7 @@
 from django.db import models
 
+from hospital_management.soft_delete import SoftDeleteQuerySet
+
 
 class Patient(models.Model):
     name = models.CharField(max_length=100)
@@ -7,6 +9,11 @@ class Patient(models.Model):
     password = models.CharField(max_length=128)
     phone = models.CharField(max_length=15)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Set when the account is deleted; the rows go later, in a background purge
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -0,0 +1,21 @@
+from django.conf import settings
+
+from analytics.rollups import retain_patient
+from hospital_management.soft_delete import purge
+from jobs.queue import task
+
+from .models import Patient
+
+
+@task()
+def purge_patient(patient_id):
+    """Remove a soft-deleted patient and their appointments, in batches.
+
+    Their appointments stay counted in the analytics rollups, as a deleted
+    doctor's do.
+    """
+    patient = Patient.objects.filter(id=patient_id, deleted_at__isnull=False).first()
+    if patient is None:
+        return
+    retain_patient(patient_id)
+    purge(patient, settings.ACCOUNT_PURGE_BATCH_SIZE)
@@ -1,3 +1,187 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.urls import reverse
+
+from analytics.models import DeletedPatientRollup
+from hospital_management.testing import PASSWORD, QueryBudgetTestCase
+from medicines.models import (
+    Appointment, AppointmentNotification, AppointmentReminder, ArchivedAppointment, ConfirmationCode, Prescription,
+)
+
+from .models import Patient
+
+
+class PatientPublicViewQueryTests(QueryBudgetTestCase):
+    def test_register_page(self):
+        with self.assertMaxQueries(0):
+            response = self.client.get(reverse('patient_register'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_register_submit(self):
+        data = {
+            'name': 'New Patient', 'email': 'new.patient@example.com', 'phone': '5550000',
+            'password': PASSWORD, 'confirm_password': PASSWORD,
+        }
+        with self.assertMaxQueries(3):
+            response = self.client.post(reverse('patient_register'), data)
+        self.assertRedirects(response, reverse('patient_login'), fetch_redirect_response=False)
+
+    def test_login_page(self):
+        with self.assertMaxQueries(0):
+            response = self.client.get(reverse('patient_login'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_submit(self):
+        with self.assertMaxQueries(5):
+            response = self.client.post(reverse('patient_login'), {'email': self.patient.email, 'password': PASSWORD})
+        self.assertRedirects(response, reverse('patient_dashboard'), fetch_redirect_response=False)
+
+    def test_forgot_password(self):
+        with self.assertMaxQueries(0):
+            response = self.client.get(reverse('forgot_password'))
+        self.assertEqual(response.status_code, 200)
+        with self.assertMaxQueries(5):
+            response = self.client.post(reverse('forgot_password'), {'email': self.patient.email})
+        self.assertEqual(response.json()['status'], 'success')
+
+    def test_reset_password(self):
+        session = self.client.session
+        session[f'reset_token_{self.patient.email}'] = 'token'
+        session.save()
+        with self.assertMaxQueries(1):
+            response = self.client.get(reverse('reset_password'), {'token': 'token', 'email': self.patient.email})
+        self.assertEqual(response.status_code, 200)
+        data = {'token': 'token', 'email': self.patient.email, 'new_password': 'changed1', 'confirm_password': 'changed1'}
+        with self.assertMaxQueries(6):
+            response = self.client.post(reverse('reset_password'), data)
+        self.assertRedirects(response, reverse('patient_login'), fetch_redirect_response=False)
+
+
+class PatientDashboardQueryTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.login_patient()
+
+    def test_dashboard(self):
+        with self.assertMaxQueries(12):
+            response = self.client.get(reverse('patient_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['appointments']), self.APPOINTMENTS_PER_PATIENT)
+
+    def test_dashboard_does_not_grow_with_appointments(self):
+        template = self.patient.appointments.first()
+        Appointment.objects.bulk_create([
+            Appointment(patient=self.patient, doctor=doctor, service=template.service, date=template.date, time=template.time)
+            for doctor in self.doctors * 10
+        ])
+        for page in (1, 2):
+            with self.subTest(page=page), self.assertMaxQueries(10):
+                response = self.client.get(reverse('patient_dashboard'), {'page': page})
+                self.assertEqual(response.status_code, 200)
+
+    def test_dashboard_pages_have_their_own_etags(self):
+        self.client.get(reverse('patient_dashboard'))  # sets the CSRF cookie the tag includes
+        first = self.client.get(reverse('patient_dashboard'))
+        repeat = self.client.get(reverse('patient_dashboard'), HTTP_IF_NONE_MATCH=first['ETag'])
+        second = self.client.get(reverse('patient_dashboard'), {'page': 2}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+        self.assertEqual(second.status_code, 200)
+
+    def test_book_appointment(self):
+        data = {'doctor_id': self.doctor.id, 'service': 'ENT Consultation', 'date': '2026-12-01', 'time': '10:00'}
+        with self.assertMaxQueries(4):
+            response = self.client.post(reverse('book_appointment'), data)
+        self.assertRedirects(response, reverse('patient_dashboard'), fetch_redirect_response=False)
+
+    def test_book_appointment_with_idempotency_key(self):
+        data = {
+            'doctor_id': self.doctor.id, 'service': 'ENT Consultation', 'date': '2026-12-01', 'time': '10:00',
+            'idempotency_key': 'booking-1',
+        }
+        before = Appointment.objects.count()
+        with self.assertMaxQueries(9):
+            self.client.post(reverse('book_appointment'), data)
+        with self.assertMaxQueries(7):
+            self.client.post(reverse('book_appointment'), data)
+        self.assertEqual(Appointment.objects.count(), before + 1)
+
+    def test_update_appointment(self):
+        appointment = self.patient.appointments.first()
+        data = {'doctor': self.doctor.id, 'service': appointment.service, 'date': '2026-12-02', 'time': '11:00'}
+        # The move also marks the old day's analytics rollups stale
+        with self.assertMaxQueries(4):
+            response = self.client.post(reverse('update_appointment', args=[appointment.id]), data)
+        self.assertRedirects(response, reverse('patient_dashboard'), fetch_redirect_response=False)
+
+    def test_cancel_appointment(self):
+        appointment = self.patient.appointments.exclude(status='Cancelled').first()
+        with self.assertMaxQueries(3):
+            response = self.client.post(reverse('cancel_appointment', args=[appointment.id]))
+        self.assertRedirects(response, reverse('patient_dashboard'), fetch_redirect_response=False)
+
+    def test_delete_appointment(self):
+        appointment = self.patient.appointments.filter(status='Completed').first()
+        with self.assertMaxQueries(10):
+            response = self.client.get(reverse('delete_appointment', args=[appointment.id]))
+        self.assertRedirects(response, reverse('patient_dashboard'), fetch_redirect_response=False)
+
+    def test_update_profile(self):
+        with self.assertMaxQueries(6):
+            response = self.client.post(reverse('patient_update_profile'), {'name': 'Renamed', 'phone': '5551234'})
+        self.assertRedirects(response, reverse('patient_dashboard'), fetch_redirect_response=False)
+
+    def test_delete_account(self):
+        # The purge itself runs later, in a job
+        with self.assertMaxQueries(5):
+            response = self.client.get(reverse('patient_delete_account'))
+        self.assertRedirects(response, reverse('patient_login'), fetch_redirect_response=False)
+
+    def test_logout(self):
+        with self.assertMaxQueries(2):
+            response = self.client.get(reverse('patient_logout'))
+        self.assertRedirects(response, reverse('patient_login'), fetch_redirect_response=False)
+
+
+class PatientAccountDeletionTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        call_command('archive_appointments', days=0, stdout=StringIO())
+        appointment = self.patient.appointments.first()
+        appointment.suggested_medicines.add(*self.medicines[:2])
+        ConfirmationCode.objects.create(patient=self.patient, appointment=appointment)
+        AppointmentNotification.objects.create(patient=self.patient, appointment=appointment, status='Approved')
+        AppointmentReminder.objects.create(appointment=appointment, lead_hours=24)
+        self.login_patient()
+
+    def test_deleted_account_is_hidden_until_purged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('patient_delete_account'))
+        self.assertTrue(Patient.objects.filter(id=self.patient.id).exists())
+        self.assertFalse(Patient.objects.active().filter(id=self.patient.id).exists())
+
+        response = self.client.post(reverse('patient_login'), {'email': self.patient.email, 'password': PASSWORD})
+        self.assertNotIn('patient_id', self.client.session)
+        self.assertEqual(response.status_code, 200)
+
+    def test_purge_removes_history(self):
+        other = self.patients[1]
+        others = (other.appointments.count(), other.archived_appointments.count())
+        prescriptions = Prescription.objects.count() - Prescription.objects.filter(appointment__patient=self.patient).count()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('patient_delete_account'))
+
+        # Batches of two, to walk the loop several times
+        with self.settings(ACCOUNT_PURGE_BATCH_SIZE=2):
+            call_command('run_jobs', once=True, concurrency=1, stdout=StringIO(), stderr=StringIO())
+
+        self.assertFalse(Patient.objects.filter(id=self.patient.id).exists())
+        self.assertFalse(Appointment.objects.filter(patient_id=self.patient.id).exists())
+        self.assertFalse(ArchivedAppointment.objects.filter(patient_id=self.patient.id).exists())
+        self.assertFalse(Appointment.suggested_medicines.through.objects.exists())
+        self.assertFalse(ConfirmationCode.objects.exists())
+        self.assertFalse(AppointmentNotification.objects.exists())
+        self.assertFalse(AppointmentReminder.objects.exists())
+        self.assertEqual(Prescription.objects.count(), prescriptions)
+        self.assertEqual((other.appointments.count(), other.archived_appointments.count()), others)
+        self.assertTrue(DeletedPatientRollup.objects.filter(patient_id=self.patient.id).exists())
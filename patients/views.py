@@ -3,10 +3,17 @@ from django.contrib import messages
 from django.contrib.auth.hashers import make_password, check_password
 from .models import Patient
 from .forms import PatientRegistrationForm, PatientLoginForm
+from .tasks import purge_patient
+from analytics.rollups import mark_stale
 from doctors.models import Doctor
 from medicines.models import Appointment
+from medicines.history import patient_history_page
+from medicines.idempotency import idempotent
+from medicines.versions import appointments_version, catalog_version, make_etag, queryset_version
+from django.conf import settings
 from django.http import JsonResponse
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_http_methods
 import secrets
 import string
 
@@ -32,7 +39,7 @@ def login_view(request):
             email = form.cleaned_data['email']
             password = form.cleaned_data['password']
             try:
-                patient = Patient.objects.get(email=email)
+                patient = Patient.objects.active().get(email=email)
                 if check_password(password, patient.password):
                     request.session['patient_id'] = patient.id
                     request.session['patient_name'] = patient.name
@@ -48,6 +55,23 @@ def login_view(request):
     return render(request, 'patients/login.html', {'form': form})
 
 
+def dashboard_etag(request):
+    """Validator for the patient dashboard, computed before any rendering."""
+    patient_id = request.session.get('patient_id')
+    if not patient_id:
+        return None
+    return make_etag(
+        request,
+        'patient-dashboard',
+        queryset_version(Patient.objects.filter(id=patient_id)),
+        appointments_version(Appointment.objects.filter(patient_id=patient_id)),
+        queryset_version(Doctor.objects.active()),
+        catalog_version(),
+    )
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=dashboard_etag)
 def dashboard(request):
     patient_id = request.session.get('patient_id')
     if not patient_id:
@@ -55,8 +79,12 @@ def dashboard(request):
         return redirect('patient_login')
 
     patient = Patient.objects.get(id=patient_id)
-    doctors = Doctor.objects.all()
-    appointments = Appointment.objects.filter(patient=patient).select_related('doctor').prefetch_related('prescriptions__medicine')
+    doctors = Doctor.objects.active()
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    appointments, has_next = patient_history_page(patient, page, settings.PATIENT_HISTORY_PAGE_SIZE)
     service_choices = Appointment.SERVICE_CHOICES
 
     context = {
@@ -64,10 +92,13 @@ def dashboard(request):
         'doctors': doctors,
         'appointments': appointments,
         'service_choices': service_choices,
+        'page': page,
+        'has_next': has_next,
     }
     return render(request, 'patients/dashboard.html', context)
 
 
+@idempotent
 def book_appointment(request):
     patient_id = request.session.get('patient_id')
     if not patient_id:
@@ -81,7 +112,7 @@ def book_appointment(request):
         notes = request.POST.get('notes', '')
 
         try:
-            doctor = Doctor.objects.get(id=doctor_id)
+            doctor = Doctor.objects.active().get(id=doctor_id)
             patient = Patient.objects.get(id=patient_id)
             Appointment.objects.create(
                 patient=patient,
@@ -106,12 +137,15 @@ def update_appointment(request, appointment_id):
     appointment = get_object_or_404(Appointment, id=appointment_id, patient_id=patient_id)
 
     if request.method == 'POST':
+        moved_from = appointment.date
         appointment.doctor_id = request.POST.get('doctor')
         appointment.service = request.POST.get('service')
         appointment.date = request.POST.get('date')
         appointment.time = request.POST.get('time')
         appointment.notes = request.POST.get('notes', '')
         appointment.save()
+        if str(appointment.date) != str(moved_from):
+            mark_stale([moved_from])
         messages.success(request, 'Appointment updated successfully!')
 
     return redirect('patient_dashboard')
@@ -149,6 +183,7 @@ def delete_appointment(request, appointment_id):
     patient_name = appointment.patient.name
 
     appointment.delete()
+    mark_stale([appointment.date])
     messages.success(request, 'Appointment deleted successfully!')
     return redirect('patient_dashboard')
 
@@ -175,8 +210,9 @@ def delete_account(request):
     if not patient_id:
         return redirect('patient_login')
 
-    patient = Patient.objects.get(id=patient_id)
-    patient.delete()
+    # Hidden from now on; purge_patient removes the account and its history in the background
+    Patient.objects.filter(id=patient_id).soft_delete()
+    purge_patient.enqueue(patient_id=patient_id)
     request.session.flush()
     messages.success(request, 'Your account has been deleted.')
     return redirect('patient_login')
@@ -202,7 +238,7 @@ def forgot_password(request):
             return JsonResponse({'status': 'error', 'message': 'Email is required'}, status=400)
 
         try:
-            patient = Patient.objects.get(email=email)
+            patient = Patient.objects.active().get(email=email)
             # Generate a unique reset token
             reset_token = secrets.token_urlsafe(32)
 
@@ -265,7 +301,7 @@ def reset_password(request):
             return redirect('patient_login')
 
         try:
-            patient = Patient.objects.get(email=email)
+            patient = Patient.objects.active().get(email=email)
             patient.password = make_password(new_password)
             patient.save()
 
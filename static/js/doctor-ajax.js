@@ -9,7 +9,8 @@ const API_ENDPOINTS = {
     completeAppointment: '/doctor/ajax/complete-appointment/',
     rejectAppointment: '/doctor/ajax/reject-appointment/',
     getAppointments: '/doctor/ajax/get-appointments/',
-    getStatistics: '/doctor/ajax/get-statistics/'
+    getStatistics: '/doctor/ajax/get-statistics/',
+    batch: '/doctor/ajax/batch/'
 };
 
 // Utility function to show notifications with beautiful alerts
@@ -39,108 +40,89 @@ function getCSRFToken() {
 }
 
 /**
- * Handle Approve Appointment via AJAX
+ * Run several doctor operations in one round-trip.
+ * Results come back in the same order as the operations.
+ * One idempotency key covers the whole call: if the network drops, the server
+ * answers 5xx, or the first attempt is still running (409), the same request is
+ * sent again with the same key, so the operations are applied at most once.
  */
-async function ajaxApproveAppointment(appointmentId) {
-    try {
-        const formData = new FormData();
-        formData.append('appointment_id', appointmentId);
-        formData.append('csrfmiddlewaretoken', getCSRFToken());
-
-        const response = await fetch(API_ENDPOINTS.approveAppointment, {
-            method: 'POST',
-            body: formData,
-            headers: {
-                'X-Requested-With': 'XMLHttpRequest'
-            }
-        });
-
-        const data = await response.json();
-
-        if (data.status === 'success') {
-            showNotification(data.message, 'success');
-            updateAppointmentStatus(appointmentId, 'Approved');
-            updateStatistics();
-            return true;
-        } else {
-            showNotification(data.message, 'error');
-            return false;
+const BATCH_RETRY_DELAYS = [500, 1500];
+
+async function ajaxBatch(operations, atomic = false) {
+    const idempotencyKey = newIdempotencyKey();
+    const body = JSON.stringify({ operations: operations, atomic: atomic });
+    for (let attempt = 0; ; attempt++) {
+        const retry = attempt < BATCH_RETRY_DELAYS.length;
+        let response;
+        try {
+            response = await fetch(API_ENDPOINTS.batch, {
+                method: 'POST',
+                body: body,
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Idempotency-Key': idempotencyKey,
+                    'X-CSRFToken': getCSRFToken(),
+                    'X-Requested-With': 'XMLHttpRequest'
+                }
+            });
+        } catch (error) {
+            if (!retry) throw error;
         }
-    } catch (error) {
-        showNotification('Error approving appointment: ' + error.message, 'error');
-        console.error('Error:', error);
-        return false;
+        if (response && !(retry && (response.status === 409 || response.status >= 500))) {
+            return response.json();
+        }
+        await new Promise(resolve => setTimeout(resolve, BATCH_RETRY_DELAYS[attempt]));
     }
 }
 
 /**
- * Handle Complete Appointment via AJAX
+ * Change an appointment's status and refresh the statistics in the same request
  */
-async function ajaxCompleteAppointment(appointmentId) {
+async function ajaxTransitionAppointment(appointmentId, newStatus, notificationType, action) {
     try {
-        const formData = new FormData();
-        formData.append('appointment_id', appointmentId);
-        formData.append('csrfmiddlewaretoken', getCSRFToken());
-
-        const response = await fetch(API_ENDPOINTS.completeAppointment, {
-            method: 'POST',
-            body: formData,
-            headers: {
-                'X-Requested-With': 'XMLHttpRequest'
+        const data = await ajaxBatch([
+            { op: 'transition', appointment_id: appointmentId, new_status: newStatus },
+            { op: 'get_statistics' }
+        ]);
+        const [transition, statistics] = data.results || [];
+
+        if (transition && transition.status === 'success') {
+            showNotification(transition.message, notificationType);
+            updateAppointmentStatus(appointmentId, newStatus);
+            if (statistics && statistics.status === 'success') {
+                renderStatistics(statistics.statistics);
             }
-        });
-
-        const data = await response.json();
-
-        if (data.status === 'success') {
-            showNotification(data.message, 'success');
-            updateAppointmentStatus(appointmentId, 'Completed');
-            updateStatistics();
             return true;
         } else {
-            showNotification(data.message, 'error');
+            showNotification((transition || data).message, 'error');
             return false;
         }
     } catch (error) {
-        showNotification('Error completing appointment: ' + error.message, 'error');
+        showNotification(`Error ${action} appointment: ` + error.message, 'error');
         console.error('Error:', error);
         return false;
     }
 }
 
 /**
- * Handle Reject Appointment via AJAX
+ * Handle Approve Appointment via AJAX
  */
-async function ajaxRejectAppointment(appointmentId) {
-    try {
-        const formData = new FormData();
-        formData.append('appointment_id', appointmentId);
-        formData.append('csrfmiddlewaretoken', getCSRFToken());
-
-        const response = await fetch(API_ENDPOINTS.rejectAppointment, {
-            method: 'POST',
-            body: formData,
-            headers: {
-                'X-Requested-With': 'XMLHttpRequest'
-            }
-        });
+async function ajaxApproveAppointment(appointmentId) {
+    return ajaxTransitionAppointment(appointmentId, 'Approved', 'success', 'approving');
+}
 
-        const data = await response.json();
+/**
+ * Handle Complete Appointment via AJAX
+ */
+async function ajaxCompleteAppointment(appointmentId) {
+    return ajaxTransitionAppointment(appointmentId, 'Completed', 'success', 'completing');
+}
 
-        if (data.status === 'success') {
-            showNotification(data.message, 'warning');
-            updateAppointmentStatus(appointmentId, 'Cancelled');
-            updateStatistics();
-            return true;
-        } else {
-            showNotification(data.message, 'error');
-            return false;
-        }
-    } catch (error) {
-        showNotification('Error rejecting appointment: ' + error.message, 'error');
-        console.error('Error:', error);
-        return false;
-    }
+/**
+ * Handle Reject Appointment via AJAX
+ */
+async function ajaxRejectAppointment(appointmentId) {
+    return ajaxTransitionAppointment(appointmentId, 'Cancelled', 'warning', 'rejecting');
 }
 
 /**
@@ -178,25 +160,29 @@ async function updateStatistics() {
         const data = await response.json();
 
         if (data.status === 'success') {
-            const stats = data.statistics;
-
-            // Update stat cards
-            document.getElementById('totalCount').textContent = stats.total;
-            document.getElementById('pendingCount').textContent = stats.pending;
-            document.getElementById('approvedCount').textContent = stats.approved;
-            document.getElementById('completedCount').textContent = stats.completed;
-            document.getElementById('cancelledCount').textContent = stats.cancelled;
-
-            // Animate updates
-            document.querySelectorAll('.stat-value').forEach(el => {
-                el.style.animation = 'popIn 0.3s ease';
-            });
+            renderStatistics(data.statistics);
         }
     } catch (error) {
         console.error('Error fetching statistics:', error);
     }
 }
 
+/**
+ * Write statistics into the stat cards
+ */
+function renderStatistics(stats) {
+    document.getElementById('totalCount').textContent = stats.total;
+    document.getElementById('pendingCount').textContent = stats.pending;
+    document.getElementById('approvedCount').textContent = stats.approved;
+    document.getElementById('completedCount').textContent = stats.completed;
+    document.getElementById('cancelledCount').textContent = stats.cancelled;
+
+    // Animate updates
+    document.querySelectorAll('.stat-value').forEach(el => {
+        el.style.animation = 'popIn 0.3s ease';
+    });
+}
+
 /**
  * Fetch all appointments data in real-time
  */
@@ -224,6 +210,117 @@ async function fetchAppointmentsData() {
     }
 }
 
+/**
+ * Fill the shared prescribe modal for one appointment.
+ * The category's medicine list is requested with the catalog version in the URL,
+ * so the browser can reuse its cached copy until the catalog changes.
+ */
+async function openPrescribeModal(modal, appointmentId, category) {
+    const container = document.getElementById('prescribeMedicines');
+    const form = document.getElementById('prescribeForm');
+    const submit = form.querySelector('button[type="submit"]');
+    // Responses for an appointment the modal has since been reopened for are dropped
+    modal.dataset.loadingAppointmentId = appointmentId;
+    const isCurrent = () => modal.dataset.loadingAppointmentId === String(appointmentId);
+    container.innerHTML = '<div class="text-center text-muted py-4"><span class="spinner-border spinner-border-sm me-2"></span>Loading medicines...</div>';
+    form.removeAttribute('action');
+    submit.disabled = true;
+    ['prescribePatientName', 'prescribeService', 'prescribeCategory'].forEach(id => {
+        document.getElementById(id).textContent = '';
+    });
+
+    const medicinesUrl = `${modal.dataset.medicinesUrl}?category=${encodeURIComponent(category)}&v=${encodeURIComponent(modal.dataset.catalogVersion)}`;
+    const prescribeDataUrl = `${modal.dataset.prescribeDataUrl}?appointment_id=${encodeURIComponent(appointmentId)}`;
+    const headers = { 'X-Requested-With': 'XMLHttpRequest' };
+
+    try {
+        const [detailResponse, medicinesResponse] = await Promise.all([
+            fetch(prescribeDataUrl, { headers: headers, cache: 'no-store' }),
+            fetch(medicinesUrl, { headers: headers })
+        ]);
+        const detail = await detailResponse.json();
+        const catalog = await medicinesResponse.json();
+        if (!isCurrent()) return;
+
+        if (detail.status !== 'success' || catalog.status !== 'success') {
+            showNotification(detail.message || catalog.message || 'Error loading medicines', 'error');
+            container.innerHTML = '';
+            return;
+        }
+
+        const apt = detail.appointment;
+        document.getElementById('prescribePatientName').textContent = apt.patient_name;
+        document.getElementById('prescribeService').textContent = apt.service;
+        document.getElementById('prescribeCategory').textContent = apt.category;
+        form.setAttribute('action', apt.prescribe_url);
+        renderPrescribeMedicines(container, apt.id, catalog, detail.prescriptions);
+        submit.disabled = false;
+    } catch (error) {
+        if (!isCurrent()) return;
+        showNotification('Error loading medicines: ' + error.message, 'error');
+        console.error('Error:', error);
+        container.innerHTML = '';
+    }
+}
+
+/**
+ * Build one card per medicine from the compact [id, name, type, dosage, description] rows
+ */
+function renderPrescribeMedicines(container, appointmentId, catalog, prescriptions) {
+    const template = document.getElementById('medicineCardTemplate');
+    const existing = {};
+    prescriptions.forEach(rx => { existing[rx.medicine_id] = rx; });
+
+    container.innerHTML = '';
+    if (catalog.medicines.length === 0) {
+        container.innerHTML = '<div class="alert alert-warning"><i class="bi bi-exclamation-circle me-2"></i>No medicines found for this category.</div>';
+        return;
+    }
+
+    const col = {};
+    catalog.fields.forEach((field, index) => { col[field] = index; });
+
+    const fragment = document.createDocumentFragment();
+    const prescribed = [];
+    catalog.medicines.forEach(row => {
+        const medId = row[col.id];
+        const key = `${appointmentId}_${medId}`;
+        const card = template.content.firstElementChild.cloneNode(true);
+        const checkbox = card.querySelector('.med-checkbox');
+        const label = card.querySelector('.med-name');
+        const dosageFields = card.querySelector('.dosage-fields');
+        const frequency = card.querySelector('.med-frequency');
+        const duration = card.querySelector('.med-duration');
+        const instructions = card.querySelector('.med-instructions');
+
+        card.id = 'medCard' + key;
+        dosageFields.id = 'dosageFields' + key;
+        checkbox.id = 'med' + key;
+        checkbox.value = medId;
+        label.htmlFor = checkbox.id;
+        label.textContent = row[col.name];
+        card.querySelector('.med-type').textContent = row[col.med_type];
+        card.querySelector('.med-dosage').textContent = row[col.dosage];
+        card.querySelector('.med-description').textContent = row[col.description] || '';
+        frequency.name = 'frequency_' + medId;
+        duration.name = 'duration_' + medId;
+        instructions.name = 'instructions_' + medId;
+        checkbox.addEventListener('change', () => toggleDosageFields(checkbox, key));
+
+        const rx = existing[medId];
+        if (rx) {
+            checkbox.checked = true;
+            frequency.value = rx.frequency;
+            duration.value = rx.duration;
+            instructions.value = rx.instructions || '';
+            prescribed.push([checkbox, key]);
+        }
+        fragment.appendChild(card);
+    });
+    container.appendChild(fragment);
+    prescribed.forEach(([checkbox, key]) => toggleDosageFields(checkbox, key));
+}
+
 /**
  * Initialize auto-refresh for statistics every 10 seconds
  */
@@ -266,6 +363,16 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // Hydrate the shared prescribe modal with the clicked appointment
+    const prescribeModal = document.getElementById('prescribeModal');
+    if (prescribeModal) {
+        prescribeModal.addEventListener('show.bs.modal', function(e) {
+            const trigger = e.relatedTarget;
+            if (!trigger) return;
+            openPrescribeModal(prescribeModal, trigger.getAttribute('data-appointment-id'), trigger.getAttribute('data-category'));
+        });
+    }
+
     // Initialize auto-refresh
     initAutoRefresh(10);
 
@@ -278,7 +385,9 @@ window.DoctorAJAX = {
     approveAppointment: ajaxApproveAppointment,
     completeAppointment: ajaxCompleteAppointment,
     rejectAppointment: ajaxRejectAppointment,
+    batch: ajaxBatch,
     fetchAppointments: fetchAppointmentsData,
+    openPrescribeModal: openPrescribeModal,
     updateStatistics: updateStatistics,
     showNotification: showNotification
 };
@@ -0,0 +1,22 @@
+/**
+ * Hospital Management System - Idempotency Keys
+ * Gives every form with an `idempotency_key` field a fresh key each time the page is shown,
+ * so resubmitting the same form (e.g. after a timeout) is recognised by the server as a retry.
+ */
+
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    // crypto.randomUUID is only available on HTTPS pages
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2) + Math.random().toString(36).slice(2);
+}
+
+// pageshow also fires when the page comes back from the back/forward cache
+window.addEventListener('pageshow', function() {
+    document.querySelectorAll('input[name="idempotency_key"]').forEach(input => {
+        input.value = newIdempotencyKey();
+    });
+});
+
+window.newIdempotencyKey = newIdempotencyKey;